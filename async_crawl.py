@@ -1,16 +1,73 @@
+import time
 import asyncio
+import contextlib
+import multiprocessing
+from collections import Counter
 import aiohttp
-from urllib.parse import urlparse
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from transport import TransportConfig, create_session
+from urlnorm import URLNormalizer
+from body import BodyDecoder
+from visited import create_visited_set
+from retry import RetryPolicy
+from metrics import ProgressReporter
+from frontier import PriorityFrontier
+from sitemap import SitemapLoader, discover_sitemaps
+from errors import (
+    FetchError,
+    FetchTimeoutError,
+    ConnectError,
+    HTTPStatusError,
+    ContentTypeError,
+    BodyTooLargeError
+)
 from crawl import (
-    normalize_url,
     extract_page_data,
-    get_urls_from_html,
-    is_same_domain
+    page_record,
+    PageParser
 )
 
 
+PARSE_MODES = ("inline", "thread", "process", "stream")
+
+# Score a sitemap <priority> of 1.0 adds under the "score" strategy
+SITEMAP_PRIORITY_WEIGHT = 5.0
+
+
+def create_parse_executor(parse_mode="inline", parse_workers=None):
+    """
+    Create the executor that HTML parsing is dispatched to.
+
+    Args:
+        parse_mode: "inline" (parse on the event loop), "thread", "process"
+            or "stream" (parse on the event loop as the body arrives)
+        parse_workers: Number of pool workers (None lets the pool decide)
+
+    Returns:
+        An Executor, or None for inline and stream parsing
+    """
+    if parse_mode == "inline" or parse_mode == "stream":
+        return None
+    if parse_mode == "thread":
+        return ThreadPoolExecutor(max_workers=parse_workers)
+    if parse_mode == "process":
+        # spawn avoids forking a process that already runs resolver threads
+        return ProcessPoolExecutor(
+            max_workers=parse_workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    raise ValueError(f"Unknown parse mode: {parse_mode}. Expected one of {PARSE_MODES}")
+
+
 class AsyncCrawler:
-    def __init__(self, base_url, max_concurrency=5, max_pages=100):
+    def __init__(self, base_url, max_concurrency=5, max_pages=100,
+                 parse_mode="inline", parse_workers=None, transport=None,
+                 sink=None, keep_records=True, visited=None, checkpoint=None,
+                 resume=False, cache=None, scheduler=None, retry_policy=None,
+                 normalizer=None, router=None, metrics=None, progress_interval=1.0,
+                 metrics_file=None, duplicates=None, strategy=None, scorer=None,
+                 max_depth=None, url_filter=None, sitemaps=(), session=None,
+                 parse_executor=None, page_store=None, extraction=None):
         """
         Initialize the async crawler.
         
@@ -18,30 +75,204 @@ class AsyncCrawler:
             base_url: The starting URL to crawl
             max_concurrency: Maximum number of concurrent requests
             max_pages: Maximum number of pages to crawl
+            parse_mode: Where HTML is parsed: "inline", "thread", "process"
+                or "stream" (fed chunk by chunk while downloading)
+            parse_workers: Number of parse workers for thread/process modes
+            transport: TransportConfig for the HTTP connection pool
+            sink: ReportSink that receives each page as it finishes
+            keep_records: Keep full page dicts in page_data; when False,
+                only failed pages are recorded (as None)
+            visited: Visited-set backend from visited.create_visited_set
+                (default: exact set of URL strings)
+            checkpoint: CheckpointStore that records the frontier and results
+            resume: Continue from the state saved in checkpoint
+            cache: ResponseCache for conditional-GET recrawls
+            scheduler: PolitenessScheduler for per-host limits and robots.txt
+            retry_policy: RetryPolicy for transient failures (default:
+                RetryPolicy())
+            normalizer: URLNormalizer that scopes and deduplicates links
+                (default: URLNormalizer(base_url))
+            router: ShardRouter when this crawler is one shard of a
+                multi-process crawl (see sharded_crawl.py); it takes links
+                owned by other shards and enforces max_pages crawl-wide
+            metrics: CrawlMetrics to record throughput and timings in
+            progress_interval: Seconds between progress lines (None or 0:
+                no progress output)
+            metrics_file: Open text file that gets a JSON metrics snapshot
+                with every progress line (needs metrics)
+            duplicates: DuplicateDetector; pages get a content fingerprint
+                and a duplicate_of field ("" when original), and URLs
+                matching patterns that keep producing duplicates are
+                deferred until the rest of the frontier is done
+            strategy: Crawl order from frontier.STRATEGIES ("bfs", "dfs"
+                or "score") using a PriorityFrontier; None keeps the plain
+                first-in, first-out queue. With a strategy, max_pages
+                counts pages as they come off the frontier rather than as
+                they are queued, so the order decides what gets crawled.
+            scorer: URLScorer for the "score" strategy
+            max_depth: Don't queue links more than this many clicks from
+                the start page
+            url_filter: URLFilter whose include/exclude patterns links
+                must pass to be queued
+            sitemaps: Sitemap (or sitemap index) URLs whose pages seed the
+                frontier alongside base_url; "auto" finds them through
+                robots.txt
+            session: aiohttp session to share with other crawlers (see
+                batch_crawl.py); the crawler won't close it. None creates
+                one from transport.
+            parse_executor: Executor to share with other crawlers for
+                thread/process parsing; the crawler won't shut it down.
+                None creates one from parse_mode and parse_workers.
+            page_store: PageStore that keeps page_data compact: values are
+                PageRecords (read-only mappings equal to the page dicts)
+                with interned URLs and array-backed links
+            extraction: ExtractionSpec of the fields to extract from each
+                page (default: every PAGE_FIELDS field). Links are
+                extracted anyway on pages whose links will be followed.
+                Selectors and extractors need the HTML, so not the
+                "stream" parse mode.
         """
+        if extraction is not None and extraction.needs_html and parse_mode == "stream":
+            raise ValueError("Selector and extractor fields need the whole HTML, "
+                             "not the stream parse mode")
         self.base_url = base_url
-        self.base_domain = urlparse(base_url).netloc
+        self.urls = normalizer if normalizer is not None else URLNormalizer(base_url)
+        self.router = router
         self.page_data = {}
-        self.lock = asyncio.Lock()
         self.max_concurrency = max_concurrency
         self.max_pages = max_pages
-        self.semaphore = asyncio.Semaphore(max_concurrency)
-        self.session = None
+        self.transport = transport if transport is not None else TransportConfig()
+        self.sink = sink
+        self.keep_records = keep_records
+        self.page_store = page_store
+        self.extraction = extraction
+        # What pages whose links are followed need on top of extraction
+        self.link_extraction = (extraction.with_fields("outgoing_links")
+                                if extraction is not None else None)
+        self.visited = visited if visited is not None else create_visited_set()
+        self.checkpoint = checkpoint
+        self.resume = resume
+        self.cache = cache
+        self.scheduler = scheduler
+        self.pages_disallowed = 0
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        # Attempts so far for pages waiting on a retry
+        self.attempts = {}
+        self.retry_handles = set()
+        self.failure_counts = Counter()
+        self.pages_crawled = 0
+        self.pages_failed = 0
+        self.session = session
+        self.owns_session = session is None
         self.should_stop = False
-        self.all_tasks = set() 
+        # Frontier of (url, normalized_url, depth), deduplicated on enqueue
+        self.prioritized = strategy is not None
+        self.queue = PriorityFrontier(strategy, scorer) if self.prioritized else asyncio.Queue()
+        self.max_depth = max_depth
+        self.url_filter = url_filter
+        # Pages taken off a priority frontier (counted against max_pages)
+        self.pages_taken = 0
+        self.sitemaps = sitemaps
+        self.sitemap_loader = None
+        # normalized_url -> sitemap lastmod, for pages not yet crawled
+        self.lastmod = {}
+        self.workers = []
+        self.parse_mode = parse_mode
+        self.parse_workers = parse_workers
+        self.parse_executor = parse_executor
+        self.owns_parse_executor = parse_executor is None
+        self.duplicates = duplicates
+        # Demoted URLs set aside (normalized_url -> (url, depth)), crawled last
+        self.deferred = {}
+        self.metrics = metrics
+        if metrics is not None:
+            metrics.bind(self)
+        self.reporter = (
+            ProgressReporter(self, progress_interval, metrics_file)
+            if progress_interval else None
+        )
 
     async def __aenter__(self):
-        """Context manager entry - create HTTP session."""
-        self.session = aiohttp.ClientSession()
+        """Context manager entry - create HTTP session and parse pool."""
+        if self.owns_parse_executor:
+            self.parse_executor = create_parse_executor(self.parse_mode, self.parse_workers)
+        if self.owns_session:
+            trace_configs = [self.metrics.trace_config()] if self.metrics is not None else None
+            self.session = create_session(self.transport, self.max_concurrency, trace_configs)
+        if self.scheduler is not None:
+            self.scheduler.bind(self.session)
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        """Context manager exit - close HTTP session."""
-        await self.session.close()
+        """Context manager exit - close HTTP session and parse pool."""
+        if self.owns_session:
+            await self.session.close()
+        if self.owns_parse_executor and self.parse_executor is not None:
+            self.parse_executor.shutdown(wait=True, cancel_futures=True)
+            self.parse_executor = None
+
+    def stats(self):
+        """
+        Summary counters for the crawl so far.
+
+        Returns:
+            Dict with pages_found, pages_crawled, pages_failed,
+            pages_disallowed, failure_counts (a Counter), retries and
+            throttled
+        """
+        return {
+            "pages_found": len(self.visited),
+            "pages_crawled": self.pages_crawled,
+            "pages_failed": self.pages_failed,
+            "pages_disallowed": self.pages_disallowed,
+            "failure_counts": Counter(self.failure_counts),
+            "retries": self.retry_policy.retries,
+            "throttled": self.scheduler.throttle_count if self.scheduler is not None else 0,
+        }
+
+    def page_extraction(self, depth):
+        """
+        The ExtractionSpec for a page at depth (None: every field).
+
+        Pages at max_depth skip link extraction unless it was asked for,
+        since their links would never be queued.
+        """
+        if self.extraction is None:
+            return None
+        if self.max_depth is not None and depth >= self.max_depth:
+            return self.extraction
+        return self.link_extraction
+
+    async def parse_html(self, html, page_url, spec=None):
+        """
+        Extract page data, off the event loop when a parse pool is configured.
+
+        Only the raw HTML goes to the worker and only the compact page
+        dict comes back.
+
+        Args:
+            html: The HTML content
+            page_url: The URL the HTML was fetched from
+            spec: ExtractionSpec of the fields to extract (None: all)
+
+        Returns:
+            The page data dictionary from extract_page_data
+        """
+        fingerprint = self.duplicates is not None
+        if self.parse_executor is None:
+            return extract_page_data(html, page_url, fingerprint, spec)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.parse_executor, extract_page_data, html, page_url, fingerprint, spec
+        )
+
     async def add_page_visit(self, normalized_url):
         """
-        Thread-safe check if we've visited a page.
+        Check if we've visited a page and claim it if not.
         Handles stopping when max_pages is reached.
+
+        The check and the claim happen without an await in between, so
+        they are atomic on the event loop and need no lock.
         
         Args:
             normalized_url: The normalized URL to check
@@ -49,149 +280,511 @@ class AsyncCrawler:
         Returns:
             True if first visit, False if already visited or should stop
         """
-        async with self.lock:
-            # Check if we should stop
-            if self.should_stop:
+        # Check if we should stop
+        if self.should_stop:
+            return False
+
+        # Check if already visited
+        if normalized_url in self.visited:
+            return False
+
+        # A priority frontier spends the budget when pages come off it
+        if self.prioritized:
+            self.visited.add(normalized_url)
+            return True
+        if not self.reserve_page(len(self.visited)):
+            return False
+
+        # Mark as visiting (prevent duplicate visits)
+        self.visited.add(normalized_url)
+        if self.keep_records:
+            self.page_data[normalized_url] = None
+        return True
+
+    def reserve_page(self, used):
+        """
+        Count a page against max_pages (across all shards when sharded).
+
+        Args:
+            used: Pages counted so far in this process
+
+        Returns:
+            False, and stops the crawl, once the budget is spent
+        """
+        if self.router is not None:
+            full = not self.router.reserve_page()
+        else:
+            full = used >= self.max_pages
+        if full:
+            self.should_stop = True
+            print(f"\nReached maximum number of pages to crawl: {self.max_pages}")
+            return False
+        return True
+
+    def wanted(self, url, depth):
+        """True if a link at depth passes max_depth and url_filter (the start page always does)."""
+        if not depth:
+            return True
+        if self.max_depth is not None and depth > self.max_depth:
+            return False
+        return self.url_filter is None or self.url_filter.allows(url)
+
+    async def enqueue(self, url, normalized_url=None, defer=True, depth=0):
+        """
+        Add a URL to the frontier if it is in scope and not yet seen.
+
+        Deduplication happens here, before anything is queued, so the queue
+        only ever holds pages that will actually be fetched.
+
+        Args:
+            url: Absolute URL discovered on a page (or the start URL)
+            normalized_url: Its key, if already known to be in scope
+                (from URLNormalizer.filter_links)
+            defer: Set URLs with a demoted pattern aside (see duplicates)
+            depth: Clicks from the start page (0 for the start page)
+
+        Returns:
+            True if the URL was queued
+        """
+        if self.should_stop:
+            return False
+
+        # Depth and URL filters come first, so skipped links cost no budget
+        if not self.wanted(url, depth):
+            return False
+
+        # Check same domain and normalize in one cached lookup
+        if normalized_url is None:
+            normalized_url = self.urls.normalize_in_scope(url)
+            if normalized_url is None:
                 return False
-            
-            # Check if already visited
-            if normalized_url in self.page_data:
+
+        # Links owned by another shard are forwarded, not crawled here
+        if self.router is not None and self.router.route(url, normalized_url, depth):
+            return False
+
+        # Another link to a queued page raises its score
+        if self.prioritized and normalized_url in self.visited:
+            self.queue.link_found(normalized_url)
+            return False
+
+        # Likely duplicates wait until everything else has been crawled
+        if defer and self.duplicates is not None and self.duplicates.is_demoted(url):
+            if normalized_url not in self.visited:
+                self.deferred.setdefault(normalized_url, (url, depth))
+            return False
+
+        if self.scheduler is not None:
+            # Skip the robots.txt check for URLs we've already seen
+            if normalized_url in self.visited:
                 return False
-            
-            # Check if we've reached max_pages
-            if len(self.page_data) >= self.max_pages:
-                self.should_stop = True
-                print(f"\nReached maximum number of pages to crawl: {self.max_pages}")
-                
-                # Cancel all running tasks
-                for task in self.all_tasks:
-                    task.cancel()
-                
+            if not await self.scheduler.allowed(url):
+                self.pages_disallowed += 1
                 return False
-            
-            # Mark as visiting (prevent duplicate visits)
-            self.page_data[normalized_url] = None
-            return True
 
+        if not await self.add_page_visit(normalized_url):
+            return False
 
-    
-    async def get_html(self, url):
+        self.queue.put_nowait((url, normalized_url, depth))
+        if self.metrics is not None:
+            self.metrics.queue_depth()
+        if self.router is not None:
+            self.router.page_queued()
+        if self.checkpoint is not None:
+            self.checkpoint.add_pending(url, normalized_url, depth)
+        return True
+
+    def restore_checkpoint(self):
         """
-        Fetch HTML from a URL asynchronously.
-        
+        Load saved state: finished pages are marked visited (and kept in
+        page_data) without refetching, and pending URLs are queued again.
+        """
+        pending, finished = self.checkpoint.load()
+        if self.prioritized:
+            # Finished pages came off the frontier, so they used up budget;
+            # pending ones are counted when they come off again
+            self.pages_taken = len(finished)
+        for normalized_url, record in finished.items():
+            self.visited.add(normalized_url)
+            if record is None:
+                self.pages_failed += 1
+                self.page_data[normalized_url] = None
+            else:
+                self.pages_crawled += 1
+                if self.keep_records:
+                    self.page_data[normalized_url] = self.keep(record)
+        for url, normalized_url, depth in pending:
+            self.visited.add(normalized_url)
+            if self.keep_records:
+                self.page_data[normalized_url] = None
+            self.queue.put_nowait((url, normalized_url, depth))
+        print(f"Resuming: {len(finished)} pages done, {len(pending)} queued")
+
+    async def fetch(self, url, headers=None, parser=None):
+        """
+        Fetch a page asynchronously, optionally as a conditional request.
+
+        The body is read in chunks and decoded incrementally, and the
+        download is abandoned as soon as it passes the transport's
+        max_body_size. Non-HTML responses are rejected before any of the
+        body is read.
+
         Args:
             url: The URL to fetch
-            
+            headers: Extra request headers (e.g. If-None-Match)
+            parser: Optional PageParser to feed decoded text to as it
+                arrives instead of collecting the HTML; the download stops
+                early once the parser is complete
+
         Returns:
-            HTML content as string
-            
+            (status, response_headers, html, body_size); html is None and
+            body_size 0 for a 304 Not Modified, and html is None when a
+            parser was given
+
         Raises:
-            Exception: If request fails or content is not HTML
+            FetchError: A subclass naming the failure (timeout, connect,
+                HTTP status, content type or body size)
         """
+        metrics = self.metrics
+        if self.scheduler is not None:
+            slot = self.scheduler.slot(url)
+            if metrics is not None:
+                slot = metrics.timed("slot_wait", slot)
+        else:
+            slot = contextlib.nullcontext()
+
+        if metrics is not None:
+            metrics.in_flight += 1
+            started = time.perf_counter()
         try:
-            async with self.session.get(
-                url,
-                headers={"User-Agent": "BootCrawler/1.0"},
-                timeout=aiohttp.ClientTimeout(total=10)
-            ) as response:
+            # Default headers and timeout are session-wide (see transport.py)
+            async with slot, self.session.get(url, headers=headers) as response:
+                if self.scheduler is not None:
+                    self.scheduler.record_response(url, response.status, response.headers)
+
+                if response.status == 304:
+                    return response.status, response.headers, None, 0
+
                 # Check status code
                 if response.status >= 400:
-                    raise Exception(f"HTTP error: {response.status}")
+                    raise HTTPStatusError(response.status, response.headers)
                 
                 # Check content type
                 content_type = response.headers.get('Content-Type', '')
                 if 'text/html' not in content_type:
-                    raise Exception(f"Invalid content type: {content_type}. Expected text/html")
+                    raise ContentTypeError(content_type)
                 
-                # Return HTML
-                return await response.text()
+                max_body_size = self.transport.max_body_size
+                if (max_body_size is not None and response.content_length is not None
+                        and response.content_length > max_body_size):
+                    raise BodyTooLargeError(max_body_size)
+
+                decoder = BodyDecoder(content_type)
+                parts = []
+                body_size = 0
+                if metrics is not None:
+                    body_started = time.perf_counter()
+                async for chunk in response.content.iter_chunked(self.transport.chunk_size):
+                    body_size += len(chunk)
+                    if max_body_size is not None and body_size > max_body_size:
+                        raise BodyTooLargeError(max_body_size)
+                    text = decoder.feed(chunk)
+                    if parser is not None:
+                        parser.feed(text)
+                        if parser.complete:
+                            # Every requested field is found; skip the rest
+                            break
+                    else:
+                        parts.append(text)
+                text = decoder.close()
+                if metrics is not None:
+                    metrics.observe("body", time.perf_counter() - body_started)
+                    metrics.bytes_received += body_size
+                if parser is not None:
+                    parser.feed(text)
+                    parser.close()
+                    return response.status, response.headers, None, body_size
+                parts.append(text)
+                return response.status, response.headers, "".join(parts), body_size
                 
         except asyncio.TimeoutError:
-            raise Exception("Request timeout")
+            raise FetchTimeoutError("Request timeout")
+        except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError) as e:
+            raise ConnectError(f"Request failed: {e}")
         except aiohttp.ClientError as e:
-            raise Exception(f"Request failed: {e}")
+            raise FetchError(f"Request failed: {e}")
+        finally:
+            if metrics is not None:
+                metrics.in_flight -= 1
+                metrics.observe("fetch", time.perf_counter() - started)
+
+    async def get_html(self, url):
+        """
+        Fetch HTML from a URL asynchronously.
+        
+        Args:
+            url: The URL to fetch
+            
+        Returns:
+            HTML content as string
+            
+        Raises:
+            FetchError: If request fails or content is not HTML
+        """
+        _, _, html, _ = await self.fetch(url)
+        return html
    
-    async def crawl_page(self, current_url):
+    async def crawl_page(self, current_url, normalized_url, depth=0):
         """
-        Recursively crawl a page and its links.
+        Fetch and parse one page, then queue its links.
 
         Args:
             current_url: The URL to crawl
+            normalized_url: Its normalized form (the page_data key)
+            depth: Clicks from the start page
+
+        Returns:
+            True if the page was rescheduled for a retry (its queue item
+            stays open until the retry is queued), otherwise None
         """
-        # Check if should stop
-        if self.should_stop:
-            return
+        # Taken here so the entry goes whether the page succeeds or fails
+        attempt = self.attempts.pop(normalized_url, 0)
+        # Retries were counted the first time round
+        if self.prioritized and not attempt:
+            if self.should_stop or not self.reserve_page(self.pages_taken):
+                return
+            self.pages_taken += 1
+            if self.keep_records:
+                self.page_data[normalized_url] = None
 
-        # Check same domain
-        if not is_same_domain(self.base_url, current_url):
+        spec = self.page_extraction(depth)
+        # Cached records only count if they were extracted the same way
+        extraction_key = spec.cache_key if spec is not None else ""
+        # Revalidate pages we have cached instead of refetching them
+        entry = (self.cache.get(normalized_url, extraction_key)
+                 if self.cache is not None else None)
+        lastmod = self.lastmod.pop(normalized_url, None) if self.lastmod else None
+        if entry is not None and entry.unchanged_since(lastmod):
+            # Its sitemap says it hasn't changed since: no request at all
+            self.cache.record_skip(entry)
+            return await self.finish_page(current_url, normalized_url, depth, entry.record, 0)
+        headers = entry.conditional_headers() if entry is not None else None
+        if self.parse_mode == "stream":
+            parser = PageParser(current_url, fingerprint=self.duplicates is not None,
+                                fields=spec.fields if spec is not None else None)
+        else:
+            parser = None
+
+        try:
+            # Fetch HTML
+            status, response_headers, html, body_size = await self.fetch(
+                current_url, headers, parser
+            )
+        except FetchError as e:
+            if self.retry_policy.should_retry(e, attempt):
+                delay = self.retry_policy.delay(e, attempt)
+                print(f"Retrying {current_url} in {delay:.1f}s ({e.kind}: {e})")
+                self.schedule_retry(current_url, normalized_url, depth, attempt + 1, delay)
+                return True
+            print(f"Error fetching {current_url}: {e}")
+            self.record_failure(normalized_url, e.kind)
             return
 
-        # Normalize URL
-        normalized_url = normalize_url(current_url)
+        if self.cache is not None:
+            self.cache.record_request(entry, status == 304)
 
-        # Check if first visit
-        is_new = await self.add_page_visit(normalized_url)
-        if not is_new:
-            return
+        if status == 304 and entry is not None:
+            # Unchanged: reuse the cached extraction, links included
+            data = entry.record
+        else:
+            parse_started = time.perf_counter()
+            if parser is not None:
+                # Already parsed while downloading
+                data = page_record(parser, current_url)
+            else:
+                try:
+                    data = await self.parse_html(html, current_url, spec)
+                except Exception as e:
+                    print(f"Error parsing {current_url}: {e}")
+                    self.record_failure(normalized_url, "parse")
+                    return
+            if self.metrics is not None:
+                self.metrics.observe("parse", time.perf_counter() - parse_started)
+            if self.cache is not None:
+                self.cache.store(normalized_url, response_headers, data, body_size,
+                                 always=lastmod is not None, extraction=extraction_key)
 
-        print(f"Crawling: {current_url}")
+        await self.finish_page(current_url, normalized_url, depth, data, body_size)
 
-        # Limit concurrent requests with semaphore
-        async with self.semaphore:
-            try:
-                # Fetch HTML
-                html = await self.get_html(current_url)
+    async def finish_page(self, current_url, normalized_url, depth, data, body_size):
+        """Record a page's data and queue its links."""
+        if self.duplicates is not None:
+            duplicate_of = self.duplicates.check(current_url, data.get("fingerprint"), body_size)
+            data["duplicate_of"] = duplicate_of or ""
 
-                # Extract page data
-                data = extract_page_data(html, current_url)
+        self.record_page(normalized_url, data)
 
-                # Store data (thread-safe)
-                async with self.lock:
-                    self.page_data[normalized_url] = data
+        # Links come from the same parse as the page data; scope and
+        # normalize the whole page's links in one batch
+        for url, normalized_url in self.urls.filter_links(data["outgoing_links"]):
+            if self.should_stop:
+                break
+            await self.enqueue(url, normalized_url, depth=depth + 1)
 
-                # Get URLs from page
-                urls = get_urls_from_html(html, current_url)
+    async def seed_from_sitemaps(self):
+        """
+        Queue every in-scope page listed in the sitemaps, as they stream in.
 
-            except Exception as e:
-                print(f"Error fetching {current_url}: {e}")
-                # Page data already set to None in add_page_visit
-                return
+        Listed pages are queued one level below the start page, so
+        max_depth and url_filter apply. With a cache, each lastmod is kept
+        so crawl_page can skip pages unchanged since they were cached; with
+        the "score" strategy, <priority> raises a page's score.
+        """
+        self.sitemap_loader = SitemapLoader(self.session, self.scheduler,
+                                            chunk_size=self.transport.chunk_size)
+        sitemap_urls = []
+        for url in self.sitemaps:
+            if url == "auto":
+                sitemap_urls.extend(await discover_sitemaps(self.session, self.base_url))
+            else:
+                sitemap_urls.append(url)
 
-        # Create tasks for all URLs (outside semaphore)
-        tasks = []
-        for url in urls:
+        for sitemap_url in sitemap_urls:
+            async with contextlib.aclosing(self.sitemap_loader.entries(sitemap_url)) as entries:
+                async for entry in entries:
+                    if self.should_stop:
+                        return
+                    normalized_url = self.urls.normalize_in_scope(entry.loc)
+                    if normalized_url is None:
+                        continue
+                    if self.cache is not None and entry.lastmod is not None:
+                        self.lastmod[normalized_url] = entry.lastmod
+                    if self.prioritized and entry.priority is not None:
+                        self.queue.scorer.boost(normalized_url, entry.priority * SITEMAP_PRIORITY_WEIGHT)
+                    await self.enqueue(entry.loc, normalized_url, depth=1)
+
+    async def queue_deferred(self):
+        """Queue the URLs set aside for matching a demoted pattern."""
+        deferred, self.deferred = self.deferred, {}
+        for normalized_url, (url, depth) in deferred.items():
+            if not self.should_stop:
+                await self.enqueue(url, normalized_url, defer=False, depth=depth)
             if self.should_stop:
-                break
+                # Out of budget: this one and the rest are never fetched
+                self.deferred[normalized_url] = (url, depth)
+
+    def schedule_retry(self, url, normalized_url, depth, attempt, delay):
+        """
+        Put a page back at the end of the frontier after delay seconds.
+
+        Nothing waits during the backoff: the worker moves on, and a timer
+        re-queues the page. The original queue item is only marked done
+        once the retry is queued, so the crawl can't finish in between.
+        """
+        def requeue():
+            self.retry_handles.discard(handle)
+            self.attempts[normalized_url] = attempt
+            self.queue.put_nowait((url, normalized_url, depth))
+            self.queue.task_done()
+
+        handle = asyncio.get_running_loop().call_later(delay, requeue)
+        self.retry_handles.add(handle)
+
+    def record_page(self, normalized_url, data):
+        """Count a finished page and hand its data to the checkpoint, sink and page_data."""
+        self.pages_crawled += 1
+        if self.checkpoint is not None:
+            self.checkpoint.add_result(normalized_url, data)
+        if self.sink is not None:
+            self.sink.write(data)
+        if self.keep_records:
+            self.page_data[normalized_url] = self.keep(data)
 
-            task = asyncio.create_task(self.crawl_page(url))
-            tasks.append(task)
+    def keep(self, data):
+        """Return what page_data holds for a page: data, or its PageRecord."""
+        if self.page_store is not None:
+            return self.page_store.add(data)
+        return data
 
-            # Track task in all_tasks
-            async with self.lock:
-                self.all_tasks.add(task)
+    def record_failure(self, normalized_url, kind="error"):
+        """Mark a page as failed (None in page_data) and count its class."""
+        self.pages_failed += 1
+        self.failure_counts[kind] += 1
+        self.page_data[normalized_url] = None
+        if self.checkpoint is not None:
+            self.checkpoint.add_result(normalized_url, None)
 
-        # Wait for all tasks to complete
-        if tasks:
+    async def worker(self):
+        """Pull URLs off the frontier until cancelled."""
+        while True:
+            current_url, normalized_url, depth = await self.queue.get()
+            retrying = False
             try:
-                await asyncio.gather(*tasks, return_exceptions=True)
+                retrying = await self.crawl_page(current_url, normalized_url, depth)
+            except Exception as e:
+                print(f"Error crawling {current_url}: {e}")
             finally:
-                # Remove completed tasks from all_tasks
-                async with self.lock:
-                    for task in tasks:
-                        self.all_tasks.discard(task)
-    
+                if not retrying:
+                    self.queue.task_done()
+                    if self.router is not None:
+                        self.router.page_done()
+
+    def start_workers(self):
+        """Start max_concurrency worker coroutines on the frontier (and the progress line)."""
+        for _ in range(self.max_concurrency):
+            self.workers.append(asyncio.create_task(self.worker()))
+        if self.reporter is not None:
+            self.reporter.start()
+
+    async def stop_workers(self):
+        """Cancel the workers and pending retries and wait for them to exit."""
+        if self.reporter is not None:
+            await self.reporter.stop()
+        for handle in self.retry_handles:
+            handle.cancel()
+        self.retry_handles.clear()
+        for task in self.workers:
+            task.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+
     async def crawl(self):
         """
         Start crawling from base_url.
+
+        A fixed pool of max_concurrency workers drains the frontier, so
+        memory stays flat no matter how many links a page has.
         
         Returns:
             Dictionary of page data keyed by normalized URL
         """
-        await self.crawl_page(self.base_url)
+        if self.checkpoint is not None:
+            self.checkpoint.start(self.base_url, self.resume)
+            if self.resume:
+                self.restore_checkpoint()
+
+        await self.enqueue(self.base_url)
+        self.start_workers()
+        try:
+            if self.sitemaps:
+                await self.seed_from_sitemaps()
+            await self.queue.join()
+            # Then the deferred URLs, while the page budget lasts
+            while self.deferred and not self.should_stop:
+                await self.queue_deferred()
+                await self.queue.join()
+        finally:
+            await self.stop_workers()
+            if self.sink is not None:
+                self.sink.flush()
+            if self.checkpoint is not None:
+                self.checkpoint.flush()
+            if self.cache is not None:
+                self.cache.flush()
         return self.page_data
 
 
-async def crawl_site_async(base_url, max_concurrency=5, max_pages=100):
+async def crawl_site_async(base_url, max_concurrency=5, max_pages=100, **options):
     """
     Crawl a website asynchronously.
     
@@ -199,11 +792,12 @@ async def crawl_site_async(base_url, max_concurrency=5, max_pages=100):
         base_url: The starting URL
         max_concurrency: Maximum concurrent requests
         max_pages: Maximum number of pages to crawl
+        **options: Extra AsyncCrawler options (e.g. parse_mode, parse_workers)
         
     Returns:
         Dictionary of page data
     """
-    async with AsyncCrawler(base_url, max_concurrency, max_pages) as crawler:
+    async with AsyncCrawler(base_url, max_concurrency, max_pages, **options) as crawler:
         page_data = await crawler.crawl()
         return page_data
 
@@ -0,0 +1,227 @@
+import csv
+import time
+import asyncio
+from urllib.parse import urlsplit
+from async_crawl import AsyncCrawler, create_parse_executor
+from transport import TransportConfig, create_session
+
+# Columns of the per-site summary CSV
+SUMMARY_FIELDNAMES = ["site_url", "pages_crawled", "pages_failed", "seconds", "error"]
+
+
+class SiteSeed:
+    """One site of a batch crawl, with its own limits."""
+
+    def __init__(self, url, max_concurrency=5, max_pages=100):
+        self.url = url
+        self.max_concurrency = max_concurrency
+        self.max_pages = max_pages
+
+    @property
+    def host(self):
+        return urlsplit(self.url).netloc.lower()
+
+
+def read_seeds(path, max_concurrency=5, max_pages=100):
+    """
+    Read a seed file: one "URL [max_concurrency] [max_pages]" per line.
+
+    Blank lines and # comments are skipped; missing limits take the
+    defaults given here.
+
+    Returns:
+        List of SiteSeed in file order
+
+    Raises:
+        ValueError: A line isn't a URL with optional whole-number limits
+    """
+    seeds = []
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            fields = line.split("#", 1)[0].split()
+            if not fields:
+                continue
+            url = fields[0]
+            parsed = urlsplit(url)
+            if parsed.scheme not in ("http", "https") or not parsed.netloc or len(fields) > 3:
+                raise ValueError(f"{path}:{number}: expected URL [max_concurrency] [max_pages]")
+            try:
+                limits = [int(value) for value in fields[1:]]
+            except ValueError:
+                raise ValueError(f"{path}:{number}: limits must be whole numbers")
+            limits += [max_concurrency, max_pages][len(limits):]
+            seeds.append(SiteSeed(url, *limits))
+    return seeds
+
+
+class SiteResult:
+    """How one site of a batch went."""
+
+    def __init__(self, seed, stats=None, error=None, elapsed=0.0):
+        self.seed = seed
+        # AsyncCrawler.stats(), or None if the crawl didn't start
+        self.stats = stats
+        # Message for a site whose crawl failed outright, else None
+        self.error = error
+        self.elapsed = elapsed
+
+
+class BatchCrawler:
+    def __init__(self, seeds, max_sites=10, transport=None, scheduler=None,
+                 parse_mode="inline", parse_workers=None, site_options=None,
+                 on_site_done=None, **options):
+        """
+        Crawl many sites in one event loop.
+
+        Up to max_sites sites are crawled at a time, each by its own
+        AsyncCrawler with the seed's max_pages and max_concurrency. The
+        crawlers share one connection pool (and its DNS cache), one
+        politeness scheduler and one parse pool, so starting a site costs
+        no more than queueing its first page.
+
+        Args:
+            seeds: Iterable of SiteSeed
+            max_sites: Sites crawled at the same time
+            transport: TransportConfig for the shared pool; its limit
+                defaults to max_sites * the largest seed concurrency
+            scheduler: PolitenessScheduler shared by every site (per-host
+                limits still apply per host)
+            parse_mode: As for AsyncCrawler; thread and process pools are
+                shared by every site
+            parse_workers: Parse pool size for thread/process modes
+            site_options: Callable taking a SiteSeed and returning extra
+                AsyncCrawler keyword arguments for that site only (e.g. a
+                sink, visited set or retry policy)
+            on_site_done: Callable(SiteResult, AsyncCrawler or None),
+                called as each site finishes, in finishing order; the
+                crawler is dropped afterwards, so take what you need
+                (page_data, sink, ...) here
+            **options: Keyword arguments passed to every AsyncCrawler
+        """
+        self.seeds = list(seeds)
+        self.max_sites = max_sites
+        self.transport = transport if transport is not None else TransportConfig()
+        self.scheduler = scheduler
+        self.parse_mode = parse_mode
+        self.parse_workers = parse_workers
+        self.site_options = site_options
+        self.on_site_done = on_site_done
+        # One progress line per site would drown the per-site results
+        options.setdefault("progress_interval", None)
+        self.options = options
+        self.session = None
+        self.parse_executor = None
+        self.results = []
+        self.sites_failed = 0
+        self.pages_crawled = 0
+
+    async def __aenter__(self):
+        """Create the shared session and parse pool."""
+        self.parse_executor = create_parse_executor(self.parse_mode, self.parse_workers)
+        largest = max((seed.max_concurrency for seed in self.seeds), default=1)
+        self.session = create_session(self.transport, self.max_sites * largest)
+        if self.scheduler is not None:
+            self.scheduler.bind(self.session)
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Close the shared session and parse pool."""
+        await self.session.close()
+        if self.parse_executor is not None:
+            self.parse_executor.shutdown(wait=True, cancel_futures=True)
+            self.parse_executor = None
+
+    async def crawl_site(self, seed):
+        """Crawl one site on the shared session; never raises."""
+        start = time.perf_counter()
+        crawler = None
+        try:
+            options = dict(self.options)
+            if self.site_options is not None:
+                options.update(self.site_options(seed))
+            crawler = AsyncCrawler(
+                seed.url,
+                seed.max_concurrency,
+                seed.max_pages,
+                parse_mode=self.parse_mode,
+                transport=self.transport,
+                scheduler=self.scheduler,
+                session=self.session,
+                parse_executor=self.parse_executor,
+                **options,
+            )
+            async with crawler:
+                await crawler.crawl()
+            result = SiteResult(seed, crawler.stats(), elapsed=time.perf_counter() - start)
+            self.pages_crawled += result.stats["pages_crawled"]
+        except Exception as e:
+            self.sites_failed += 1
+            result = SiteResult(seed, crawler.stats() if crawler is not None else None,
+                                error=str(e) or type(e).__name__,
+                                elapsed=time.perf_counter() - start)
+        self.results.append(result)
+        if self.on_site_done is not None:
+            self.on_site_done(result, crawler)
+        return result
+
+    async def site_worker(self, seeds):
+        """Take seeds until there are none left."""
+        while seeds:
+            await self.crawl_site(seeds.pop())
+
+    async def crawl(self):
+        """
+        Crawl every seed.
+
+        Returns:
+            List of SiteResult in the order the sites finished
+        """
+        # Popped from the end, so reverse to start in file order
+        seeds = self.seeds[::-1]
+        workers = [asyncio.create_task(self.site_worker(seeds))
+                   for _ in range(min(self.max_sites, len(seeds)))]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+        return self.results
+
+
+def write_sites_summary(results, filename):
+    """
+    Write one CSV row per site of a batch.
+
+    Args:
+        results: SiteResults from BatchCrawler.crawl
+        filename: Output CSV filename
+    """
+    with open(filename, "w", newline="", encoding="utf-8") as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=SUMMARY_FIELDNAMES)
+        writer.writeheader()
+        for result in results:
+            stats = result.stats or {}
+            writer.writerow({
+                "site_url": result.seed.url,
+                "pages_crawled": stats.get("pages_crawled", 0),
+                "pages_failed": stats.get("pages_failed", 0),
+                "seconds": f"{result.elapsed:.2f}",
+                "error": result.error or "",
+            })
+
+
+async def crawl_sites(seeds, max_sites=10, **options):
+    """
+    Crawl many sites concurrently on one shared engine.
+
+    Args:
+        seeds: Iterable of SiteSeed
+        max_sites: Sites crawled at the same time
+        **options: Extra BatchCrawler options
+
+    Returns:
+        List of SiteResult in the order the sites finished
+    """
+    async with BatchCrawler(seeds, max_sites, **options) as batch:
+        return await batch.crawl()
@@ -0,0 +1,55 @@
+"""
+Crawl many small sites one after another vs in one BatchCrawler.
+
+Each site is a fixture server process on its own port (so its own host).
+"sequential" runs crawl_site_async once per site, paying session setup
+and ramp-up every time; "batch" crawls them all on one shared session,
+max_sites at a time.
+
+Usage: uv run -m benchmarks.batch [sites] [pages per site] [concurrency] [max_sites]
+"""
+import sys
+import time
+import asyncio
+from async_crawl import crawl_site_async
+from batch_crawl import SiteSeed, crawl_sites
+from benchmarks.fixture_site import start_server_process
+
+
+async def crawl_sequentially(seeds):
+    for seed in seeds:
+        await crawl_site_async(seed.url, seed.max_concurrency, seed.max_pages,
+                               progress_interval=None)
+
+
+def main():
+    sites = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    pages = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    concurrency = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+    max_sites = int(sys.argv[4]) if len(sys.argv) > 4 else sites
+
+    # Small pages behind some latency, like a typical remote site
+    servers = [start_server_process(page_count=pages, paragraphs=5, latency=0.05)
+               for _ in range(sites)]
+    try:
+        seeds = [SiteSeed(base_url, concurrency, pages) for _, base_url in servers]
+        total = sites * pages
+        print(f"{sites} sites x {pages} pages, {concurrency} requests per site")
+        print(f"{'mode':<12}{'seconds':>10}{'pages/sec':>12}")
+
+        start = time.perf_counter()
+        asyncio.run(crawl_sequentially(seeds))
+        elapsed = time.perf_counter() - start
+        print(f"{'sequential':<12}{elapsed:>10.2f}{total / elapsed:>12.1f}")
+
+        start = time.perf_counter()
+        asyncio.run(crawl_sites(seeds, max_sites))
+        elapsed = time.perf_counter() - start
+        print(f"{'batch':<12}{elapsed:>10.2f}{total / elapsed:>12.1f}")
+    finally:
+        for process, _ in servers:
+            process.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Write time and size of the CSV report vs the columnar pages/edges/images
+tables, on a synthetic crawl.
+
+Pages look like a real site's: the same navigation links on every page
+plus some links and images of their own. Parquet is only measured when
+pyarrow is installed.
+
+Usage: uv run -m benchmarks.columnar [pages] [links per page]
+"""
+import os
+import sys
+import time
+import random
+import tempfile
+from report_sinks import CsvReportSink
+from columnar_report import ColumnarReportSink, pa
+
+
+def synthetic_pages(count, links_per_page, seed=0):
+    rng = random.Random(seed)
+    navigation = [f"https://example.com/section/{n}" for n in range(links_per_page // 2)]
+    for index in range(count):
+        own = [f"https://example.com/page/{rng.randrange(count)}"
+               for _ in range(links_per_page - len(navigation))]
+        yield {
+            "url": f"https://example.com/page/{index}",
+            "h1": f"Page {index}",
+            "first_paragraph": "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 3,
+            "outgoing_links": navigation + own,
+            "image_urls": ["https://example.com/logo.png"]
+                          + [f"https://example.com/img/{index}-{n}.jpg" for n in range(4)],
+        }
+
+
+def measure(make_sink, pages, links_per_page):
+    start = time.perf_counter()
+    with make_sink() as sink:
+        for page in synthetic_pages(pages, links_per_page):
+            sink.write(page)
+    elapsed = time.perf_counter() - start
+    paths = sink.paths.values() if isinstance(sink, ColumnarReportSink) else [sink.filename]
+    return elapsed, sum(os.path.getsize(path) for path in paths)
+
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    links_per_page = int(sys.argv[2]) if len(sys.argv) > 2 else 60
+
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "report")
+        writers = [
+            ("csv report", lambda: CsvReportSink(filename + ".csv", flush_every=10000)),
+            ("csv tables", lambda: ColumnarReportSink(filename + ".parquet", file_format="csv")),
+        ]
+        if pa is not None:
+            writers.append(("parquet", lambda: ColumnarReportSink(filename + ".parquet")))
+        else:
+            print("pyarrow is not installed; skipping parquet")
+
+        print(f"{pages} pages, {links_per_page} links per page")
+        print(f"{'format':<12}{'seconds':>10}{'MB':>10}{'pages/sec':>12}")
+        for name, make_sink in writers:
+            elapsed, size = measure(make_sink, pages, links_per_page)
+            print(f"{name:<12}{elapsed:>10.2f}{size / 1e6:>10.1f}{pages / elapsed:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
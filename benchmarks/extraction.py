@@ -0,0 +1,49 @@
+"""
+Parse time per page for different extraction specs.
+
+Times extract_page_data on the article pages the parser benchmarks use
+(benchmarks/fixture_site.py) with every field, links only (a discovery
+crawl), the title and first paragraph (parsing stops at the first <p> in
+<main>), and every field plus a CSS selector (a second parse with
+BeautifulSoup).
+
+Usage: uv run -m benchmarks.extraction [page size in bytes]
+"""
+import sys
+import time
+from crawl import extract_page_data
+from extraction import ExtractionSpec
+from benchmarks.fixture_site import render_article_page
+
+SPECS = {
+    "all fields": None,
+    "links only": ExtractionSpec(["outgoing_links"]),
+    "h1 + paragraph": ExtractionSpec(["h1", "first_paragraph"]),
+    "all + selector": ExtractionSpec(selectors={"caption": "figure figcaption"}),
+}
+
+MIN_SECONDS = 2.0
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 300_000
+    html = render_article_page(size)
+    print(f"{len(html) // 1000}KB article page")
+    print(f"{'spec':<18}{'ms/page':>10}{'speedup':>10}")
+    baseline = None
+    for name, spec in SPECS.items():
+        iterations = 0
+        start = time.perf_counter()
+        while True:
+            extract_page_data(html, "https://example.com/article", spec=spec)
+            iterations += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= MIN_SECONDS and iterations >= 3:
+                break
+        ms_per_page = elapsed / iterations * 1000
+        baseline = baseline or ms_per_page
+        print(f"{name:<18}{ms_per_page:>10.2f}{baseline / ms_per_page:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+import random
+import asyncio
+import multiprocessing
+import socket
+from aiohttp import web
+
+
+def render_page(index, page_count, fan_out, paragraphs):
+    """
+    Render one deterministic fixture page.
+
+    Page i links to pages (i * fan_out + 1) .. (i * fan_out + fan_out), so
+    the site is a tree rooted at page 0 reachable by a breadth-first crawl.
+    """
+    links = []
+    for child in range(index * fan_out + 1, index * fan_out + fan_out + 1):
+        if child < page_count:
+            links.append(f'<a href="/page/{child}">Page {child}</a>')
+    nav = "".join(f'<a href="/page/{i}">Nav {i}</a>' for i in range(min(10, page_count)))
+    body = "".join(
+        f"<p>Paragraph {n} of page {index}. Lorem ipsum <b>dolor</b> sit amet, "
+        f"consectetur adipiscing elit.</p><img src=\"/img/{index}-{n}.png\">"
+        for n in range(paragraphs)
+    )
+    return (
+        f"<html><head><title>Page {index}</title></head><body>"
+        f"<nav>{nav}</nav><main><h1>Page {index}</h1>{body}"
+        f"{''.join(links)}</main></body></html>"
+    )
+
+
+def paragraphs_for_size(page_size):
+    """Number of paragraphs that makes a page roughly page_size bytes."""
+    one = len(render_page(0, 1, 0, 1))
+    two = len(render_page(0, 1, 0, 2))
+    return max(1, round((page_size - one) / (two - one)) + 1)
+
+
+def create_app(page_count=200, fan_out=5, paragraphs=100, page_size=None,
+               latency=0.0, error_rate=0.0, seed=0):
+    """
+    Create an aiohttp app serving a synthetic site of page_count pages.
+
+    The site is a pure function of the arguments, so two runs (or two
+    commits) crawl exactly the same pages, delays and errors.
+
+    Responses are compressed when the client accepts it. GET /__stats
+    returns the number of distinct client connections seen and resets it.
+
+    Args:
+        page_count: Number of pages
+        fan_out: Child links per page
+        paragraphs: Paragraphs (with an image each) per page
+        page_size: Approximate page size in bytes; overrides paragraphs
+        latency: Mean seconds before each page response; each page gets
+            its own fixed delay between 0.5x and 1.5x this
+        error_rate: Fraction of pages (never page 0) that answer 500
+        seed: Seed for the delays and the choice of failing pages
+    """
+    if page_size is not None:
+        paragraphs = paragraphs_for_size(page_size)
+    pages = [render_page(i, page_count, fan_out, paragraphs) for i in range(page_count)]
+    rng = random.Random(seed)
+    delays = [latency * (0.5 + rng.random()) for _ in range(page_count)]
+    failing = set(rng.sample(range(1, page_count), round((page_count - 1) * error_rate)))
+    connections = set()
+
+    async def page_response(index):
+        if latency:
+            await asyncio.sleep(delays[index])
+        if index in failing:
+            raise web.HTTPInternalServerError()
+        response = web.Response(text=pages[index], content_type="text/html")
+        response.enable_compression()
+        return response
+
+    async def handle_page(request):
+        connections.add(request.transport.get_extra_info("peername"))
+        index = int(request.match_info["index"])
+        if index >= page_count:
+            raise web.HTTPNotFound()
+        return await page_response(index)
+
+    async def handle_root(request):
+        connections.add(request.transport.get_extra_info("peername"))
+        return await page_response(0)
+
+    async def handle_stats(request):
+        stats = {"connections": len(connections)}
+        connections.clear()
+        return web.json_response(stats)
+
+    app = web.Application()
+    app.router.add_get("/", handle_root)
+    app.router.add_get("/page/{index}", handle_page)
+    app.router.add_get("/__stats", handle_stats)
+    return app
+
+
+def free_port():
+    """Return a TCP port that is free on localhost."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def serve(port, app_kwargs):
+    web.run_app(create_app(**app_kwargs), host="127.0.0.1", port=port, print=None)
+
+
+def start_server_process(**app_kwargs):
+    """
+    Serve the fixture site from a separate process.
+
+    Running the server out of process keeps its CPU use from skewing
+    crawler measurements.
+
+    Returns:
+        (process, base_url) tuple; terminate the process when done
+    """
+    port = free_port()
+    process = multiprocessing.get_context("spawn").Process(
+        target=serve, args=(port, app_kwargs), daemon=True
+    )
+    process.start()
+
+    # Wait until the server accepts connections
+    while True:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.1):
+                break
+        except OSError:
+            if not process.is_alive():
+                raise RuntimeError("Fixture server failed to start")
+    return process, f"http://127.0.0.1:{port}/"
+
+
+def render_article_page(page_size, seed=0):
+    """
+    Render a page shaped like a real article, about page_size bytes long.
+
+    Unlike render_page this has what real pages spend their bytes on: a
+    head full of meta tags, inline scripts and styles, a large navigation
+    menu, attribute-heavy markup, inline links, comments, a table and a
+    footer. Used by the parser microbenchmarks.
+    """
+    rng = random.Random(seed)
+    words = ("crawler", "latency", "throughput", "index", "request", "parser",
+             "queue", "session", "connection", "async", "budget", "frontier")
+
+    def sentence(count):
+        return " ".join(rng.choice(words) for _ in range(count)).capitalize() + "."
+
+    head = (
+        "<!DOCTYPE html><html lang=\"en\"><head><meta charset=\"utf-8\">"
+        "<meta name=\"viewport\" content=\"width=device-width, initial-scale=1\">"
+        + "".join(f'<meta property="og:tag{i}" content="{sentence(6)}">' for i in range(20))
+        + "<title>Synthetic article</title>"
+        + "<style>" + "".join(f".c{i}{{margin:{i}px;color:#{i:06x}}}" for i in range(200)) + "</style>"
+        + "<script>window.dataLayer=[" + ",".join(f'{{"id":{i}}}' for i in range(300)) + "];</script>"
+        + "</head><body>"
+    )
+    nav = "<header><nav class=\"site-nav\"><ul>" + "".join(
+        f'<li class="nav-item c{i % 50}"><a href="/section/{i}" data-track="nav-{i}">Section {i}</a></li>'
+        for i in range(120)
+    ) + "</ul></nav></header>"
+    footer = "<footer>" + "".join(
+        f'<a href="https://partner{i}.example.org/">Partner {i}</a>' for i in range(30)
+    ) + "<!-- footer --></footer></body></html>"
+
+    blocks = []
+    size = len(head) + len(nav) + len(footer) + 60
+    index = 0
+    while size < page_size:
+        if index % 12 == 11:
+            block = "<table class=\"data\">" + "".join(
+                f"<tr><td>{sentence(2)}</td><td>{rng.randint(0, 9999)}</td></tr>" for _ in range(8)
+            ) + "</table>"
+        elif index % 5 == 4:
+            block = (f'<figure><img src="/img/{index}.jpg" alt="{sentence(4)}" loading="lazy">'
+                     f"<figcaption>{sentence(8)}</figcaption></figure>")
+        else:
+            block = (f'<p class="c{index % 200}">{sentence(20)} <a href="/article/{index}">'
+                     f"{sentence(3)}</a> {sentence(25)} <em>{sentence(5)}</em></p>")
+        blocks.append(block)
+        size += len(block)
+        index += 1
+    return head + nav + '<main><article><h1>Synthetic article</h1>' + "".join(blocks) + "</article></main>" + footer
@@ -0,0 +1,112 @@
+"""
+Distributed crawling through a shared frontier backend.
+
+Part 1 runs 1, 2 and 4 FrontierCrawler worker processes against one
+SQLite frontier file (and Redis, if REDIS_URL is set) and reports
+pages/sec for the whole crawl. Part 2 measures raw add/claim/ack
+throughput of each backend, which bounds how many workers one frontier
+can feed.
+
+Usage: uv run -m benchmarks.frontier [pages] [concurrency] [worker counts]
+"""
+import os
+import sys
+import time
+import asyncio
+import tempfile
+import multiprocessing
+from distributed_crawl import crawl_with_frontier
+from frontier_backends import open_frontier, RedisFrontier
+from benchmarks.fixture_site import start_server_process
+
+
+def worker_main(base_url, spec, concurrency, pages, worker_id):
+    with open_frontier(spec, max_pages=pages) as backend:
+        asyncio.run(crawl_with_frontier(base_url, backend, max_concurrency=concurrency,
+                                        worker_id=worker_id, poll_interval=0.05))
+
+
+def run_workers(base_url, spec, concurrency, pages, workers):
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=worker_main,
+                        args=(base_url, spec, concurrency, pages, f"worker-{n}"))
+        for n in range(workers)
+    ]
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - start
+    with open_frontier(spec) as backend:
+        crawled = backend.counts()["done"]
+    return crawled, elapsed
+
+
+def backend_specs(directory):
+    """Yield (name, spec, reset) for each backend to benchmark."""
+    def sqlite_spec(name):
+        path = os.path.join(directory, name)
+        def reset():
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+        return path, reset
+
+    path, reset = sqlite_spec("frontier.db")
+    yield "sqlite", path, reset
+    redis_url = os.environ.get("REDIS_URL")
+    if redis_url:
+        def reset_redis():
+            with RedisFrontier.from_url(redis_url) as backend:
+                backend.clear()
+        yield "redis", redis_url, reset_redis
+
+
+def backend_ops(spec, reset, count=20000, batch=50):
+    """Seconds to add, claim and ack count URLs in batches."""
+    reset()
+    links = [(f"https://example.com/p{i}", f"example.com/p{i}") for i in range(count)]
+    with open_frontier(spec) as backend:
+        start = time.perf_counter()
+        for i in range(0, count, batch):
+            backend.add(links[i:i + batch])
+        added = time.perf_counter()
+        while True:
+            claimed = backend.claim("bench", batch)
+            if not claimed:
+                break
+            backend.ack([(normalized_url, {"url": url}) for url, normalized_url in claimed])
+        done = time.perf_counter()
+    return added - start, done - added
+
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    worker_counts = [int(n) for n in (sys.argv[3] if len(sys.argv) > 3 else "1,2,4").split(",")]
+
+    process, base_url = start_server_process(page_count=pages)
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            print(f"{os.cpu_count()} CPUs")
+            print(f"{'backend':>8}{'workers':>9}{'pages':>8}{'seconds':>10}{'pages/sec':>12}")
+            for name, spec, reset in backend_specs(directory):
+                for workers in worker_counts:
+                    reset()
+                    crawled, elapsed = run_workers(base_url, spec, concurrency, pages, workers)
+                    print(f"{name:>8}{workers:>9}{crawled:>8}{elapsed:>10.2f}{crawled / elapsed:>12.1f}")
+
+            print()
+            print(f"{'backend':>8}{'add/sec':>12}{'claim+ack/sec':>15}")
+            for name, spec, reset in backend_specs(directory):
+                count = 20000
+                add_time, claim_time = backend_ops(spec, reset, count)
+                print(f"{name:>8}{count / add_time:>12,.0f}{count / claim_time:>15,.0f}")
+    finally:
+        process.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Time to build the link graph and run the analytics on a synthetic crawl.
+
+Each page links to the shared navigation pages and to random other pages,
+so the graph has about pages * links per page edges. PageRank uses NumPy
+when it is installed.
+
+Usage: uv run -m benchmarks.link_analytics [pages] [links per page]
+"""
+import sys
+import time
+import random
+import link_analytics
+from link_analytics import LinkAnalytics
+
+
+def synthetic_page_data(count, links_per_page, seed=0):
+    rng = random.Random(seed)
+    navigation = [f"https://example.com/page/{n}" for n in range(10)]
+    page_data = {}
+    for index in range(count):
+        links = navigation + [f"https://example.com/page/{rng.randrange(count)}"
+                              for _ in range(links_per_page - len(navigation))]
+        page_data[f"example.com/page/{index}"] = {
+            "url": f"https://example.com/page/{index}",
+            "h1": "",
+            "first_paragraph": "",
+            "outgoing_links": links,
+            "image_urls": [],
+        }
+    return page_data
+
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    links_per_page = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    page_data = synthetic_page_data(pages, links_per_page)
+    start = time.perf_counter()
+    analytics = LinkAnalytics(page_data, "https://example.com/page/0")
+    elapsed = time.perf_counter() - start
+    graph = analytics.graph
+    print(f"{pages} pages, {len(graph.targets)} edges, "
+          f"numpy {'yes' if link_analytics.np is not None else 'no'}")
+
+    start = time.perf_counter()
+    graph.pagerank()
+    pagerank = time.perf_counter() - start
+    print(f"Total: {elapsed:.2f}s (PageRank alone: {pagerank:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
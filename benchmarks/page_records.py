@@ -0,0 +1,52 @@
+"""
+Memory per page of page_data: extract_page_data dicts vs PageStore records.
+
+Uses the synthetic crawl from benchmarks.columnar (shared navigation links
+plus links and images of each page's own). Every page gets its own link
+strings, as it does when each page is parsed separately.
+
+Usage: uv run -m benchmarks.page_records [pages] [links per page]
+"""
+import sys
+import time
+import tracemalloc
+from page_store import PageStore
+from benchmarks.columnar import synthetic_pages
+
+
+def copied(page):
+    """The page with fresh string objects, like a new parse would make."""
+    return dict(
+        page,
+        outgoing_links=[url.encode().decode() for url in page["outgoing_links"]],
+        image_urls=[url.encode().decode() for url in page["image_urls"]],
+    )
+
+
+def measure(keep, pages, links_per_page):
+    tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        page_data = {}
+        for page in synthetic_pages(pages, links_per_page):
+            page_data[page["url"]] = keep(copied(page))
+        elapsed = time.perf_counter() - start
+        return tracemalloc.get_traced_memory()[0], elapsed
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    links_per_page = int(sys.argv[2]) if len(sys.argv) > 2 else 60
+
+    store = PageStore()
+    print(f"{pages} pages, {links_per_page} links per page")
+    print(f"{'records':<10}{'MB':>10}{'bytes/page':>12}{'seconds':>10}")
+    for name, keep in (("dict", lambda page: page), ("compact", store.add)):
+        size, elapsed = measure(keep, pages, links_per_page)
+        print(f"{name:<10}{size / 1e6:>10.1f}{size / pages:>12.0f}{elapsed:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Pages/sec of crawl_site_async for each parse executor configuration.
+
+Usage: uv run -m benchmarks.parse_pool [pages] [concurrency]
+"""
+import sys
+import time
+import asyncio
+from async_crawl import crawl_site_async
+from benchmarks.fixture_site import start_server_process
+
+CONFIGURATIONS = [
+    ("inline", None),
+    ("thread", 4),
+    ("process", 1),
+    ("process", 2),
+    ("process", 4),
+]
+
+
+async def run_crawl(base_url, pages, concurrency, parse_mode, parse_workers):
+    start = time.perf_counter()
+    page_data = await crawl_site_async(
+        base_url,
+        concurrency,
+        pages,
+        parse_mode=parse_mode,
+        parse_workers=parse_workers,
+    )
+    elapsed = time.perf_counter() - start
+    crawled = sum(1 for data in page_data.values() if data is not None)
+    return crawled, elapsed
+
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+
+    process, base_url = start_server_process(page_count=pages)
+    try:
+        print(f"{'mode':<10}{'workers':>8}{'pages':>8}{'seconds':>10}{'pages/sec':>12}")
+        for parse_mode, parse_workers in CONFIGURATIONS:
+            crawled, elapsed = asyncio.run(
+                run_crawl(base_url, pages, concurrency, parse_mode, parse_workers)
+            )
+            workers = "-" if parse_workers is None else parse_workers
+            print(f"{parse_mode:<10}{workers:>8}{crawled:>8}{elapsed:>10.2f}{crawled / elapsed:>12.1f}")
+    finally:
+        process.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+Pages/sec of crawl_site_sharded for 1, 2 and 4 shard processes.
+
+The fixture site is served from its own process; each shard gets the
+same per-process concurrency, so on a multi-core machine throughput
+should grow close to linearly until the fixture server saturates.
+
+Usage: uv run -m benchmarks.sharded [pages] [concurrency] [shard counts]
+"""
+import os
+import sys
+import time
+from sharded_crawl import crawl_site_sharded
+from benchmarks.fixture_site import start_server_process
+
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    shard_counts = [int(n) for n in (sys.argv[3] if len(sys.argv) > 3 else "1,2,4").split(",")]
+
+    process, base_url = start_server_process(page_count=pages)
+    try:
+        print(f"{os.cpu_count()} CPUs")
+        print(f"{'shards':>6}{'pages':>8}{'seconds':>10}{'pages/sec':>12}{'forwarded':>11}")
+        for shards in shard_counts:
+            start = time.perf_counter()
+            page_data, stats = crawl_site_sharded(
+                base_url, shards=shards, max_concurrency=concurrency, max_pages=pages
+            )
+            elapsed = time.perf_counter() - start
+            crawled = stats["pages_crawled"]
+            print(f"{shards:>6}{crawled:>8}{elapsed:>10.2f}{crawled / elapsed:>12.1f}"
+                  f"{stats['forwarded']:>11}")
+    finally:
+        process.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+"""
+Reproducible crawl and parser benchmarks with results saved as JSON.
+
+"run" serves each scenario's synthetic site (benchmarks/fixture_site.py,
+deterministic for a given seed) from its own process and crawls it with
+crawl_site_async and with the synchronous crawl.crawl_page. Each crawl
+runs in a fresh process so peak RSS and CPU time belong to that crawl
+alone. It records pages/sec, CPU seconds, peak RSS and per-stage timings,
+then times extract_page_data on article-shaped pages of several sizes.
+"compare" lines up two result files, e.g. from before and after a change.
+
+Usage:
+    uv run -m benchmarks.suite run [--output FILE] [--scenarios a,b] [--repeat N] [--quick]
+    uv run -m benchmarks.suite compare OLD.json NEW.json
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import resource
+import subprocess
+import contextlib
+import multiprocessing
+import crawl
+from async_crawl import crawl_site_async
+from retry import RetryPolicy
+from metrics import CrawlMetrics, Histogram
+from benchmarks.fixture_site import start_server_process, render_article_page
+
+# Site arguments for create_app, and the engines that crawl each site.
+# Retries are off so runs measure the crawler, not backoff sleeps.
+SCENARIOS = {
+    "baseline": {
+        "site": {"page_count": 300, "fan_out": 5, "paragraphs": 20},
+        "engines": ("async", "sync", "sync-threads"),
+    },
+    "large-pages": {
+        "site": {"page_count": 100, "fan_out": 5, "page_size": 400_000},
+        "engines": ("async", "sync", "sync-threads"),
+    },
+    "latency": {
+        "site": {"page_count": 300, "fan_out": 5, "paragraphs": 20, "latency": 0.05},
+        "engines": ("async", "sync-threads"),
+    },
+    "errors": {
+        "site": {"page_count": 300, "fan_out": 5, "paragraphs": 20, "error_rate": 0.05},
+        "engines": ("async", "sync", "sync-threads"),
+    },
+}
+
+ASYNC_CONCURRENCY = 16
+SYNC_THREADS = 16
+
+# Sizes (bytes) of the pages used for the parser microbenchmarks; the
+# head, menu and footer alone are about 24KB
+PARSE_SIZES = (30_000, 100_000, 300_000, 1_000_000)
+# Each parser benchmark repeats for at least this many seconds
+PARSE_MIN_SECONDS = 0.5
+
+# Metrics compared by "compare", and whether higher is better
+COMPARED = {
+    "pages_per_sec": True,
+    "cpu_seconds": False,
+    "peak_rss_mb": False,
+    "ms_per_page": False,
+}
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, KiB elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def measured(run):
+    """
+    Run a crawl and measure it.
+
+    Args:
+        run: Function that crawls and returns (page_data, timings)
+
+    Returns:
+        Dict of results for one crawl
+    """
+    cpu_start = cpu_seconds()
+    start = time.perf_counter()
+    page_data, timings = run()
+    elapsed = time.perf_counter() - start
+    crawled = sum(1 for data in page_data.values() if data is not None)
+    return {
+        "pages": crawled,
+        "failed": len(page_data) - crawled,
+        "seconds": elapsed,
+        "pages_per_sec": crawled / elapsed,
+        "cpu_seconds": cpu_seconds() - cpu_start,
+        "peak_rss_mb": peak_rss_mb(),
+        "timings": timings,
+    }
+
+
+def run_async_crawl(base_url, max_pages):
+    """Crawl with crawl_site_async, timing stages with CrawlMetrics."""
+    def run():
+        metrics = CrawlMetrics()
+        page_data = asyncio.run(crawl_site_async(
+            base_url, ASYNC_CONCURRENCY, max_pages,
+            metrics=metrics,
+            progress_interval=None,
+            retry_policy=RetryPolicy(max_attempts=1),
+        ))
+        timings = {name: histogram.summary()
+                   for name, histogram in metrics.histograms.items() if histogram.count}
+        return page_data, timings
+    return measured(run)
+
+
+def timed(function, histogram):
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            histogram.observe(time.perf_counter() - start)
+    return wrapper
+
+
+def run_sync_crawl(base_url, max_pages, max_workers=1):
+    """Crawl with the synchronous crawl.crawl_page, timing fetch and parse."""
+    def run():
+        # This process only runs this crawl, so wrapping the module
+        # functions crawl_page calls is safe
+        histograms = {"fetch": Histogram(), "parse": Histogram()}
+        crawl.get_html = timed(crawl.get_html, histograms["fetch"])
+        crawl.extract_page_data = timed(crawl.extract_page_data, histograms["parse"])
+        # Error prints would be measured too
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            page_data = crawl.crawl_page(base_url, max_pages=max_pages,
+                                         max_workers=max_workers, progress_interval=None)
+        timings = {name: histogram.summary() for name, histogram in histograms.items()}
+        return page_data, timings
+    return measured(run)
+
+
+def run_threaded_sync_crawl(base_url, max_pages):
+    return run_sync_crawl(base_url, max_pages, SYNC_THREADS)
+
+
+ENGINES = {
+    "async": run_async_crawl,
+    "sync": run_sync_crawl,
+    "sync-threads": run_threaded_sync_crawl,
+}
+
+
+def run_isolated(function, *args):
+    """Run function(*args) in a fresh process and return its result."""
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return pool.apply(function, args)
+
+
+def crawl_benchmarks(scenarios, repeat, scale):
+    """
+    Run every engine on every scenario.
+
+    Returns:
+        One result dict per (scenario, engine): the median run by
+        pages/sec, with all runs' pages/sec under "runs"
+    """
+    results = []
+    for name in scenarios:
+        scenario = SCENARIOS[name]
+        site = dict(scenario["site"])
+        site["page_count"] = max(10, int(site["page_count"] * scale))
+        process, base_url = start_server_process(**site)
+        try:
+            for engine in scenario["engines"]:
+                # "/" and "/page/0" are the same page under two URLs,
+                # and the sync crawler fetches both
+                runs = [run_isolated(ENGINES[engine], base_url, site["page_count"] + 1)
+                        for _ in range(repeat)]
+                runs.sort(key=lambda run: run["pages_per_sec"])
+                result = {"benchmark": "crawl", "scenario": name, "engine": engine, "site": site}
+                result.update(runs[len(runs) // 2])
+                result["runs"] = [run["pages_per_sec"] for run in runs]
+                results.append(result)
+                print(f"{name:<12}{engine:<13}{result['pages']:>6} pages{result['pages_per_sec']:>9.1f} pages/s"
+                      f"{result['cpu_seconds']:>8.2f} cpu s{result['peak_rss_mb']:>8.1f} MiB")
+        finally:
+            process.terminate()
+    return results
+
+
+def parse_benchmarks(sizes):
+    """Time extract_page_data, and chunked PageParser feeding, per page size."""
+    def feed_chunks(html, page_url):
+        parser = crawl.PageParser(page_url)
+        for start in range(0, len(html), 65536):
+            parser.feed(html[start:start + 65536])
+        parser.close()
+        return crawl.page_record(parser, page_url)
+
+    results = []
+    for size in sizes:
+        html = render_article_page(size)
+        for name, function in (("extract_page_data", crawl.extract_page_data),
+                               ("page_parser_chunked", feed_chunks)):
+            iterations = 0
+            start = time.perf_counter()
+            while True:
+                function(html, "https://example.com/article")
+                iterations += 1
+                elapsed = time.perf_counter() - start
+                if elapsed >= PARSE_MIN_SECONDS and iterations >= 3:
+                    break
+            result = {
+                "benchmark": "parse",
+                "scenario": f"{size // 1000}KB",
+                "engine": name,
+                "bytes": len(html),
+                "iterations": iterations,
+                "ms_per_page": elapsed / iterations * 1000,
+                "mb_per_sec": len(html) * iterations / elapsed / 1e6,
+            }
+            results.append(result)
+            print(f"{result['scenario']:<12}{name:<20}{result['ms_per_page']:>9.2f} ms/page"
+                  f"{result['mb_per_sec']:>8.1f} MB/s")
+    return results
+
+
+def git_revision():
+    """Current commit, with "-dirty" if the tree has uncommitted changes."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit + ("-dirty" if dirty else "")
+
+
+def run(args):
+    scenarios = args.scenarios.split(",") if args.scenarios else list(SCENARIOS)
+    for name in scenarios:
+        if name not in SCENARIOS:
+            sys.exit(f"Unknown scenario: {name}. Expected one of {', '.join(SCENARIOS)}")
+    repeat = 1 if args.quick else args.repeat
+    scale = 0.2 if args.quick else 1.0
+
+    results = crawl_benchmarks(scenarios, repeat, scale)
+    if not args.skip_parse:
+        results += parse_benchmarks(PARSE_SIZES[:2] if args.quick else PARSE_SIZES)
+
+    output = {
+        "meta": {
+            "revision": git_revision(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "repeat": repeat,
+            "scale": scale,
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(output, f, indent=2)
+    print(f"\nResults written to: {args.output}")
+
+
+def compare(args):
+    with open(args.old, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)
+    print(f"old: {old['meta']['revision']}  new: {new['meta']['revision']}")
+
+    old_rows = {(r["benchmark"], r["scenario"], r["engine"]): r for r in old["results"]}
+    print(f"{'benchmark':<34}{'metric':<15}{'old':>10}{'new':>10}{'change':>9}")
+    for row in new["results"]:
+        key = (row["benchmark"], row["scenario"], row["engine"])
+        before = old_rows.get(key)
+        if before is None:
+            continue
+        for metric, higher_is_better in COMPARED.items():
+            if metric not in row or metric not in before or not before[metric]:
+                continue
+            change = (row[metric] - before[metric]) / before[metric]
+            better = change > 0 if higher_is_better else change < 0
+            mark = "+" if better else "-" if abs(change) > 0.05 else " "
+            print(f"{' '.join(key[1:]):<34}{metric:<15}{before[metric]:>10.2f}"
+                  f"{row[metric]:>10.2f}{change:>+8.1%}{mark}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawler benchmark suite")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run the benchmarks and save the results")
+    run_parser.add_argument("--output", default="benchmark_results.json",
+                            help="JSON results file (default: benchmark_results.json)")
+    run_parser.add_argument("--scenarios", default=None,
+                            help=f"Comma-separated crawl scenarios (default: all of {', '.join(SCENARIOS)})")
+    run_parser.add_argument("--repeat", type=int, default=3,
+                            help="Runs per crawl; the median is reported (default: 3)")
+    run_parser.add_argument("--quick", action="store_true",
+                            help="One run of each crawl on sites a fifth of the size")
+    run_parser.add_argument("--skip-parse", action="store_true",
+                            help="Skip the parser microbenchmarks")
+
+    compare_parser = commands.add_parser("compare", help="Compare two results files")
+    compare_parser.add_argument("old")
+    compare_parser.add_argument("new")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run(args)
+    else:
+        compare(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Requests/sec and connection counts: bare session vs. the tuned transport.
+
+"before" mirrors the original get_html: a default ClientSession with a new
+ClientTimeout and headers dict built for every request. "after" uses
+transport.create_session with limits tied to the concurrency.
+
+Usage: uv run -m benchmarks.transport [requests] [concurrency]
+"""
+import sys
+import time
+import asyncio
+import aiohttp
+from transport import TransportConfig, create_session
+from benchmarks.fixture_site import start_server_process
+
+
+async def fetch_all(session, urls, concurrency, per_request_options):
+    queue = asyncio.Queue()
+    for url in urls:
+        queue.put_nowait(url)
+    received = 0
+
+    async def worker():
+        nonlocal received
+        while not queue.empty():
+            url = queue.get_nowait()
+            if per_request_options:
+                options = {
+                    "headers": {"User-Agent": "BootCrawler/1.0"},
+                    "timeout": aiohttp.ClientTimeout(total=10),
+                }
+            else:
+                options = {}
+            async with session.get(url, **options) as response:
+                await response.read()
+                # Content-Length is the size on the wire, before decompression
+                received += response.content_length or 0
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return received
+
+
+async def run(base_url, urls, concurrency, mode):
+    if mode == "before":
+        session = aiohttp.ClientSession()
+    elif mode == "after":
+        session = create_session(TransportConfig(), concurrency)
+    else:
+        session = create_session(TransportConfig(compress=False), concurrency)
+
+    async with session:
+        # Reset the server's connection counter
+        async with session.get(base_url + "__stats") as response:
+            await response.read()
+
+        start = time.perf_counter()
+        received = await fetch_all(session, urls, concurrency, mode == "before")
+        elapsed = time.perf_counter() - start
+
+        async with session.get(base_url + "__stats") as response:
+            stats = await response.json()
+    return elapsed, received, stats["connections"]
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+
+    process, base_url = start_server_process(page_count=200, paragraphs=20)
+    urls = [f"{base_url}page/{i % 200}" for i in range(total)]
+    try:
+        print(f"{'transport':<16}{'req/sec':>10}{'wire MB':>10}{'connections':>13}")
+        for mode in ("before", "after", "after-no-gzip"):
+            elapsed, received, connections = asyncio.run(
+                run(base_url, urls, concurrency, mode)
+            )
+            print(f"{mode:<16}{total / elapsed:>10.1f}{received / 1e6:>10.2f}{connections:>13}")
+    finally:
+        process.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Link scoping and normalization: the old per-link functions vs urlnorm.
+
+Simulates a crawl of link-heavy pages that share a navigation bar: each
+page has NAV_LINKS links repeated on every page plus a few unique ones.
+"old" is the pre-urlnorm path (urljoin per href, then two urlparse calls
+in is_same_domain and one in normalize_url); "new" is LinkResolver plus
+URLNormalizer.filter_links with its LRU cache.
+
+Usage: uv run -m benchmarks.urlnorm [pages]   (default: 2000)
+"""
+import sys
+import time
+from urllib.parse import urlparse, urljoin
+from urlnorm import URLNormalizer, LinkResolver
+
+BASE_URL = "https://blog.example.com/"
+NAV_LINKS = 150
+UNIQUE_LINKS = 20
+
+
+def old_normalize_url(url):
+    # normalize_url as it was before urlnorm.py
+    parsed = urlparse(url)
+    netloc = parsed.netloc.lower()
+    path = parsed.path
+    if ':80' in netloc and parsed.scheme == 'http':
+        netloc = netloc.replace(':80', '')
+    if ':443' in netloc and parsed.scheme == 'https':
+        netloc = netloc.replace(':443', '')
+    if path.endswith('/'):
+        path = path.rstrip('/')
+    return f"{netloc}{path}" if path else netloc
+
+
+def old_is_same_domain(base_url, current_url):
+    return urlparse(base_url).netloc == urlparse(current_url).netloc
+
+
+def make_pages(count):
+    nav = [f"/section/{i}/" for i in range(NAV_LINKS // 2)]
+    nav += [f"https://blog.example.com/tag/{i}" for i in range(NAV_LINKS // 2 - 5)]
+    nav += [f"https://other.example.org/{i}" for i in range(5)]
+    pages = []
+    for page in range(count):
+        page_url = f"https://blog.example.com/posts/{page}"
+        hrefs = nav + [f"/posts/{page * UNIQUE_LINKS + i}" for i in range(UNIQUE_LINKS)]
+        pages.append((page_url, hrefs))
+    return pages
+
+
+def run_old(pages):
+    keys = set()
+    for page_url, hrefs in pages:
+        for href in hrefs:
+            url = urljoin(page_url, href)
+            if old_is_same_domain(BASE_URL, url):
+                keys.add(old_normalize_url(url))
+    return keys
+
+
+def run_new(pages):
+    normalizer = URLNormalizer(BASE_URL)
+    keys = set()
+    for page_url, hrefs in pages:
+        resolver = LinkResolver(page_url)
+        urls = [resolver.resolve(href) for href in hrefs]
+        for _, key in normalizer.filter_links(urls):
+            keys.add(key)
+    return keys, normalizer
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    pages = make_pages(count)
+    links = sum(len(hrefs) for _, hrefs in pages)
+
+    old_seconds, old_keys = timed(run_old, pages)
+    new_seconds, (new_keys, normalizer) = timed(run_new, pages)
+    info = normalizer.cache_info()
+
+    print(f"{count} pages, {links:,} links")
+    print(f"{'path':<6}{'seconds':>9}{'links/s':>12}{'keys':>9}")
+    print(f"{'old':<6}{old_seconds:>9.2f}{links / old_seconds:>12,.0f}{len(old_keys):>9}")
+    print(f"{'new':<6}{new_seconds:>9.2f}{links / new_seconds:>12,.0f}{len(new_keys):>9}")
+    print(f"speedup: {old_seconds / new_seconds:.1f}x, "
+          f"cache hit ratio: {info.hits / (info.hits + info.misses):.1%}")
+
+
+if __name__ == "__main__":
+    main()
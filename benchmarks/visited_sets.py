@@ -0,0 +1,69 @@
+"""
+Memory and throughput of each visited-set backend.
+
+Adds N synthetic normalized URLs, then looks up N seen and N unseen URLs.
+Memory is the tracemalloc peak while building the set, measured in a
+separate pass so tracing doesn't skew the timings.
+
+Usage: uv run -m benchmarks.visited_sets [sizes]   (default: 1000000,10000000)
+"""
+import sys
+import time
+import tracemalloc
+from visited import VISITED_KINDS, create_visited_set
+
+
+def make_url(i):
+    return f"blog.example.com/posts/{i // 1000}/article-{i}"
+
+
+def build(kind, count):
+    visited = create_visited_set(kind)
+    for i in range(count):
+        visited.add(make_url(i))
+    return visited
+
+
+def measure_memory(kind, count):
+    tracemalloc.start()
+    visited = build(kind, count)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del visited
+    return peak
+
+
+def measure_speed(kind, count):
+    start = time.perf_counter()
+    visited = build(kind, count)
+    add_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(count):
+        make_url(i) in visited
+    hit_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    false_positives = 0
+    for i in range(count, 2 * count):
+        if make_url(i) in visited:
+            false_positives += 1
+    miss_seconds = time.perf_counter() - start
+    return add_seconds, hit_seconds, miss_seconds, false_positives
+
+
+def main():
+    sizes = sys.argv[1] if len(sys.argv) > 1 else "1000000,10000000"
+    print(f"{'backend':<13}{'urls':>10}{'MB':>9}{'B/url':>7}"
+          f"{'add/s':>11}{'hit/s':>11}{'miss/s':>11}{'FP rate':>9}")
+    for count in (int(size) for size in sizes.split(",")):
+        for kind in VISITED_KINDS:
+            peak = measure_memory(kind, count)
+            add_seconds, hit_seconds, miss_seconds, false_positives = measure_speed(kind, count)
+            print(f"{kind:<13}{count:>10}{peak / 1e6:>9.1f}{peak / count:>7.0f}"
+                  f"{count / add_seconds:>11.0f}{count / hit_seconds:>11.0f}"
+                  f"{count / miss_seconds:>11.0f}{false_positives / count:>9.5f}")
+
+
+if __name__ == "__main__":
+    main()
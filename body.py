@@ -0,0 +1,120 @@
+import re
+import codecs
+
+# Largest response body we will download (decompressed bytes)
+DEFAULT_MAX_BODY_SIZE = 10 * 1024 * 1024
+# Bytes read from the network per chunk
+CHUNK_SIZE = 64 * 1024
+# How far into the body to look for a <meta> charset (as browsers do)
+SNIFF_BYTES = 1024
+
+BOMS = (
+    (codecs.BOM_UTF8, "utf-8"),
+    (codecs.BOM_UTF16_LE, "utf-16-le"),
+    (codecs.BOM_UTF16_BE, "utf-16-be"),
+)
+
+CHARSET_PARAM = re.compile(r"charset\s*=\s*[\"']?([\w.:-]+)", re.IGNORECASE)
+META_CHARSET = re.compile(
+    rb"<meta[^>]+charset\s*=\s*[\"']?\s*([\w.:-]+)", re.IGNORECASE
+)
+
+
+def known_encoding(name):
+    """Return the codec name for name, or None if Python doesn't know it."""
+    if not name:
+        return None
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return None
+
+
+def content_type_charset(content_type):
+    """
+    Get the charset parameter of a Content-Type header.
+
+    Returns:
+        The codec name, or None if missing or unknown
+    """
+    match = CHARSET_PARAM.search(content_type or "")
+    return known_encoding(match.group(1)) if match else None
+
+
+def strip_bom(prefix):
+    """
+    Split a byte-order mark off the start of a body.
+
+    Returns:
+        (encoding or None, prefix without the BOM)
+    """
+    for bom, encoding in BOMS:
+        if prefix.startswith(bom):
+            return encoding, prefix[len(bom):]
+    return None, prefix
+
+
+def sniff_charset(prefix):
+    """
+    Find a <meta charset> or <meta http-equiv="Content-Type"> declaration.
+
+    Args:
+        prefix: The first bytes of the body
+
+    Returns:
+        The declared codec name, or None
+    """
+    match = META_CHARSET.search(prefix)
+    if match:
+        return known_encoding(match.group(1).decode("ascii"))
+    return None
+
+
+class BodyDecoder:
+    """
+    Incremental bytes-to-text decoder for HTML bodies.
+
+    A byte-order mark wins, then the Content-Type charset, then a <meta>
+    declaration in the first SNIFF_BYTES bytes, then fallback. Until the
+    encoding is settled the first bytes are held back, so feed() may return
+    an empty string for the first chunks of a small body.
+    """
+
+    def __init__(self, content_type=None, fallback="utf-8"):
+        self.header_encoding = content_type_charset(content_type)
+        self.fallback = fallback
+        self.encoding = None
+        self.decoder = None
+        self.prefix = b""
+
+    def start(self, prefix):
+        bom_encoding, prefix = strip_bom(prefix)
+        self.encoding = (
+            bom_encoding or self.header_encoding or sniff_charset(prefix) or self.fallback
+        )
+        self.decoder = codecs.getincrementaldecoder(self.encoding)(errors="replace")
+        return self.decoder.decode(prefix)
+
+    def feed(self, chunk):
+        """Decode the next chunk of the body."""
+        if self.decoder is not None:
+            return self.decoder.decode(chunk)
+        self.prefix += chunk
+        if len(self.prefix) < SNIFF_BYTES:
+            return ""
+        prefix, self.prefix = self.prefix, b""
+        return self.start(prefix)
+
+    def close(self):
+        """Decode whatever is left once the body has ended."""
+        text = ""
+        if self.decoder is None:
+            prefix, self.prefix = self.prefix, b""
+            text = self.start(prefix)
+        return text + self.decoder.decode(b"", final=True)
+
+
+def decode_body(body, content_type=None):
+    """Decode a complete body the same way BodyDecoder would."""
+    decoder = BodyDecoder(content_type)
+    return decoder.feed(body) + decoder.close()
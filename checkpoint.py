@@ -0,0 +1,147 @@
+import json
+import time
+import sqlite3
+
+# Frontier row states
+PENDING = 0
+DONE = 1
+FAILED = 2
+
+
+class CheckpointStore:
+    """
+    On-disk crawl state in SQLite (WAL mode) so a killed crawl can resume.
+
+    Records every queued URL, and each page's result when it finishes.
+    Writes are buffered and committed in batches (every batch_size
+    updates or flush_interval seconds), so the cost per page is an
+    in-memory append rather than a disk sync.
+    """
+
+    def __init__(self, path, batch_size=500, flush_interval=5.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.pending_rows = []
+        self.result_rows = []
+        self.last_flush = time.monotonic()
+
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+            CREATE TABLE IF NOT EXISTS frontier (
+                normalized_url TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                state INTEGER NOT NULL,
+                record TEXT,
+                depth INTEGER NOT NULL
+            );
+        """)
+        self.conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def start(self, base_url, resume=False):
+        """
+        Prepare the store for a crawl of base_url.
+
+        Args:
+            base_url: The crawl's starting URL
+            resume: Keep existing state (it must be for the same base_url);
+                    otherwise any previous state is cleared
+
+        Raises:
+            ValueError: If resuming state saved for a different base_url
+        """
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'base_url'").fetchone()
+        if resume and row is not None and row[0] != base_url:
+            raise ValueError(f"Checkpoint {self.path} is for {row[0]}, not {base_url}")
+        if not resume:
+            self.conn.execute("DELETE FROM frontier")
+        self.conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('base_url', ?)", (base_url,)
+        )
+        self.conn.commit()
+
+    def add_pending(self, url, normalized_url, depth=0):
+        """Record a URL that has been queued for crawling, and its depth."""
+        self.pending_rows.append((normalized_url, url, PENDING, depth))
+        self.maybe_flush()
+
+    def add_result(self, normalized_url, record):
+        """
+        Record a finished page.
+
+        Args:
+            normalized_url: The page's normalized URL
+            record: Page data dictionary, or None if the page failed
+        """
+        if record is None:
+            self.result_rows.append((FAILED, None, normalized_url))
+        else:
+            self.result_rows.append((DONE, json.dumps(record, ensure_ascii=False), normalized_url))
+        self.maybe_flush()
+
+    def maybe_flush(self):
+        buffered = len(self.pending_rows) + len(self.result_rows)
+        if buffered >= self.batch_size or time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Commit buffered updates in one transaction."""
+        if self.pending_rows or self.result_rows:
+            with self.conn:
+                # Pending rows first, so a URL queued and finished in the same
+                # batch still ends up with its result
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO frontier (normalized_url, url, state, depth) "
+                    "VALUES (?, ?, ?, ?)",
+                    self.pending_rows,
+                )
+                self.conn.executemany(
+                    "UPDATE frontier SET state = ?, record = ? WHERE normalized_url = ?",
+                    self.result_rows,
+                )
+            self.pending_rows = []
+            self.result_rows = []
+        self.last_flush = time.monotonic()
+
+    def load(self):
+        """
+        Read saved state.
+
+        Returns:
+            (pending, finished) where pending is a list of (url,
+            normalized_url, depth) still to crawl and finished maps normalized_url to its page data
+            (None for failed pages)
+        """
+        self.flush()
+        pending = []
+        finished = {}
+        for normalized_url, url, state, record, depth in self.conn.execute(
+            "SELECT normalized_url, url, state, record, depth FROM frontier ORDER BY rowid"
+        ):
+            if state == PENDING:
+                pending.append((url, normalized_url, depth))
+            elif state == DONE:
+                finished[normalized_url] = json.loads(record)
+            else:
+                finished[normalized_url] = None
+        return pending, finished
+
+    def close(self):
+        """Flush buffered updates and close the database."""
+        if self.conn is None:
+            return
+        self.flush()
+        self.conn.close()
+        self.conn = None
@@ -0,0 +1,252 @@
+import csv
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# False when .parquet reports fall back to CSV tables
+PARQUET_AVAILABLE = pa is not None
+
+COLUMNAR_FORMATS = ("parquet", "csv")
+# One row group per this many pages
+DEFAULT_ROW_GROUP_PAGES = 10000
+
+# Columns of each table, before any extra fields on pages
+PAGE_COLUMNS = ["url", "h1", "first_paragraph", "link_count", "image_count"]
+EDGE_COLUMNS = ["source", "target"]
+IMAGE_COLUMNS = ["page_url", "image_url"]
+TABLES = ("pages", "edges", "images")
+
+# Arrow types of the numeric extra fields (link_analytics.ANALYTICS_FIELDS);
+# every other extra field is a string column, with values converted by str()
+EXTRA_FIELD_TYPES = {
+    "pagerank": "float64",
+    "in_degree": "int64",
+    "out_degree": "int64",
+    "depth": "int64",
+    "orphan": "bool_",
+    "broken_links": "int64",
+}
+
+
+def table_paths(filename, file_format):
+    """
+    Map report.parquet to report.pages.parquet, report.edges.parquet and
+    report.images.parquet (or .csv for the CSV format).
+
+    Returns:
+        Dict of table name -> path
+    """
+    base = filename[:-len(".parquet")] if filename.endswith(".parquet") else filename
+    return {table: f"{base}.{table}.{file_format}" for table in TABLES}
+
+
+def split_pages(pages, extra_fields=()):
+    """
+    Turn page dicts into the columns of the pages, edges and images tables.
+
+    Returns:
+        Dict of table name -> {column: list of values}
+    """
+    columns = {
+        "pages": {column: [] for column in PAGE_COLUMNS + list(extra_fields)},
+        "edges": {column: [] for column in EDGE_COLUMNS},
+        "images": {column: [] for column in IMAGE_COLUMNS},
+    }
+    page_columns = columns["pages"]
+    sources = columns["edges"]["source"]
+    targets = columns["edges"]["target"]
+    image_pages = columns["images"]["page_url"]
+    image_urls = columns["images"]["image_url"]
+    for page in pages:
+        url = page["url"]
+        links = page["outgoing_links"]
+        images = page["image_urls"]
+        page_columns["url"].append(url)
+        page_columns["h1"].append(page["h1"])
+        page_columns["first_paragraph"].append(page["first_paragraph"])
+        page_columns["link_count"].append(len(links))
+        page_columns["image_count"].append(len(images))
+        for field in extra_fields:
+            page_columns[field].append(page.get(field))
+        sources.extend([url] * len(links))
+        targets.extend(links)
+        image_pages.extend([url] * len(images))
+        image_urls.extend(images)
+    return columns
+
+
+class ColumnarReportSink:
+    """
+    Streams a crawl into separate pages, edges and images tables.
+
+    Links and images get one row each instead of a ;-joined cell, so
+    nothing downstream has to split strings. With pyarrow each table is a
+    Parquet file with dictionary-encoded URL columns, and every flush
+    writes one row group; without it (or with file_format="csv") the
+    same tables are written as CSV.
+
+    Has the report_sinks.ReportSink interface (write, flush, close,
+    count), so the crawler can stream into it.
+    """
+
+    def __init__(self, filename, flush_every=DEFAULT_ROW_GROUP_PAGES, append=False,
+                 extra_fields=(), file_format=None, compression="zstd"):
+        """
+        Args:
+            filename: Report name, e.g. crawl.parquet; see table_paths
+            flush_every: Pages per row group
+            append: Add to existing CSV tables (Parquet files can't be
+                appended to)
+            extra_fields: Extra page data keys to add as pages columns;
+                in Parquet they are typed by EXTRA_FIELD_TYPES, or strings
+            file_format: "parquet" or "csv" (default: parquet if pyarrow
+                is installed)
+            compression: Parquet compression codec
+        """
+        if file_format is None:
+            file_format = "parquet" if pa is not None else "csv"
+        if file_format not in COLUMNAR_FORMATS:
+            raise ValueError(f"Unknown format: {file_format}. Expected one of {COLUMNAR_FORMATS}")
+        if file_format == "parquet" and pa is None:
+            raise ImportError("Parquet reports need pyarrow: pip install pyarrow")
+        if file_format == "parquet" and append:
+            raise ValueError("Parquet reports can't be appended to")
+        self.filename = filename
+        self.flush_every = flush_every
+        self.buffer = []
+        self.count = 0
+        self.extra_fields = tuple(extra_fields)
+        self.file_format = file_format
+        self.compression = compression
+        self.paths = table_paths(filename, file_format)
+        self.closed = False
+        self.writers = {}
+        self.schemas = {}
+        self.files = {}
+        if file_format == "parquet":
+            for table in TABLES:
+                self.schemas[table] = self.schema(table)
+                self.writers[table] = pq.ParquetWriter(
+                    self.paths[table], self.schemas[table], compression=compression
+                )
+        else:
+            headers = {
+                "pages": PAGE_COLUMNS + list(self.extra_fields),
+                "edges": EDGE_COLUMNS,
+                "images": IMAGE_COLUMNS,
+            }
+            for table in TABLES:
+                self.files[table] = open(self.paths[table], "a" if append else "w",
+                                         newline="", encoding="utf-8")
+                self.writers[table] = csv.writer(self.files[table])
+                if self.files[table].tell() == 0:
+                    self.writers[table].writerow(headers[table])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def write(self, page):
+        """
+        Add one page to the report.
+
+        Args:
+            page: Page data dictionary from extract_page_data
+        """
+        self.buffer.append(page)
+        self.count += 1
+        if len(self.buffer) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        """Write buffered pages as one row group per table."""
+        if self.buffer:
+            self.write_rows(self.buffer)
+            self.buffer = []
+        for file in self.files.values():
+            file.flush()
+
+    def close(self):
+        """Flush remaining pages and finish the tables."""
+        if self.closed:
+            return
+        self.flush()
+        self.closed = True
+        if self.file_format == "parquet":
+            for writer in self.writers.values():
+                writer.close()
+        for file in self.files.values():
+            file.close()
+
+    def write_rows(self, pages):
+        if self.file_format == "csv":
+            self.write_csv_rows(pages)
+            return
+        columns = split_pages(pages, self.extra_fields)
+        # Convert every table before writing any, so a bad value can't
+        # leave the tables with different row groups
+        row_groups = {table: self.arrow_table(table, columns[table]) for table in TABLES}
+        for table in TABLES:
+            self.writers[table].write_table(row_groups[table])
+
+    def write_csv_rows(self, pages):
+        page_rows = []
+        edge_rows = []
+        image_rows = []
+        for page in pages:
+            url = page["url"]
+            links = page["outgoing_links"]
+            images = page["image_urls"]
+            page_rows.append([url, page["h1"], page["first_paragraph"], len(links), len(images)]
+                             + [page.get(field) for field in self.extra_fields])
+            edge_rows.extend([(url, link) for link in links])
+            image_rows.extend([(url, image) for image in images])
+        self.writers["pages"].writerows(page_rows)
+        self.writers["edges"].writerows(edge_rows)
+        self.writers["images"].writerows(image_rows)
+
+    def arrow_table(self, table, columns):
+        """
+        Convert one table's columns to an Arrow table with its schema.
+
+        Raises:
+            ValueError: If a value doesn't fit its column's type
+        """
+        schema = self.schemas[table]
+        arrays = []
+        for field in schema:
+            values = columns[field.name]
+            if field.name in self.extra_fields and pa.types.is_string(field.type):
+                values = [value if value is None or isinstance(value, str) else str(value)
+                          for value in values]
+            try:
+                arrays.append(pa.array(values, type=field.type))
+            except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+                raise ValueError(f"Can't write {table} column {field.name!r} "
+                                 f"as {field.type}: {e}")
+        return pa.Table.from_arrays(arrays, schema=schema)
+
+    def schema(self, table):
+        """Arrow schema for a table; extra fields are typed by EXTRA_FIELD_TYPES."""
+        # Each distinct URL is stored once per row group
+        url = pa.dictionary(pa.int32(), pa.string())
+        if table == "edges":
+            return pa.schema([("source", url), ("target", url)])
+        if table == "images":
+            return pa.schema([("page_url", url), ("image_url", url)])
+        fields = [
+            ("url", url),
+            ("h1", pa.string()),
+            ("first_paragraph", pa.string()),
+            ("link_count", pa.int32()),
+            ("image_count", pa.int32()),
+        ]
+        for field in self.extra_fields:
+            fields.append((field, getattr(pa, EXTRA_FIELD_TYPES.get(field, "string"))()))
+        return pa.schema(fields)
@@ -1,108 +1,291 @@
+import time
 import requests
-from urllib.parse import urlparse, urljoin
-from bs4 import BeautifulSoup
-from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+from html.parser import HTMLParser
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import urlnorm
+import dedup
+from transport import TransportConfig, default_headers
+from visited import create_visited_set
+from metrics import format_progress
+from errors import (
+    FetchError,
+    FetchTimeoutError,
+    ConnectError,
+    HTTPStatusError,
+    ContentTypeError,
+    BodyTooLargeError
+)
+from body import BodyDecoder, DEFAULT_MAX_BODY_SIZE, CHUNK_SIZE
+from extraction import PAGE_FIELDS
 
 def normalize_url(url):
-    # Parse the URL into components
-    parsed = urlparse(url)
-    
-    # Extract components
-    netloc = parsed.netloc.lower()  # Domain (case-insensitive)
-    path = parsed.path  # Path
-    
-    # Remove default ports
-    if ':80' in netloc and parsed.scheme == 'http':
-        netloc = netloc.replace(':80', '')
-    if ':443' in netloc and parsed.scheme == 'https':
-        netloc = netloc.replace(':443', '')
-    
-    # Remove trailing slash from path
-    if path.endswith('/'):
-        path = path.rstrip('/')
-    
-    # Build normalized URL (no scheme, no fragment)
-    if path:
-        normalized = f"{netloc}{path}"
-    else:
-        normalized = netloc
-    
-    return normalized
+    """
+    Canonicalize a URL into the key used to deduplicate pages.
 
-def get_h1_from_html(html):
-    soup = BeautifulSoup(html, 'html.parser')
-    h1_tag = soup.find('h1')
+    Drops the scheme, fragment, default port, trailing slash, "www." and
+    tracking parameters, sorts the query and canonicalizes percent-encoding
+    (see urlnorm.URLNormalizer). Results are cached.
+    """
+    return urlnorm.normalize_url(url)
+
+# Void elements are closed as soon as they open (matches BeautifulSoup's
+# html.parser tree builder, whose nesting rules PageParser mirrors).
+VOID_ELEMENTS = frozenset([
+    "area", "base", "basefont", "bgsound", "br", "col", "command", "embed",
+    "frame", "hr", "image", "img", "input", "isindex", "keygen", "link",
+    "menuitem", "meta", "nextid", "param", "source", "spacer", "track", "wbr",
+])
+
+# Text inside these tags is not part of a tag's visible text.
+NON_TEXT_ELEMENTS = frozenset(["script", "style", "template", "rt", "rp"])
+
+
+class ParseComplete(Exception):
+    """Raised inside PageParser to abandon the rest of the document."""
+
+
+class PageParser(HTMLParser):
+    """
+    Single-pass streaming extractor for the fields we report on.
+
+    Only tracks what extract_page_data needs: the first <h1>, the first <p>
+    (preferring one inside the first <main>), every distinct <a href> (in
+    first-seen order) and every <img src>. Text is collected the same way
+    BeautifulSoup's get_text(strip=True) does, so results match the old
+    tree-based helpers. Feed it the whole document or chunks as they
+    arrive, then call close().
+
+    Given fields (a subset of extraction.PAGE_FIELDS), it skips the rest.
+    Without links, images or a fingerprint to collect, it stops as soon as
+    the requested <h1> and <p> are complete: complete turns True and later
+    feed() calls return straight away, so callers can stop reading.
+    """
+
+    def __init__(self, base_url, fingerprint=False, fields=None):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        fields = PAGE_FIELDS if fields is None else fields
+        self.want_h1 = "h1" in fields
+        self.want_paragraph = "first_paragraph" in fields
+        self.want_links = "outgoing_links" in fields
+        self.want_images = "image_urls" in fields
+        # Text only matters to the captures and the fingerprint
+        self.want_text = fingerprint or self.want_h1 or self.want_paragraph
+        self.stop_early = not (fingerprint or self.want_links or self.want_images)
+        # Nothing left to find: the rest of the document is skipped
+        self.complete = self.stop_early and not self.want_text
+        # All visible text, kept only for content fingerprinting
+        self.text = [] if fingerprint else None
+        self.resolver = urlnorm.LinkResolver(base_url)
+        self.links = []
+        # Links already in self.links; menus often repeat a link
+        self.seen_links = set()
+        self.images = []
+        self.stack = []
+        self.non_text_depth = 0
+        self.main_depth = None
+        self.main_seen = False
+        # Adjacent data chunks form one string until the next tag event
+        self.text_run = []
+        # Void tags already closed, whose end tags must be swallowed, by
+        # count: most (<img>, <br>) never get an end tag, so a list of
+        # them would make every end tag a scan of the page so far
+        self.already_closed = Counter()
+        # Text captures: name -> [stack depth, text parts, finished]
+        self.captures = {}
+        if not self.want_text:
+            # Only links and images: no text or tag nesting to track, so
+            # start tags go straight to collect_url and end tags are ignored
+            self.handle_starttag = self.collect_url
+            self.handle_endtag = self.ignore_tag
+
+    def start_capture(self, name):
+        if name not in self.captures:
+            self.captures[name] = [len(self.stack), [], False]
+
+    def capture_text(self, name):
+        capture = self.captures.get(name)
+        if capture is None:
+            return None
+        return "".join(capture[1])
+
+    def flush_text(self):
+        if not self.text_run:
+            return
+        text = "".join(self.text_run).strip()
+        self.text_run = []
+        if not text or self.non_text_depth:
+            return
+        if self.text is not None:
+            self.text.append(text)
+        for capture in self.captures.values():
+            if not capture[2]:
+                capture[1].append(text)
+
+    def collect_url(self, tag, attrs, empty_element=True):
+        if (tag == "a" and self.want_links) or (tag == "img" and self.want_images):
+            attr_name = "href" if tag == "a" else "src"
+            value = None
+            for name, attr_value in attrs:
+                if name == attr_name:
+                    # A bare attribute (<a href>) has an empty value
+                    value = attr_value if attr_value is not None else ""
+            if value is not None:
+                url = self.resolver.resolve(value)
+                if tag == "img":
+                    self.images.append(url)
+                elif url not in self.seen_links:
+                    self.seen_links.add(url)
+                    self.links.append(url)
+
+    def ignore_tag(self, tag):
+        pass
+
+    def handle_starttag(self, tag, attrs, empty_element=True):
+        self.flush_text()
+        self.collect_url(tag, attrs)
+
+        if tag == "h1":
+            if self.want_h1:
+                self.start_capture("h1")
+        elif tag == "p" and self.want_paragraph:
+            self.start_capture("p")
+            if self.main_depth is not None:
+                self.start_capture("main_p")
+        elif tag == "main" and not self.main_seen:
+            self.main_seen = True
+            self.main_depth = len(self.stack)
+
+        if tag in NON_TEXT_ELEMENTS:
+            self.non_text_depth += 1
+        self.stack.append(tag)
+
+        # Void elements close straight away; a later stray </br> is ignored
+        if tag in VOID_ELEMENTS and empty_element:
+            self.close_tag(tag)
+            self.already_closed[tag] += 1
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs, empty_element=False)
+        self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if self.already_closed[tag]:
+            self.already_closed[tag] -= 1
+            return
+        self.close_tag(tag)
+
+    def close_tag(self, tag):
+        self.flush_text()
+        if tag not in self.stack:
+            return
+
+        # Pop up to and including the most recent matching open tag
+        while self.stack:
+            popped = self.stack.pop()
+            if popped in NON_TEXT_ELEMENTS:
+                self.non_text_depth -= 1
+            if popped == tag:
+                break
 
-    if h1_tag is None:
-        return ""
+        depth = len(self.stack)
+        for capture in self.captures.values():
+            if not capture[2] and depth <= capture[0]:
+                capture[2] = True
+        if self.main_depth is not None and depth <= self.main_depth:
+            self.main_depth = None
+        if self.stop_early and self.captures_complete():
+            raise ParseComplete
 
-    return h1_tag.get_text(strip=True)
+    def captures_complete(self):
+        """True once no later tag can change the requested h1 or first paragraph."""
+        if self.want_h1 and not self.capture_finished("h1"):
+            return False
+        if self.want_paragraph and not self.capture_finished("main_p"):
+            # The first <p> stands unless a <main> may still hold one
+            closed_main = self.main_seen and self.main_depth is None
+            if not (self.capture_finished("p") and closed_main):
+                return False
+        return True
+
+    def capture_finished(self, name):
+        capture = self.captures.get(name)
+        return capture is not None and capture[2]
+
+    def handle_data(self, data):
+        if self.want_text:
+            self.text_run.append(data)
+
+    def handle_comment(self, data):
+        self.flush_text()
+
+    def handle_decl(self, decl):
+        self.flush_text()
+
+    def handle_pi(self, data):
+        self.flush_text()
+
+    def feed(self, data):
+        if self.complete:
+            return
+        try:
+            super().feed(data)
+        except ParseComplete:
+            self.complete = True
+
+    def close(self):
+        if not self.complete:
+            try:
+                super().close()
+            except ParseComplete:
+                self.complete = True
+        self.flush_text()
+
+    def h1(self):
+        return self.capture_text("h1") or ""
+
+    def first_paragraph(self):
+        # A <p> inside <main> wins, otherwise fall back to the first <p>
+        if "main_p" in self.captures:
+            return self.capture_text("main_p")
+        return self.capture_text("p") or ""
+
+
+def parse_page(html, base_url, fingerprint=False, fields=None):
+    """
+    Run a single PageParser pass over an HTML string.
+
+    Args:
+        html: The HTML content
+        base_url: URL used to resolve relative links and images
+        fingerprint: Also collect the page text for a content fingerprint
+        fields: PAGE_FIELDS to collect (default: all of them)
+
+    Returns:
+        The finished PageParser
+    """
+    parser = PageParser(base_url, fingerprint, fields)
+    parser.feed(html)
+    parser.close()
+    return parser
+
+def get_h1_from_html(html):
+    return parse_page(html, "").h1()
 
 def get_first_paragraph_from_html(html):
-    soup = BeautifulSoup(html, 'html.parser')
-    
-    # Try to find <main> tag first
-    main_tag = soup.find('main')
-    
-    # If <main> exists, search for <p> within it
-    if main_tag:
-        p_tag = main_tag.find('p')
-        if p_tag:
-            return p_tag.get_text(strip=True)
-    
-    # Fallback: search entire document for first <p>
-    p_tag = soup.find('p')
-    
-    if p_tag is None:
-        return ""
-    
-    return p_tag.get_text(strip=True)
+    return parse_page(html, "").first_paragraph()
 
 def get_urls_from_html(html, base_url):
-    soup = BeautifulSoup(html, 'html.parser')
-    urls = []
-    
-    # Find all anchor tags
-    anchor_tags = soup.find_all('a')
-    
-    for tag in anchor_tags:
-        # Safely get href attribute
-        href = tag.get('href')
-        
-        # Skip if no href attribute
-        if href is None:
-            continue
-        
-        # Convert to absolute URL
-        absolute_url = urljoin(base_url, href)
-        urls.append(absolute_url)
-    
-    return urls
+    return parse_page(html, base_url).links
 
 def get_images_from_html(html, base_url):
-    soup = BeautifulSoup(html, 'html.parser')
-    image_urls = []
-    
-    # Find all img tags
-    img_tags = soup.find_all('img')
-    
-    for tag in img_tags:
-        # Safely get src attribute
-        src = tag.get('src')
-        
-        # Skip if no src attribute
-        if src is None:
-            continue
-        
-        # Convert to absolute URL
-        absolute_url = urljoin(base_url, src)
-        image_urls.append(absolute_url)
-    
-    return image_urls
+    return parse_page(html, base_url).images
 
-def extract_page_data(html, page_url):
+def extract_page_data(html, page_url, fingerprint=False, spec=None):
     """
-    Extract all relevant data from an HTML page.
+    Extract all relevant data from an HTML page in a single parse.
 
     Returns a dictionary with:
     - url: the page URL
@@ -110,107 +293,361 @@ def extract_page_data(html, page_url):
     - first_paragraph: first paragraph text (or empty string)
     - outgoing_links: list of absolute URLs from anchor tags
     - image_urls: list of absolute image URLs
+    - fingerprint: SimHash of the visible text (only with fingerprint=True;
+      None for a page without text), see dedup.py
+
+    With an extraction.ExtractionSpec, only its fields are computed (the
+    others are empty) and its selector and extractor fields are added.
+
+    Crawlers should follow "outgoing_links" rather than parsing the page
+    again with get_urls_from_html.
     """
-    return {
+    fields = spec.fields if spec is not None else None
+    record = page_record(parse_page(html, page_url, fingerprint, fields), page_url)
+    if spec is not None and spec.needs_html:
+        record.update(spec.extract(html, page_url))
+    return record
+
+def page_record(parser, page_url):
+    """Build the extract_page_data dictionary from a finished PageParser."""
+    record = {
         "url": page_url,
-        "h1": get_h1_from_html(html),
-        "first_paragraph": get_first_paragraph_from_html(html),
-        "outgoing_links": get_urls_from_html(html, page_url),
-        "image_urls": get_images_from_html(html, page_url)
+        "h1": parser.h1(),
+        "first_paragraph": parser.first_paragraph(),
+        "outgoing_links": parser.links,
+        "image_urls": parser.images
     }
+    if parser.text is not None:
+        record["fingerprint"] = dedup.text_fingerprint(" ".join(parser.text))
+    return record
+
+def create_requests_session(config=None, max_workers=1):
+    """
+    Create a requests.Session with a connection pool sized for max_workers.
 
-def get_html(url):
+    The sync counterpart of transport.create_session: connections are
+    reused across pages instead of opened per request, and the default
+    headers are set once.
+
+    Args:
+        config: TransportConfig (defaults are used when None); limit sets
+            the pool size, user_agent and compress the default headers
+        max_workers: Fetch threads that will share the session
+
+    Returns:
+        A requests.Session; close it when done
+    """
+    if config is None:
+        config = TransportConfig()
+    pool_size = config.limit or max_workers
+    session = requests.Session()
+    # One pool per host, each big enough that no thread waits for a socket
+    adapter = HTTPAdapter(pool_connections=10, pool_maxsize=pool_size, max_retries=0)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update(default_headers(config))
+    return session
+
+def get_html(url, max_body_size=DEFAULT_MAX_BODY_SIZE, session=None, timeout=10):
     """
     Fetch HTML content from a URL.
     
+    The body is streamed in chunks and decoded incrementally; non-HTML
+    responses are rejected before the body is downloaded.
+
     Args:
         url: The URL to fetch
+        max_body_size: Largest body to download in bytes (None: no limit)
+        session: requests.Session to reuse connections from (default: a
+            one-off request with the default User-Agent)
+        timeout: Seconds to wait for the server (requests' connect/read
+            timeout, or a (connect, read) tuple)
         
     Returns:
         The HTML content as a string
         
     Raises:
-        Exception: If the request fails, status code is 400+, 
-                   or content-type is not text/html
+        FetchError: If the request fails, status code is 400+,
+                    content-type is not text/html or the body is larger
+                    than max_body_size (the subclass says which)
     """
     try:
-        # Make request with custom User-Agent and TIMEOUT
-        response = requests.get(
-            url, 
-            headers={"User-Agent": "BootCrawler/1.0"},
-            timeout=10  # 10 seconds timeout
-        )
-        
-        # Check for HTTP error status codes (400+)
-        if response.status_code >= 400:
-            raise Exception(f"HTTP error: {response.status_code}")
-        
-        # Get content-type header
-        content_type = response.headers.get('Content-Type', '')
-        
-        # Check if content-type is text/html
-        if 'text/html' not in content_type:
-            raise Exception(f"Invalid content type: {content_type}. Expected text/html")
-        
-        # Return the HTML content
-        return response.text
+        if session is not None:
+            # Default headers are session-wide (see create_requests_session)
+            response = session.get(url, timeout=timeout, stream=True)
+        else:
+            # Make request with custom User-Agent and TIMEOUT
+            response = requests.get(
+                url,
+                headers={"User-Agent": "BootCrawler/1.0"},
+                timeout=timeout,
+                stream=True
+            )
+        with response:
+            # Check for HTTP error status codes (400+)
+            if response.status_code >= 400:
+                # Error pages are small: reading one keeps its connection pooled
+                drain(response, max_body_size)
+                raise HTTPStatusError(response.status_code, response.headers)
+            
+            # Get content-type header
+            content_type = response.headers.get('Content-Type', '')
+            
+            # Check if content-type is text/html
+            if 'text/html' not in content_type:
+                raise ContentTypeError(content_type)
+
+            content_length = response.headers.get('Content-Length', '')
+            if (max_body_size is not None and content_length.isdigit()
+                    and int(content_length) > max_body_size):
+                raise BodyTooLargeError(max_body_size)
+
+            # Read and decode the body chunk by chunk
+            decoder = BodyDecoder(content_type)
+            parts = []
+            body_size = 0
+            for chunk in response.iter_content(CHUNK_SIZE):
+                body_size += len(chunk)
+                if max_body_size is not None and body_size > max_body_size:
+                    raise BodyTooLargeError(max_body_size)
+                parts.append(decoder.feed(chunk))
+            parts.append(decoder.close())
+            
+            # Return the HTML content
+            return "".join(parts)
         
+    except requests.exceptions.Timeout as e:
+        raise FetchTimeoutError(f"Request failed: {e}")
+    except requests.exceptions.ConnectionError as e:
+        raise ConnectError(f"Request failed: {e}")
     except requests.exceptions.RequestException as e:
         # Catch all requests-related errors (network, timeout, etc.)
-        raise Exception(f"Request failed: {e}")
+        raise FetchError(f"Request failed: {e}")
+
+def drain(response, max_body_size):
+    """
+    Read and discard a response body so urllib3 can reuse its connection.
+
+    A body larger than max_body_size is left unread; its connection is
+    closed instead.
+    """
+    body_size = 0
+    for chunk in response.iter_content(CHUNK_SIZE):
+        body_size += len(chunk)
+        if max_body_size is not None and body_size > max_body_size:
+            return
+
 
 def is_same_domain(base_url, current_url):
     """
     Check if current_url is on the same domain as base_url.
-    """
-    base_domain = urlparse(base_url).netloc
-    current_domain = urlparse(current_url).netloc
-    return base_domain == current_domain
 
-def crawl_page(base_url, current_url=None, page_data=None):
+    Hosts are compared in canonical form, so case, default ports and a
+    "www." prefix don't matter.
     """
-    Recursively crawl pages starting from base_url.
+    return urlnorm.same_host(base_url, current_url)
+
+class SyncCrawler:
+    def __init__(self, base_url, max_workers=1, max_pages=None, transport=None,
+                 visited=None, normalizer=None, progress_interval=1.0):
+        """
+        Iterative crawler for code that can't run an event loop.
+
+        Pages come off an explicit deque frontier (breadth-first), so site
+        depth is unlimited, and every fetch reuses the connection pool of
+        one requests.Session. With max_workers > 1 pages are fetched and
+        parsed on a thread pool; the frontier, visited set and page_data
+        are only touched by the calling thread.
+
+        Use it as a context manager so the session and pool are closed.
+
+        Args:
+            base_url: The starting URL to crawl
+            max_workers: Pages fetched at once (1: serial, no thread pool)
+            max_pages: Maximum number of pages to crawl (None: no limit)
+            transport: TransportConfig for the session (pool size, timeout,
+                User-Agent, compression, max_body_size)
+            visited: Visited-set backend from visited.create_visited_set
+                (default: exact set of URL strings)
+            normalizer: URLNormalizer that scopes and deduplicates links
+                (default: URLNormalizer(base_url))
+            progress_interval: Seconds between progress lines (None or 0:
+                no progress output)
+        """
+        self.base_url = base_url
+        self.max_workers = max_workers
+        self.max_pages = max_pages
+        self.transport = transport if transport is not None else TransportConfig()
+        self.visited = visited if visited is not None else create_visited_set()
+        self.urls = normalizer if normalizer is not None else urlnorm.URLNormalizer(base_url)
+        self.progress_interval = progress_interval
+        self.page_data = {}
+        # Frontier of (url, normalized_url) pairs, deduplicated on enqueue
+        self.frontier = deque()
+        self.pages_crawled = 0
+        self.pages_failed = 0
+        self.failure_counts = Counter()
+        self.should_stop = False
+        self.session = None
+        self.executor = None
+        self.started = None
+        self.next_report = 0.0
+
+    def __enter__(self):
+        """Context manager entry - create the session and fetch pool."""
+        self.session = create_requests_session(self.transport, self.max_workers)
+        if self.max_workers > 1:
+            self.executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit - close the fetch pool and session."""
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+        self.session.close()
+
+    def stats(self):
+        """Summary counters, with the same keys as AsyncCrawler.stats()."""
+        return {
+            "pages_found": len(self.visited),
+            "pages_crawled": self.pages_crawled,
+            "pages_failed": self.pages_failed,
+            "pages_disallowed": 0,
+            "failure_counts": Counter(self.failure_counts),
+            "retries": 0,
+            "throttled": 0,
+        }
+
+    def mark_seen(self, page_data):
+        """Treat pages already in page_data as crawled and keep adding to it."""
+        for normalized_url in page_data:
+            self.visited.add(normalized_url)
+        self.page_data = page_data
+
+    def enqueue(self, url, normalized_url=None):
+        """
+        Add a URL to the frontier if it is in scope and not yet seen.
+
+        Returns:
+            True if the URL was queued
+        """
+        if self.should_stop:
+            return False
+        if normalized_url is None:
+            normalized_url = self.urls.normalize_in_scope(url)
+            if normalized_url is None:
+                return False
+        if normalized_url in self.visited:
+            return False
+        if self.max_pages is not None and len(self.visited) >= self.max_pages:
+            self.should_stop = True
+            print(f"\nReached maximum number of pages to crawl: {self.max_pages}")
+            return False
+        self.visited.add(normalized_url)
+        self.frontier.append((url, normalized_url))
+        return True
+
+    def fetch_page(self, url):
+        """
+        Fetch and parse one page; runs on a pool thread when max_workers > 1.
+
+        Returns:
+            (data, error): the extract_page_data dict, or the exception
+        """
+        transport = self.transport
+        timeout = (transport.connect_timeout or transport.timeout, transport.timeout)
+        try:
+            html = get_html(url, transport.max_body_size, self.session, timeout)
+            return extract_page_data(html, url), None
+        except Exception as e:
+            return None, e
+
+    def finish_page(self, url, normalized_url, data, error):
+        """Record a fetched page (or its failure) and queue its links."""
+        if error is not None:
+            if isinstance(error, FetchError):
+                print(f"Error fetching {url}: {error}")
+                kind = error.kind
+            else:
+                print(f"Error parsing {url}: {error}")
+                kind = "parse"
+            self.pages_failed += 1
+            self.failure_counts[kind] += 1
+            self.page_data[normalized_url] = None
+        else:
+            self.pages_crawled += 1
+            self.page_data[normalized_url] = data
+            for link, normalized_link in self.urls.filter_links(data["outgoing_links"]):
+                if self.should_stop:
+                    break
+                self.enqueue(link, normalized_link)
+        self.report_progress()
+
+    def report_progress(self, force=False):
+        """Print the progress line, at most once per progress_interval."""
+        if not self.progress_interval:
+            return
+        now = time.monotonic()
+        if force or now >= self.next_report:
+            self.next_report = now + self.progress_interval
+            print(format_progress(self.stats(), now - self.started, len(self.frontier)))
+
+    def crawl(self, start_url=None):
+        """
+        Crawl from start_url (default: base_url) until the frontier is empty.
+
+        Returns:
+            Dictionary of page data keyed by normalized URL (None for
+            failed pages)
+        """
+        self.started = time.monotonic()
+        self.next_report = self.started + (self.progress_interval or 0)
+        self.enqueue(start_url or self.base_url)
+
+        if self.executor is None:
+            while self.frontier:
+                url, normalized_url = self.frontier.popleft()
+                self.finish_page(url, normalized_url, *self.fetch_page(url))
+        else:
+            # Keep max_workers pages in flight; results are handled here
+            in_flight = {}
+            while self.frontier or in_flight:
+                while self.frontier and len(in_flight) < self.max_workers:
+                    url, normalized_url = self.frontier.popleft()
+                    future = self.executor.submit(self.fetch_page, url)
+                    in_flight[future] = (url, normalized_url)
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    url, normalized_url = in_flight.pop(future)
+                    self.finish_page(url, normalized_url, *future.result())
+
+        self.report_progress(force=True)
+        return self.page_data
+
+
+def crawl_page(base_url, current_url=None, page_data=None, max_pages=None,
+               max_workers=1, **options):
     """
-    # Initialize on first call
-    if current_url is None:
-        current_url = base_url
-    
-    if page_data is None:
-        page_data = {}
-    
-    # Check if current_url is on the same domain
-    if not is_same_domain(base_url, current_url):
-        return page_data
-    
-    # Normalize the URL
-    normalized_url = normalize_url(current_url)
-    
-    # Check if we've already crawled this page
-    if normalized_url in page_data:
-        return page_data
-    
-    # Print progress
-    print(f"Crawling: {current_url}")
-    
-    # Fetch the HTML
-    try:
-        html = get_html(current_url)
-    except Exception as e:
-        print(f"Error fetching {current_url}: {e}")
-        # CRITICAL FIX: Mark as visited even if it failed
-        page_data[normalized_url] = None
-        return page_data
-    
-    # Extract page data
-    data = extract_page_data(html, current_url)
-    page_data[normalized_url] = data
-    
-    # Get all URLs from the page
-    urls = get_urls_from_html(html, current_url)
-    
-    # Recursively crawl each URL
-    for url in urls:
-        page_data = crawl_page(base_url, url, page_data)
-    
-    return page_data
+    Crawl pages starting from current_url (default: base_url).
 
+    Runs a SyncCrawler: an explicit frontier instead of recursion, so
+    deep sites can't hit the recursion limit, and one pooled session.
+
+    Args:
+        base_url: Links off this URL's host are not followed
+        current_url: Where to start (default: base_url)
+        page_data: Pages already crawled; they are skipped and the new
+            pages are added to this dict
+        max_pages: Maximum number of pages in page_data (None: no limit)
+        max_workers: Pages fetched at once on a thread pool
+        **options: Other SyncCrawler arguments (transport, visited, ...)
+
+    Returns:
+        Dictionary of page data keyed by normalized URL (None for failed
+        pages)
+    """
+    with SyncCrawler(base_url, max_workers, max_pages, **options) as crawler:
+        if page_data is not None:
+            crawler.mark_seen(page_data)
+        return crawler.crawl(current_url)
@@ -1,41 +1,56 @@
 import csv
 
+# CSV column headers
+FIELDNAMES = ["page_url", "h1", "first_paragraph", "outgoing_link_urls", "image_urls"]
 
-def write_csv_report(page_data, filename="report.csv"):
+
+def page_to_row(page, extra_fields=()):
+    """
+    Flatten one page's data into a CSV row.
+
+    Args:
+        page: Page data dictionary from extract_page_data
+        extra_fields: Further page data keys to copy into their own
+            columns after FIELDNAMES (e.g. "duplicate_of")
+
+    Returns:
+        Dictionary keyed by FIELDNAMES and extra_fields
+    """
+    # Join lists with semicolons
+    row = {
+        "page_url": page["url"],
+        "h1": page["h1"],
+        "first_paragraph": page["first_paragraph"],
+        "outgoing_link_urls": ";".join(page["outgoing_links"]),
+        "image_urls": ";".join(page["image_urls"])
+    }
+    for field in extra_fields:
+        row[field] = page.get(field, "")
+    return row
+
+
+def write_csv_report(page_data, filename="report.csv", extra_fields=()):
     """
     Write crawl data to a CSV file.
     
     Args:
         page_data: Dictionary of page data keyed by normalized URL
         filename: Output CSV filename (default: report.csv)
+        extra_fields: Extra columns (see page_to_row)
     """
     # Filter out failed pages (those with None as value)
     successful_pages = {url: data for url, data in page_data.items() if data is not None}
     
-    # Define CSV column headers
-    fieldnames = ["page_url", "h1", "first_paragraph", "outgoing_link_urls", "image_urls"]
-    
     # Open file for writing
     with open(filename, "w", newline="", encoding="utf-8") as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        writer = csv.DictWriter(csvfile, fieldnames=FIELDNAMES + list(extra_fields))
         
         # Write header row
         writer.writeheader()
         
         # Write each page's data
         for page in successful_pages.values():
-            # Join lists with semicolons
-            outgoing_links = ";".join(page["outgoing_links"])
-            image_urls = ";".join(page["image_urls"])
-            
-            # Write row
-            writer.writerow({
-                "page_url": page["url"],
-                "h1": page["h1"],
-                "first_paragraph": page["first_paragraph"],
-                "outgoing_link_urls": outgoing_links,
-                "image_urls": image_urls
-            })
+            writer.writerow(page_to_row(page, extra_fields))
     
     print(f"\nCSV report written to: {filename}")
     print(f"Total pages exported: {len(successful_pages)}")
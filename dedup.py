@@ -0,0 +1,224 @@
+import re
+from hashlib import blake2b
+from functools import lru_cache
+from urllib.parse import urlsplit
+
+FINGERPRINT_BITS = 64
+# Words per shingle: short enough to survive small edits, long enough
+# that pages sharing vocabulary but not sentences look different
+SHINGLE_SIZE = 3
+WORD = re.compile(r"\w+")
+DIGITS = re.compile(r"\d+")
+
+# SimHash sums a +1/-1 vote per bit over every feature. Instead of 64
+# additions per feature, each bit's vote count lives in its own
+# COUNT_WIDTH-bit field of one big integer, and SPREAD turns each byte of
+# a feature hash into its fields, so a feature costs eight additions.
+COUNT_WIDTH = 32
+COUNT_MASK = (1 << COUNT_WIDTH) - 1
+SPREAD = [
+    [sum(((value >> bit) & 1) << ((byte * 8 + bit) * COUNT_WIDTH) for bit in range(8))
+     for value in range(256)]
+    for byte in range(FINGERPRINT_BITS // 8)
+]
+
+
+def shingles(text):
+    """
+    Split text into the set of lowercase SHINGLE_SIZE-word shingles.
+
+    Texts shorter than one shingle become a single feature.
+    """
+    words = WORD.findall(text.lower())
+    if len(words) <= SHINGLE_SIZE:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def simhash(features):
+    """
+    64-bit SimHash of a set of string features.
+
+    Similar feature sets get fingerprints a small Hamming distance apart.
+    Features are hashed with blake2b, so fingerprints are the same in
+    every process and run (unlike hash()).
+
+    Returns:
+        The fingerprint, or None if there are no features
+    """
+    s0, s1, s2, s3, s4, s5, s6, s7 = SPREAD
+    total = 0
+    count = 0
+    for feature in features:
+        d = blake2b(feature.encode("utf-8"), digest_size=8).digest()
+        total += (s0[d[0]] + s1[d[1]] + s2[d[2]] + s3[d[3]]
+                  + s4[d[4]] + s5[d[5]] + s6[d[6]] + s7[d[7]])
+        count += 1
+    if not count:
+        return None
+    fingerprint = 0
+    for bit in range(FINGERPRINT_BITS):
+        # Set the bit if most features had it set
+        if ((total >> (bit * COUNT_WIDTH)) & COUNT_MASK) * 2 > count:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def text_fingerprint(text):
+    """SimHash of a page's visible text (None for a page without words)."""
+    return simhash(shingles(text))
+
+
+def hamming_distance(a, b):
+    return (a ^ b).bit_count()
+
+
+@lru_cache(maxsize=65536)
+def url_pattern(url):
+    """
+    Generalize a URL into the pattern its duplicates tend to share.
+
+    Digit runs become {n} and query values are dropped, so
+    /item/12?sort=price&sid=ab and /item/7?sid=cd&sort=name are both
+    host/item/{n}?sid&sort.
+    """
+    parsed = urlsplit(url)
+    pattern = parsed.netloc.lower() + DIGITS.sub("{n}", parsed.path)
+    names = sorted({param.split("=", 1)[0] for param in parsed.query.split("&") if param})
+    if names:
+        pattern += "?" + "&".join(DIGITS.sub("{n}", name) for name in names)
+    return pattern
+
+
+class DuplicateIndex:
+    """
+    Finds stored fingerprints within max_distance bits of a new one.
+
+    Fingerprints are split into max_distance + 1 blocks. Two fingerprints
+    that differ in at most max_distance bits must agree on at least one
+    whole block, so each block value is a hash table key and only
+    fingerprints sharing a block are compared.
+    """
+
+    def __init__(self, max_distance=3):
+        self.max_distance = max_distance
+        blocks = max_distance + 1
+        edges = [FINGERPRINT_BITS * i // blocks for i in range(blocks + 1)]
+        self.blocks = [(start, (1 << (end - start)) - 1) for start, end in zip(edges, edges[1:])]
+        self.tables = [{} for _ in self.blocks]
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def find(self, fingerprint):
+        """Return the value stored with the first near-duplicate, or None."""
+        for (start, mask), table in zip(self.blocks, self.tables):
+            for other, value in table.get((fingerprint >> start) & mask, ()):
+                if hamming_distance(fingerprint, other) <= self.max_distance:
+                    return value
+        return None
+
+    def add(self, fingerprint, value):
+        for (start, mask), table in zip(self.blocks, self.tables):
+            table.setdefault((fingerprint >> start) & mask, []).append((fingerprint, value))
+        self.size += 1
+
+
+class DuplicateDetector:
+    def __init__(self, max_distance=3, demote_after=5, demote_ratio=0.8):
+        """
+        Flag near-duplicate pages and learn which URL patterns produce them.
+
+        A pattern (see url_pattern) is demoted once demote_after of its
+        pages were duplicates and they make up at least demote_ratio of
+        the pattern's pages. The crawler sets URLs matching a demoted
+        pattern aside and only fetches them if the page budget outlasts
+        everything else.
+
+        Args:
+            max_distance: Most fingerprint bits two pages can differ in
+                and still be duplicates
+            demote_after: Duplicates a pattern must produce to be demoted
+            demote_ratio: Fraction of a pattern's pages that must be
+                duplicates
+        """
+        self.index = DuplicateIndex(max_distance)
+        self.demote_after = demote_after
+        self.demote_ratio = demote_ratio
+        # pattern -> [pages, duplicates]
+        self.patterns = {}
+        self.demoted = set()
+        self.pages = 0
+        self.duplicates = 0
+        self.duplicate_bytes = 0
+
+    def check(self, url, fingerprint, body_size=0):
+        """
+        Record a crawled page and look for an earlier page with the same content.
+
+        Args:
+            url: The page URL
+            fingerprint: Its text fingerprint (None: never a duplicate)
+            body_size: Bytes downloaded for it
+
+        Returns:
+            The URL of the earlier near-duplicate, or None
+        """
+        self.pages += 1
+        counts = self.patterns.setdefault(url_pattern(url), [0, 0])
+        counts[0] += 1
+        if fingerprint is None:
+            return None
+
+        duplicate_of = self.index.find(fingerprint)
+        if duplicate_of is None:
+            self.index.add(fingerprint, url)
+            return None
+
+        counts[1] += 1
+        self.duplicates += 1
+        self.duplicate_bytes += body_size
+        pattern = url_pattern(url)
+        if (pattern not in self.demoted and counts[1] >= self.demote_after
+                and counts[1] >= self.demote_ratio * counts[0]):
+            self.demoted.add(pattern)
+            print(f"Demoting URL pattern {pattern}: {counts[1]} of {counts[0]} pages were duplicates")
+        return duplicate_of
+
+    def is_demoted(self, url):
+        """True if url matches a pattern that keeps producing duplicates."""
+        return bool(self.demoted) and url_pattern(url) in self.demoted
+
+    def summary(self, never_fetched=0):
+        """
+        Duplicate counts and what demotion saved.
+
+        Args:
+            never_fetched: Demoted URLs the crawl never got round to
+
+        Returns:
+            Dict with pages, duplicates, duplicate_bytes, demoted_patterns,
+            never_fetched and bytes_saved (never_fetched times the average
+            duplicate's size)
+        """
+        average = self.duplicate_bytes / self.duplicates if self.duplicates else 0
+        return {
+            "pages": self.pages,
+            "duplicates": self.duplicates,
+            "duplicate_bytes": self.duplicate_bytes,
+            "demoted_patterns": sorted(self.demoted),
+            "never_fetched": never_fetched,
+            "bytes_saved": int(never_fetched * average),
+        }
+
+    def print_summary(self, never_fetched=0):
+        summary = self.summary(never_fetched)
+        print(f"\n=== Duplicates ===")
+        print(f"Near-duplicate pages: {summary['duplicates']} of {summary['pages']} "
+              f"({summary['duplicate_bytes']:,} bytes)")
+        for pattern in summary["demoted_patterns"]:
+            print(f"  demoted: {pattern}")
+        if never_fetched:
+            print(f"Demoted URLs never fetched: {never_fetched} "
+                  f"(~{summary['bytes_saved']:,} bytes saved)")
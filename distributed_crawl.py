@@ -0,0 +1,212 @@
+import os
+import time
+import socket
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from async_crawl import AsyncCrawler
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class FrontierCrawler(AsyncCrawler):
+    """
+    AsyncCrawler that takes its work from a shared FrontierBackend.
+
+    Instead of a private visited set and queue, the worker claims batches
+    of URLs from the backend (which deduplicates them and enforces
+    max_pages for every worker), crawls them with the usual worker pool
+    and sends back discovered links and acks in batches. Any number of
+    these can run against one backend, on one machine or many.
+
+    Backend calls run one at a time on a private thread, so a slow
+    database or network round trip never stalls the event loop. Leases
+    on URLs this worker still holds are renewed every half lease_timeout
+    from the event loop; a worker whose loop is blocked for longer than
+    the lease can still lose a page to another worker, which then fetches
+    it again.
+    """
+
+    def __init__(self, base_url, backend, worker_id=None, batch_size=50,
+                 poll_interval=0.5, **options):
+        """
+        Args:
+            base_url: The starting URL (seeded into the backend if new)
+            backend: FrontierBackend shared with the other workers
+            worker_id: Lease owner name (default: hostname:pid)
+            batch_size: URLs claimed per request to the backend
+            poll_interval: Seconds to wait for more work when the frontier
+                is empty but other workers still hold leases
+            **options: Other AsyncCrawler arguments; max_pages is the
+                backend's, and keep_records defaults to False since
+                backend.results() has every worker's pages
+        """
+        options.setdefault("keep_records", False)
+        super().__init__(base_url, **options)
+        self.backend = backend
+        self.worker_id = worker_id or default_worker_id()
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        # Buffered for the next flush to the backend
+        self.discovered = []
+        self.acks = []
+        # URLs leased to this worker and not acked yet
+        self.leases = set()
+        self.renew_due = 0
+        # Backend counts for stats(), refreshed at most every poll_interval
+        self.backend_counts = {}
+        self.counts_due = 0
+        self.backend_executor = ThreadPoolExecutor(max_workers=1)
+        self.progress = asyncio.Event()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await super().__aexit__(exc_type, exc_val, exc_tb)
+        self.backend_executor.shutdown(wait=True)
+
+    async def call_backend(self, method, *args):
+        """Run a blocking backend method on the backend thread."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.backend_executor, method, *args)
+
+    async def enqueue(self, url, normalized_url=None, defer=True, depth=0):
+        """
+        Buffer an in-scope link for the backend, which does the deduplication.
+
+        The backend doesn't store depth, so only url_filter applies here,
+        not max_depth or a crawl strategy. With duplicates, URLs matching a
+        pattern this worker demoted are held back until it has nothing
+        else leased.
+        """
+        if self.url_filter is not None and depth and not self.url_filter.allows(url):
+            return False
+        if normalized_url is None:
+            normalized_url = self.urls.normalize_in_scope(url)
+            if normalized_url is None:
+                return False
+        if defer and self.duplicates is not None and self.duplicates.is_demoted(url):
+            self.deferred.setdefault(normalized_url, (url, depth))
+            return False
+        self.discovered.append((url, normalized_url))
+        return True
+
+    async def crawl_page(self, current_url, normalized_url, depth=0):
+        # robots.txt is checked when a URL is crawled rather than when it is
+        # found, since the backend dedupes first; disallowed URLs are acked
+        # as failed so they are never handed out again
+        if self.scheduler is not None and not await self.scheduler.allowed(current_url):
+            self.pages_disallowed += 1
+            self.add_ack(normalized_url, None)
+            return
+        return await super().crawl_page(current_url, normalized_url, depth)
+
+    def record_page(self, normalized_url, data):
+        super().record_page(normalized_url, data)
+        self.add_ack(normalized_url, data)
+
+    def record_failure(self, normalized_url, kind="error"):
+        super().record_failure(normalized_url, kind)
+        self.add_ack(normalized_url, None)
+
+    def add_ack(self, normalized_url, record):
+        self.acks.append((normalized_url, record))
+        self.progress.set()
+
+    async def flush(self):
+        """Send buffered links, then acks, to the backend."""
+        # Links first: dying in between can repeat a page but never lose its links
+        if self.discovered:
+            discovered, self.discovered = self.discovered, []
+            await self.call_backend(self.backend.add, discovered)
+        if self.acks:
+            acks, self.acks = self.acks, []
+            await self.call_backend(self.backend.ack, acks, self.worker_id)
+            self.leases.difference_update(normalized_url for normalized_url, _ in acks)
+
+    async def refill(self):
+        """Claim another batch when the local queue runs low."""
+        if self.queue.qsize() >= self.max_concurrency:
+            return 0
+        links = await self.call_backend(self.backend.claim, self.worker_id, self.batch_size)
+        if links and not self.leases:
+            self.renew_due = time.monotonic() + self.backend.lease_timeout / 2
+        for url, normalized_url in links:
+            self.queue.put_nowait((url, normalized_url, 0))
+        self.leases.update(normalized_url for _, normalized_url in links)
+        if self.metrics is not None:
+            self.metrics.queue_depth()
+        return len(links)
+
+    async def renew_leases(self):
+        """Renew this worker's leases once half the lease timeout has passed."""
+        if not self.leases or time.monotonic() < self.renew_due:
+            return
+        await self.call_backend(self.backend.renew, self.worker_id, list(self.leases))
+        self.renew_due = time.monotonic() + self.backend.lease_timeout / 2
+
+    async def refresh_counts(self, force=False):
+        """Fetch the backend's counts for stats(), at most every poll_interval."""
+        if force or time.monotonic() >= self.counts_due:
+            self.backend_counts = await self.call_backend(self.backend.counts)
+            self.counts_due = time.monotonic() + self.poll_interval
+
+    def stats(self):
+        stats = super().stats()
+        # Pages found by every worker, not just this one, as of the last refresh
+        stats["pages_found"] = sum(self.backend_counts.values())
+        return stats
+
+    async def crawl(self):
+        """
+        Work on the shared frontier until nothing is queued or leased.
+
+        Returns:
+            page_data for the pages this worker crawled (failed pages only
+            unless keep_records was set); use backend.results() for all
+        """
+        await self.call_backend(self.backend.add,
+                                [(self.base_url, self.urls.normalize(self.base_url))])
+        self.start_workers()
+        try:
+            while True:
+                await self.flush()
+                await self.renew_leases()
+                await self.refresh_counts()
+                claimed = await self.refill()
+                if not claimed and not self.leases:
+                    if self.deferred:
+                        # Out of other work: hand the demoted URLs to the backend
+                        deferred, self.deferred = self.deferred, {}
+                        for normalized_url, (url, depth) in deferred.items():
+                            await self.enqueue(url, normalized_url, defer=False, depth=depth)
+                        continue
+                    if await self.call_backend(self.backend.is_finished):
+                        break
+                    # Others hold leases: wait for their links or expiry
+                    await asyncio.sleep(self.poll_interval)
+                    continue
+                self.progress.clear()
+                try:
+                    await asyncio.wait_for(self.progress.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            await self.stop_workers()
+            await self.flush()
+            await self.refresh_counts(force=True)
+            if self.sink is not None:
+                self.sink.flush()
+        return self.page_data
+
+
+async def crawl_with_frontier(base_url, backend, max_concurrency=5, **options):
+    """
+    Run one FrontierCrawler worker until the shared frontier is drained.
+
+    Returns:
+        (page_data, stats) for this worker
+    """
+    async with FrontierCrawler(base_url, backend, max_concurrency=max_concurrency,
+                               **options) as crawler:
+        page_data = await crawler.crawl()
+        return page_data, crawler.stats()
@@ -0,0 +1,71 @@
+import time
+from email.utils import parsedate_to_datetime
+
+# HTTP statuses worth retrying: timeouts, throttling and transient server errors
+RETRYABLE_STATUSES = (408, 425, 429, 500, 502, 503, 504)
+
+
+def parse_retry_after(value):
+    """
+    Parse a Retry-After header (seconds or an HTTP date).
+
+    Returns:
+        Seconds to wait, or None if the header is missing or malformed
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class FetchError(Exception):
+    """
+    A page could not be fetched.
+
+    kind names the failure class for summaries; retryable says whether
+    trying again later might succeed.
+    """
+
+    kind = "request"
+    retryable = False
+
+
+class FetchTimeoutError(FetchError):
+    kind = "timeout"
+    retryable = True
+
+
+class ConnectError(FetchError):
+    kind = "connect"
+    retryable = True
+
+
+class HTTPStatusError(FetchError):
+    kind = "http_status"
+
+    def __init__(self, status, headers=None):
+        super().__init__(f"HTTP error: {status}")
+        self.status = status
+        self.retryable = status in RETRYABLE_STATUSES
+        self.retry_after = parse_retry_after((headers or {}).get("Retry-After"))
+
+
+class ContentTypeError(FetchError):
+    kind = "content_type"
+
+    def __init__(self, content_type):
+        super().__init__(f"Invalid content type: {content_type}. Expected text/html")
+        self.content_type = content_type
+
+
+class BodyTooLargeError(FetchError):
+    kind = "body_too_large"
+
+    def __init__(self, limit):
+        super().__init__(f"Response body exceeds {limit} bytes")
+        self.limit = limit
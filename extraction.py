@@ -0,0 +1,195 @@
+import re
+import importlib
+import soupsieve
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.etree as lxml_etree
+    import lxml.html as lxml_html
+except ImportError:
+    lxml_etree = lxml_html = None
+
+# Fields PageParser extracts, in report order ("url" is always set)
+PAGE_FIELDS = ("h1", "first_paragraph", "outgoing_links", "image_urls")
+
+XPATH_PREFIX = "xpath:"
+CSS_PREFIX = "css:"
+# lxml refuses str input that declares its own encoding
+XML_DECLARATION = re.compile(r"^\ufeff?\s*<\?xml[^>]*\?>")
+
+
+class ExtractionSpec:
+    def __init__(self, fields=PAGE_FIELDS, selectors=None, extractors=None):
+        """
+        Which fields to extract from each page.
+
+        Only the requested PAGE_FIELDS are computed; the others are left
+        empty ("" or []) so reports keep their columns. When none of the
+        requested fields need the whole page (no links, images or
+        fingerprint), PageParser stops at the tag that completes them.
+
+        Args:
+            fields: PAGE_FIELDS to extract
+            selectors: {name: selector} extra fields, each the stripped
+                text of the selector's first match ("" for none). Selectors
+                are CSS, or XPath with an "xpath:" prefix (needs lxml); an
+                XPath that selects an attribute or string gives its value.
+            extractors: {name: callable(html, page_url)} extra fields
+                computed by custom code. In process parse mode they must
+                be importable module-level functions.
+
+        Raises:
+            ValueError: For an unknown field, a name clash, a bad selector
+                or an XPath selector without lxml installed
+        """
+        unknown = [field for field in fields if field not in PAGE_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields {unknown}. Expected some of {PAGE_FIELDS}")
+        self.fields = frozenset(fields)
+        self.selectors = dict(selectors or {})
+        self.extractors = dict(extractors or {})
+        for name in self.names:
+            if (name == "url" or name in PAGE_FIELDS
+                    or (name in self.selectors and name in self.extractors)):
+                raise ValueError(f"Field name {name!r} is already taken")
+        for name, selector in self.selectors.items():
+            check_selector(name, selector)
+
+    def __repr__(self):
+        return (f"ExtractionSpec(fields={sorted(self.fields)!r}, "
+                f"selectors={self.selectors!r}, extractors={list(self.extractors)!r})")
+
+    @property
+    def names(self):
+        """The selector and extractor field names, in report order."""
+        return tuple(self.selectors) + tuple(self.extractors)
+
+    @property
+    def cache_key(self):
+        """
+        A string naming what this spec extracts, stored with cached records.
+
+        "" for every PAGE_FIELDS field and nothing else, the same as no spec.
+        """
+        if self.fields == frozenset(PAGE_FIELDS) and not self.needs_html:
+            return ""
+        parts = [",".join(field for field in PAGE_FIELDS if field in self.fields)]
+        parts += [f"{name}={selector}" for name, selector in self.selectors.items()]
+        parts += [f"{name}={extractor.__module__}:{extractor.__qualname__}"
+                  for name, extractor in self.extractors.items()]
+        return ";".join(parts)
+
+    @property
+    def needs_html(self):
+        """True when selectors or extractors need the whole HTML document."""
+        return bool(self.selectors or self.extractors)
+
+    def with_fields(self, *fields):
+        """A copy that also extracts fields."""
+        return ExtractionSpec(self.fields.union(fields), self.selectors, self.extractors)
+
+    def extract(self, html, page_url):
+        """
+        Compute the selector and extractor fields of one page.
+
+        The document is parsed at most once per selector kind, and not at
+        all when there are no selectors.
+
+        Returns:
+            {name: value} for every name in names
+        """
+        values = {}
+        soup = tree = None
+        for name, selector in self.selectors.items():
+            if selector.startswith(XPATH_PREFIX):
+                if tree is None:
+                    tree = xpath_tree(html)
+                values[name] = xpath_value(tree, selector[len(XPATH_PREFIX):])
+            else:
+                if soup is None:
+                    soup = BeautifulSoup(html, "html.parser")
+                selector = selector.removeprefix(CSS_PREFIX)
+                match = soup.select_one(selector)
+                values[name] = match.get_text(strip=True) if match is not None else ""
+        for name, extractor in self.extractors.items():
+            values[name] = extractor(html, page_url)
+        return values
+
+
+def check_selector(name, selector):
+    """Raise ValueError if selector is not a valid CSS or XPath selector."""
+    try:
+        if selector.startswith(XPATH_PREFIX):
+            if lxml_etree is None:
+                raise ValueError("XPath selectors need lxml (pip install lxml)")
+            lxml_etree.XPath(selector[len(XPATH_PREFIX):])
+        else:
+            soupsieve.compile(selector.removeprefix(CSS_PREFIX))
+    except (soupsieve.SelectorSyntaxError, SyntaxError) as e:
+        raise ValueError(f"Bad selector for {name!r}: {e}")
+
+
+def xpath_tree(html):
+    """
+    Parse a page for XPath selectors.
+
+    Returns:
+        The lxml tree, or None for a document with no elements (empty or
+        only a comment)
+    """
+    try:
+        return lxml_html.fromstring(XML_DECLARATION.sub("", html, count=1))
+    except lxml_etree.ParserError:
+        return None
+
+
+def xpath_value(tree, expression):
+    """First result of an XPath as a string ("" for none)."""
+    if tree is None:
+        return ""
+    result = tree.xpath(expression)
+    if isinstance(result, list):
+        if not result:
+            return ""
+        result = result[0]
+    if hasattr(result, "text_content"):
+        return result.text_content().strip()
+    return str(result).strip()
+
+
+def parse_fields(text):
+    """Parse a comma-separated --fields value into a tuple of PAGE_FIELDS."""
+    fields = tuple(field.strip() for field in text.split(",") if field.strip())
+    unknown = [field for field in fields if field not in PAGE_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields {unknown}. Expected some of {PAGE_FIELDS}")
+    return fields
+
+
+def parse_selector(text):
+    """Parse a NAME=SELECTOR command-line option into (name, selector)."""
+    name, separator, selector = text.partition("=")
+    if not separator or not name or not selector:
+        raise ValueError(f"Expected NAME=SELECTOR, got {text!r}")
+    return name, selector
+
+
+def load_extractor(text):
+    """
+    Parse a NAME=MODULE:FUNCTION command-line option into (name, function).
+
+    Raises:
+        ValueError: If the option is malformed or the function can't be
+            imported
+    """
+    name, separator, target = text.partition("=")
+    module_name, colon, function_name = target.partition(":")
+    if not separator or not name or not colon or not module_name or not function_name:
+        raise ValueError(f"Expected NAME=MODULE:FUNCTION, got {text!r}")
+    try:
+        function = getattr(importlib.import_module(module_name), function_name)
+    except (ImportError, AttributeError) as e:
+        raise ValueError(f"Can't load {target}: {e}")
+    if not callable(function):
+        raise ValueError(f"{target} is not callable")
+    return name, function
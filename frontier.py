@@ -0,0 +1,177 @@
+import re
+import asyncio
+from heapq import heappush, heappop
+from itertools import count
+from collections import deque
+
+# bfs: shallowest first; dfs: deepest first (bound it with max_depth);
+# score: highest URLScorer score first
+STRATEGIES = ("bfs", "dfs", "score")
+
+
+class URLFilter:
+    """Include/exclude regular expressions for discovered links."""
+
+    def __init__(self, include=(), exclude=()):
+        """
+        Args:
+            include: Patterns of which a link must match at least one
+                (none: every link is included)
+            exclude: Patterns a link must not match
+        """
+        self.include = [re.compile(pattern) for pattern in include]
+        self.exclude = [re.compile(pattern) for pattern in exclude]
+
+    def allows(self, url):
+        if self.include and not any(pattern.search(url) for pattern in self.include):
+            return False
+        return not any(pattern.search(url) for pattern in self.exclude)
+
+
+class URLScorer:
+    def __init__(self, rules=(), inlink_weight=1.0, depth_weight=1.0):
+        """
+        Score URLs for the "score" strategy; higher scores are crawled first.
+
+        score = sum of matching rule weights
+                + inlink_weight * links found to the URL so far
+                - depth_weight * depth
+                + any boost() for the URL
+
+        Args:
+            rules: (regex, weight) pairs matched against the URL
+            inlink_weight: Score per link to the URL found while it waits
+            depth_weight: Score taken off per level below the start page
+        """
+        self.rules = [(re.compile(pattern), weight) for pattern, weight in rules]
+        self.inlink_weight = inlink_weight
+        self.depth_weight = depth_weight
+        # normalized_url -> extra score, e.g. from a sitemap's <priority>
+        self.boosts = {}
+
+    def boost(self, normalized_url, amount):
+        self.boosts[normalized_url] = self.boosts.get(normalized_url, 0) + amount
+
+    def score(self, url, normalized_url, depth, inlinks):
+        score = inlinks * self.inlink_weight - depth * self.depth_weight
+        for pattern, weight in self.rules:
+            if pattern.search(url):
+                score += weight
+        if self.boosts:
+            score += self.boosts.get(normalized_url, 0)
+        return score
+
+
+def parse_score_rule(text):
+    """Parse a REGEX=WEIGHT command-line rule into (regex, weight)."""
+    pattern, separator, weight = text.rpartition("=")
+    if not separator or not pattern:
+        raise ValueError(f"Expected REGEX=WEIGHT, got {text!r}")
+    return pattern, float(weight)
+
+
+class PriorityFrontier(asyncio.Queue):
+    """
+    Heap-ordered frontier with round-robin turns between hosts.
+
+    A drop-in for the crawler's asyncio.Queue of (url, normalized_url,
+    depth) items: get/put/task_done/join behave the same, only the order
+    changes. Each host has its own heap, ordered by the strategy, and
+    hosts take turns, so one host with thousands of queued URLs can't
+    starve the others.
+
+    With the "score" strategy, every link found to a URL that is still
+    queued (see link_found) raises its inlink count and re-files it; the
+    old heap entry is left in place and skipped when it surfaces.
+    """
+
+    def __init__(self, strategy="bfs", scorer=None):
+        """
+        Args:
+            strategy: One of STRATEGIES
+            scorer: URLScorer for the "score" strategy (default: URLScorer())
+        """
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown strategy: {strategy}. Expected one of {STRATEGIES}")
+        self.strategy = strategy
+        self.scorer = scorer if scorer is not None else URLScorer()
+        super().__init__()
+
+    # asyncio.Queue storage hooks (as in asyncio.PriorityQueue)
+
+    def _init(self, maxsize):
+        # host -> heap of [key, sequence, item]; item is None once superseded
+        self.heaps = {}
+        # Live entries per host; a host is in turns while it has any
+        self.live = {}
+        self.turns = deque()
+        self.size = 0
+        self.sequence = count()
+        # normalized_url -> (live entry, inlinks), score strategy only
+        self.entries = {}
+
+    def qsize(self):
+        return self.size
+
+    def empty(self):
+        return not self.size
+
+    def _put(self, item, inlinks=1):
+        # The link that queued a URL counts as its first inlink
+        url, normalized_url, depth = item
+        if self.strategy == "bfs":
+            key = depth
+        elif self.strategy == "dfs":
+            key = -depth
+        else:
+            key = -self.scorer.score(url, normalized_url, depth, inlinks)
+        entry = [key, next(self.sequence), item]
+        if self.strategy == "score":
+            self.entries[normalized_url] = (entry, inlinks)
+
+        # Normalized URLs start with the host
+        host = normalized_url.partition("/")[0]
+        heap = self.heaps.get(host)
+        if heap is None:
+            heap = self.heaps[host] = []
+            self.live[host] = 0
+            self.turns.append(host)
+        heappush(heap, entry)
+        self.live[host] += 1
+        self.size += 1
+
+    def _get(self):
+        host = self.turns.popleft()
+        heap = self.heaps[host]
+        entry = heappop(heap)
+        while entry[2] is None:
+            entry = heappop(heap)
+        self.live[host] -= 1
+        if self.live[host]:
+            self.turns.append(host)
+        else:
+            # Only superseded entries are left
+            del self.heaps[host], self.live[host]
+        self.size -= 1
+        item = entry[2]
+        if self.strategy == "score":
+            del self.entries[item[1]]
+        return item
+
+    def link_found(self, normalized_url):
+        """
+        Count another link to an already-seen URL.
+
+        Raises the URL's score if it is still queued; does nothing for
+        URLs already taken off the frontier, or for other strategies.
+        """
+        current = self.entries.get(normalized_url)
+        if current is None:
+            return
+        entry, inlinks = current
+        item = entry[2]
+        entry[2] = None
+        host = normalized_url.partition("/")[0]
+        self.live[host] -= 1
+        self.size -= 1
+        self._put(item, inlinks + 1)
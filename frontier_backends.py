@@ -0,0 +1,438 @@
+import json
+import time
+import sqlite3
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+# URL states in SqliteFrontier
+PENDING = 0
+LEASED = 1
+DONE = 2
+FAILED = 3
+
+
+class FrontierBackend:
+    """
+    A frontier and visited set shared by crawler processes.
+
+    Workers claim batches of URLs under a lease and ack each one with its
+    result. A lease that runs out before the ack (the worker died or
+    stalled) puts the URL back on the frontier for another worker.
+    Subclasses implement the storage.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def add(self, links):
+        """
+        Queue links that have never been seen, up to max_pages in total.
+
+        Args:
+            links: Iterable of (url, normalized_url)
+
+        Returns:
+            Number of links queued
+        """
+        raise NotImplementedError
+
+    def claim(self, worker_id, count):
+        """
+        Lease up to count queued URLs to a worker.
+
+        Returns:
+            List of (url, normalized_url)
+        """
+        raise NotImplementedError
+
+    def ack(self, results, worker_id=None):
+        """
+        Finish leased URLs.
+
+        Args:
+            results: Iterable of (normalized_url, record); a record of None
+                marks the page as failed
+            worker_id: The acking worker. URLs now leased to a different
+                worker (this one's lease ran out and was re-claimed) are
+                left for that worker to finish. None skips the check.
+        """
+        raise NotImplementedError
+
+    def renew(self, worker_id, normalized_urls):
+        """
+        Extend the leases a worker still holds by another lease_timeout.
+
+        URLs that went back on the frontier or are leased to another
+        worker are left alone.
+        """
+        raise NotImplementedError
+
+    def is_finished(self):
+        """True when nothing is queued or leased."""
+        raise NotImplementedError
+
+    def results(self):
+        """Return {normalized_url: record or None} for every finished URL."""
+        raise NotImplementedError
+
+    def counts(self):
+        """Return {"pending", "leased", "done", "failed"} URL counts."""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class SqliteFrontier(FrontierBackend):
+    """
+    Frontier in a SQLite file (WAL mode), shared by processes on one machine
+    or over a file system with working locks.
+
+    Each add/claim/ack is one short IMMEDIATE transaction, so concurrent
+    workers serialize on the write lock instead of racing.
+    """
+
+    def __init__(self, path, lease_timeout=60.0, max_pages=None):
+        self.path = path
+        self.lease_timeout = lease_timeout
+        self.max_pages = max_pages
+        self.reclaimed = 0
+
+        # Autocommit mode: transactions are opened explicitly below.
+        # FrontierCrawler calls the backend from a worker thread.
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None,
+                                    check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS urls (
+                normalized_url TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                state INTEGER NOT NULL,
+                owner TEXT,
+                expires REAL,
+                record TEXT
+            );
+            CREATE INDEX IF NOT EXISTS urls_state ON urls (state, expires);
+            INSERT OR IGNORE INTO meta (key, value) VALUES ('admitted', 0);
+        """)
+
+    def transaction(self):
+        return SqliteTransaction(self.conn)
+
+    def add(self, links):
+        links = list(links)
+        if not links:
+            return 0
+        with self.transaction():
+            admitted = self.conn.execute(
+                "SELECT value FROM meta WHERE key = 'admitted'"
+            ).fetchone()[0]
+            added = 0
+            for url, normalized_url in links:
+                if self.max_pages is not None and admitted + added >= self.max_pages:
+                    break
+                cursor = self.conn.execute(
+                    "INSERT OR IGNORE INTO urls (normalized_url, url, state) VALUES (?, ?, ?)",
+                    (normalized_url, url, PENDING),
+                )
+                added += cursor.rowcount
+            self.conn.execute(
+                "UPDATE meta SET value = value + ? WHERE key = 'admitted'", (added,)
+            )
+        return added
+
+    def claim(self, worker_id, count):
+        now = time.time()
+        with self.transaction():
+            cursor = self.conn.execute(
+                "UPDATE urls SET state = ?, owner = NULL WHERE state = ? AND expires < ?",
+                (PENDING, LEASED, now),
+            )
+            self.reclaimed += cursor.rowcount
+            rows = self.conn.execute(
+                "SELECT rowid, url, normalized_url FROM urls WHERE state = ? "
+                "ORDER BY rowid LIMIT ?",
+                (PENDING, count),
+            ).fetchall()
+            self.conn.executemany(
+                "UPDATE urls SET state = ?, owner = ?, expires = ? WHERE rowid = ?",
+                [(LEASED, worker_id, now + self.lease_timeout, rowid) for rowid, _, _ in rows],
+            )
+        return [(url, normalized_url) for _, url, normalized_url in rows]
+
+    def ack(self, results, worker_id=None):
+        rows = [
+            (DONE if record is not None else FAILED,
+             json.dumps(record, ensure_ascii=False) if record is not None else None,
+             normalized_url, worker_id, worker_id)
+            for normalized_url, record in results
+        ]
+        if not rows:
+            return
+        with self.transaction():
+            self.conn.executemany(
+                "UPDATE urls SET state = ?, record = ?, owner = NULL, expires = NULL "
+                "WHERE normalized_url = ? AND (? IS NULL OR owner IS NULL OR owner = ?)",
+                rows,
+            )
+
+    def renew(self, worker_id, normalized_urls):
+        expires = time.time() + self.lease_timeout
+        rows = [(expires, normalized_url, LEASED, worker_id) for normalized_url in normalized_urls]
+        if not rows:
+            return
+        with self.transaction():
+            self.conn.executemany(
+                "UPDATE urls SET expires = ? WHERE normalized_url = ? AND state = ? AND owner = ?",
+                rows,
+            )
+
+    def is_finished(self):
+        row = self.conn.execute(
+            "SELECT 1 FROM urls WHERE state IN (?, ?) LIMIT 1", (PENDING, LEASED)
+        ).fetchone()
+        return row is None
+
+    def results(self):
+        rows = self.conn.execute(
+            "SELECT normalized_url, record FROM urls WHERE state IN (?, ?) ORDER BY rowid",
+            (DONE, FAILED),
+        )
+        return {
+            normalized_url: json.loads(record) if record is not None else None
+            for normalized_url, record in rows
+        }
+
+    def counts(self):
+        counts = dict.fromkeys(("pending", "leased", "done", "failed"), 0)
+        names = {PENDING: "pending", LEASED: "leased", DONE: "done", FAILED: "failed"}
+        for state, count in self.conn.execute("SELECT state, COUNT(*) FROM urls GROUP BY state"):
+            counts[names[state]] = count
+        return counts
+
+    def close(self):
+        if self.conn is None:
+            return
+        self.conn.close()
+        self.conn = None
+
+
+class SqliteTransaction:
+    """BEGIN IMMEDIATE ... COMMIT (ROLLBACK on error) on an autocommit connection."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.conn.execute("ROLLBACK" if exc_type is not None else "COMMIT")
+
+
+class RedisFrontier(FrontierBackend):
+    """
+    Frontier in Redis, shared by crawler processes on any number of machines.
+
+    Keys (under prefix):
+        urls     HASH of normalized URL -> URL for every URL ever queued
+                 (the visited set)
+        admitted counter of queued URLs, for max_pages
+        pending  LIST of queued normalized URLs
+        leases   ZSET of leased normalized URLs scored by lease expiry
+        owners   HASH of leased normalized URL -> worker ID
+        results  HASH of normalized URL -> record JSON ("null" if failed)
+
+    Claims, acks, renewals and reclaims each run as one WATCH/MULTI/EXEC
+    transaction, so a URL is always either pending, leased or finished: a
+    worker that dies mid-claim loses nothing, and is_finished never sees
+    a URL in flight between the structures.
+
+    Works with any redis-py compatible client, e.g. fakeredis in tests.
+    """
+
+    KEYS = ("urls", "admitted", "pending", "leases", "owners", "results")
+
+    def __init__(self, client, prefix="webcrawler", lease_timeout=60.0, max_pages=None):
+        self.client = client
+        self.prefix = prefix
+        self.lease_timeout = lease_timeout
+        self.max_pages = max_pages
+        self.reclaimed = 0
+
+    @classmethod
+    def from_url(cls, url, **options):
+        """Connect to a redis:// URL (needs the redis package)."""
+        if redis is None:
+            raise ImportError("The redis frontier needs the redis package: pip install redis")
+        return cls(redis.Redis.from_url(url, decode_responses=True), **options)
+
+    def key(self, name):
+        return f"{self.prefix}:{name}"
+
+    def add(self, links):
+        links = list(links)
+        if not links:
+            return 0
+        pipe = self.client.pipeline()
+        for url, normalized_url in links:
+            pipe.hsetnx(self.key("urls"), normalized_url, url)
+        new = [normalized_url for (_, normalized_url), added in zip(links, pipe.execute()) if added]
+        if not new:
+            return 0
+
+        if self.max_pages is not None:
+            # Reserve slots atomically; URLs past the limit stay seen but
+            # are never queued, as with AsyncCrawler past max_pages
+            admitted = self.client.incrby(self.key("admitted"), len(new))
+            over = admitted - self.max_pages
+            if over > 0:
+                new = new[:max(0, len(new) - over)]
+            if not new:
+                return 0
+        self.client.rpush(self.key("pending"), *new)
+        return len(new)
+
+    def reclaim_expired(self, now):
+        """Put URLs whose lease has run out back on the frontier."""
+        def requeue(pipe):
+            expired = [as_text(value) for value in
+                       pipe.zrangebyscore(self.key("leases"), "-inf", now)]
+            pipe.multi()
+            if expired:
+                pipe.zrem(self.key("leases"), *expired)
+                pipe.hdel(self.key("owners"), *expired)
+                pipe.lpush(self.key("pending"), *expired)
+            return len(expired)
+
+        # Retried if another worker changes the leases in between, so only
+        # one of them requeues each URL
+        self.reclaimed += self.client.transaction(requeue, self.key("leases"),
+                                                  value_from_callable=True)
+
+    def claim(self, worker_id, count):
+        now = time.time()
+        self.reclaim_expired(now)
+
+        def lease(pipe):
+            claimed = [as_text(value) for value in
+                       pipe.lrange(self.key("pending"), 0, count - 1)]
+            urls = pipe.hmget(self.key("urls"), claimed) if claimed else []
+            pipe.multi()
+            if claimed:
+                pipe.ltrim(self.key("pending"), len(claimed), -1)
+                pipe.zadd(self.key("leases"), {normalized_url: now + self.lease_timeout
+                                               for normalized_url in claimed})
+                pipe.hset(self.key("owners"), mapping=dict.fromkeys(claimed, worker_id))
+            return [(as_text(url), normalized_url) for url, normalized_url in zip(urls, claimed)]
+
+        return self.client.transaction(lease, self.key("pending"), value_from_callable=True)
+
+    def owned(self, pipe, normalized_urls, worker_id):
+        """The URLs not leased to a worker other than worker_id (None: all of them)."""
+        if worker_id is None:
+            return normalized_urls
+        owners = pipe.hmget(self.key("owners"), normalized_urls)
+        return [normalized_url for normalized_url, owner in zip(normalized_urls, owners)
+                if owner is None or as_text(owner) == worker_id]
+
+    def ack(self, results, worker_id=None):
+        results = dict(results)
+        if not results:
+            return
+
+        def finish(pipe):
+            mine = self.owned(pipe, list(results), worker_id)
+            pipe.multi()
+            if mine:
+                pipe.hset(self.key("results"), mapping={
+                    normalized_url: json.dumps(results[normalized_url], ensure_ascii=False)
+                    for normalized_url in mine
+                })
+                pipe.zrem(self.key("leases"), *mine)
+                pipe.hdel(self.key("owners"), *mine)
+
+        self.client.transaction(finish, self.key("owners"))
+
+    def renew(self, worker_id, normalized_urls):
+        normalized_urls = list(normalized_urls)
+        if not normalized_urls:
+            return
+
+        def extend(pipe):
+            owners = pipe.hmget(self.key("owners"), normalized_urls)
+            mine = [normalized_url for normalized_url, owner in zip(normalized_urls, owners)
+                    if owner is not None and as_text(owner) == worker_id]
+            pipe.multi()
+            if mine:
+                expires = time.time() + self.lease_timeout
+                pipe.zadd(self.key("leases"), dict.fromkeys(mine, expires), xx=True)
+
+        self.client.transaction(extend, self.key("owners"))
+
+    def is_finished(self):
+        pipe = self.client.pipeline()
+        pipe.llen(self.key("pending"))
+        pipe.zcard(self.key("leases"))
+        pending, leased = pipe.execute()
+        return pending == 0 and leased == 0
+
+    def results(self):
+        return {
+            as_text(normalized_url): json.loads(record)
+            for normalized_url, record in self.client.hgetall(self.key("results")).items()
+        }
+
+    def counts(self):
+        pipe = self.client.pipeline()
+        pipe.llen(self.key("pending"))
+        pipe.zcard(self.key("leases"))
+        pipe.hvals(self.key("results"))
+        pending, leased, records = pipe.execute()
+        failed = sum(1 for record in records if as_text(record) == "null")
+        return {"pending": pending, "leased": leased,
+                "done": len(records) - failed, "failed": failed}
+
+    def clear(self):
+        """Delete all of this frontier's keys."""
+        self.client.delete(*(self.key(name) for name in self.KEYS))
+
+    def close(self):
+        self.client.close()
+
+
+def as_text(value):
+    """Redis clients return bytes unless decode_responses is set."""
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+def open_frontier(spec, lease_timeout=60.0, max_pages=None):
+    """
+    Open a frontier backend from a command-line spec.
+
+    Args:
+        spec: "redis://host:port/db" for Redis, otherwise a SQLite file path
+            (optionally prefixed with "sqlite:")
+        lease_timeout: Seconds a claimed URL stays leased without an ack
+        max_pages: Maximum URLs ever queued
+
+    Returns:
+        A FrontierBackend
+    """
+    if spec.startswith(("redis://", "rediss://", "unix://")):
+        return RedisFrontier.from_url(spec, lease_timeout=lease_timeout, max_pages=max_pages)
+    if spec.startswith("sqlite:"):
+        spec = spec[len("sqlite:"):]
+    return SqliteFrontier(spec, lease_timeout=lease_timeout, max_pages=max_pages)
@@ -0,0 +1,163 @@
+import json
+import time
+import sqlite3
+
+
+class CacheEntry:
+    """A cached page: its validators and the record extracted from it."""
+
+    def __init__(self, etag, last_modified, record, body_size, fetched_at=0.0):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.record = record
+        self.body_size = body_size
+        self.fetched_at = fetched_at
+
+    def unchanged_since(self, lastmod):
+        """True if a sitemap lastmod (epoch seconds or None) predates this copy."""
+        return lastmod is not None and lastmod <= self.fetched_at
+
+    def conditional_headers(self):
+        """Headers that make the next request conditional on a change."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """
+    On-disk cache for conditional-GET recrawls, keyed by normalized URL.
+
+    Stores each page's ETag/Last-Modified and its extracted record, so a
+    304 Not Modified reuses the record (links included) without downloading
+    or parsing the page. Writes are batched like CheckpointStore's.
+
+    Each record is stored with the key of the ExtractionSpec that built
+    it (see ExtractionSpec.cache_key); a lookup with a different key is a
+    miss, so a record missing fields or links is never reused for a crawl
+    that wants them.
+    """
+
+    def __init__(self, path, batch_size=500):
+        self.path = path
+        self.batch_size = batch_size
+        self.rows = []
+        self.requests = 0
+        self.hits = 0
+        # Pages reused without a request because a sitemap lastmod said so
+        self.sitemap_skips = 0
+        self.bytes_saved = 0
+
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                normalized_url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                record TEXT NOT NULL,
+                body_size INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                extraction TEXT NOT NULL
+            )
+        """)
+        self.conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def get(self, normalized_url, extraction=""):
+        """
+        Look up a cached page.
+
+        Args:
+            normalized_url: The page's normalized URL
+            extraction: Cache key of the ExtractionSpec the crawl uses for
+                this page ("" for every field)
+
+        Returns:
+            CacheEntry, or None if the page has never been cached or its
+            record was extracted differently
+        """
+        row = self.conn.execute(
+            "SELECT etag, last_modified, record, body_size, fetched_at, extraction "
+            "FROM responses WHERE normalized_url = ?",
+            (normalized_url,),
+        ).fetchone()
+        if row is None or row[5] != extraction:
+            return None
+        etag, last_modified, record, body_size, fetched_at, _ = row
+        return CacheEntry(etag, last_modified, json.loads(record), body_size, fetched_at)
+
+    def store(self, normalized_url, headers, record, body_size, always=False, extraction=""):
+        """
+        Cache a freshly fetched page if the server gave us validators.
+
+        Args:
+            normalized_url: The page's normalized URL
+            headers: Response headers
+            record: Page data dictionary extracted from the body
+            body_size: Size of the downloaded body in bytes
+            always: Cache it even without validators (pages listed in a
+                sitemap with lastmod can be skipped on the next crawl)
+            extraction: Cache key of the ExtractionSpec that built record
+        """
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        if not etag and not last_modified and not always:
+            return
+        self.rows.append((
+            normalized_url, etag, last_modified,
+            json.dumps(record, ensure_ascii=False), body_size, time.time(), extraction,
+        ))
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def record_request(self, entry, not_modified):
+        """
+        Count a request and, for a 304, the bytes it avoided.
+
+        Args:
+            entry: The CacheEntry the request was conditional on, or None
+            not_modified: True if the server answered 304
+        """
+        self.requests += 1
+        if not_modified and entry is not None:
+            self.hits += 1
+            self.bytes_saved += entry.body_size
+
+    def record_skip(self, entry):
+        """Count a page reused from entry without any request."""
+        self.sitemap_skips += 1
+        self.bytes_saved += entry.body_size
+
+    def hit_ratio(self):
+        return self.hits / self.requests if self.requests else 0.0
+
+    def flush(self):
+        """Commit buffered entries in one transaction."""
+        if not self.rows:
+            return
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO responses "
+                "(normalized_url, etag, last_modified, record, body_size, fetched_at, extraction) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                self.rows,
+            )
+        self.rows = []
+
+    def close(self):
+        """Flush buffered entries and close the database."""
+        if self.conn is None:
+            return
+        self.flush()
+        self.conn.close()
+        self.conn = None
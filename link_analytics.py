@@ -0,0 +1,254 @@
+from array import array
+from collections import deque
+from collections.abc import Mapping
+from urlnorm import URLNormalizer
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Report columns added by annotate_pages, in order
+ANALYTICS_FIELDS = ("pagerank", "in_degree", "out_degree", "depth", "orphan", "broken_links")
+
+DEFAULT_DAMPING = 0.85
+
+
+class LinkGraph:
+    def __init__(self, page_data, normalizer=None):
+        """
+        Internal link graph of a finished crawl.
+
+        Nodes are page_data's keys (failed pages included); there is an
+        edge from each crawled page to every other page_data key its links
+        normalize to, once per target. Edges are CSR arrays: the targets
+        of node i are targets[offsets[i]:offsets[i + 1]].
+
+        Args:
+            page_data: Crawl results keyed by normalized URL (None for
+                failed pages)
+            normalizer: URLNormalizer that made the keys (default:
+                URLNormalizer())
+        """
+        normalize = (normalizer if normalizer is not None else URLNormalizer()).normalize
+        self.keys = list(page_data)
+        self.index = index = {key: node for node, key in enumerate(self.keys)}
+        self.offsets = array("Q", [0])
+        self.targets = array("I")
+        # 1 for pages that were crawled, 0 for failed ones
+        self.crawled = bytearray(page is not None for page in page_data.values())
+        # (page URL, link URL) for links to pages that failed
+        self.broken = []
+        self.broken_counts = array("I", bytes(4 * len(self.keys)))
+        targets = self.targets
+        for node, key in enumerate(self.keys):
+            page = page_data[key]
+            if page is not None:
+                seen = set()
+                for link in page["outgoing_links"]:
+                    target = index.get(normalize(link))
+                    if target is None or target == node or target in seen:
+                        continue
+                    seen.add(target)
+                    targets.append(target)
+                    if page_data[self.keys[target]] is None:
+                        self.broken.append((page["url"], link))
+                        self.broken_counts[node] += 1
+            self.offsets.append(len(targets))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def out_degrees(self):
+        offsets = self.offsets
+        return [offsets[node + 1] - offsets[node] for node in range(len(self.keys))]
+
+    def in_degrees(self):
+        if np is not None:
+            targets = np.frombuffer(self.targets, dtype=np.uint32)
+            return np.bincount(targets, minlength=len(self.keys)).tolist()
+        degrees = [0] * len(self.keys)
+        for target in self.targets:
+            degrees[target] += 1
+        return degrees
+
+    def depths(self, start_key):
+        """
+        Fewest clicks from start_key to each page (None if unreachable).
+        """
+        depths = [None] * len(self.keys)
+        start = self.index.get(start_key)
+        if start is None:
+            return depths
+        depths[start] = 0
+        pending = deque([start])
+        offsets = self.offsets
+        targets = self.targets
+        while pending:
+            node = pending.popleft()
+            depth = depths[node] + 1
+            for target in targets[offsets[node]:offsets[node + 1]]:
+                if depths[target] is None:
+                    depths[target] = depth
+                    pending.append(target)
+        return depths
+
+    def pagerank(self, damping=DEFAULT_DAMPING, tolerance=1e-9, max_iterations=100):
+        """
+        PageRank of every node by power iteration.
+
+        Rank from pages without outgoing links is spread evenly over all
+        pages. Uses NumPy when it is installed, plain Python otherwise.
+
+        Returns:
+            List of ranks summing to 1, indexed like keys
+        """
+        if not self.keys:
+            return []
+        if np is not None:
+            return self.pagerank_numpy(damping, tolerance, max_iterations)
+        count = len(self.keys)
+        out_degrees = self.out_degrees()
+        offsets = self.offsets
+        targets = self.targets
+        ranks = [1.0 / count] * count
+        for _ in range(max_iterations):
+            dangling = sum(rank for rank, degree in zip(ranks, out_degrees) if not degree)
+            base = (1.0 - damping + damping * dangling) / count
+            new_ranks = [base] * count
+            for node in range(count):
+                degree = out_degrees[node]
+                if degree:
+                    share = damping * ranks[node] / degree
+                    for target in targets[offsets[node]:offsets[node + 1]]:
+                        new_ranks[target] += share
+            change = sum(abs(new - old) for new, old in zip(new_ranks, ranks))
+            ranks = new_ranks
+            if change < tolerance:
+                break
+        return ranks
+
+    def pagerank_numpy(self, damping, tolerance, max_iterations):
+        count = len(self.keys)
+        offsets = np.frombuffer(self.offsets, dtype=np.uint64).astype(np.int64)
+        targets = np.frombuffer(self.targets, dtype=np.uint32).astype(np.int64)
+        out_degrees = np.diff(offsets)
+        # Source node of every edge, to go with targets
+        sources = np.repeat(np.arange(count), out_degrees)
+        dangling = out_degrees == 0
+        weights = np.zeros(count)
+        weights[~dangling] = damping / out_degrees[~dangling]
+        ranks = np.full(count, 1.0 / count)
+        for _ in range(max_iterations):
+            base = (1.0 - damping + damping * ranks[dangling].sum()) / count
+            new_ranks = np.bincount(targets, weights=(ranks * weights)[sources],
+                                    minlength=count) + base
+            change = np.abs(new_ranks - ranks).sum()
+            ranks = new_ranks
+            if change < tolerance:
+                break
+        return ranks.tolist()
+
+
+class LinkAnalytics:
+    def __init__(self, page_data, base_url, normalizer=None, damping=DEFAULT_DAMPING):
+        """
+        Link-graph metrics for every page of a finished crawl.
+
+        Args:
+            page_data: Crawl results keyed by normalized URL
+            base_url: The crawl's start page; depth counts clicks from it
+                and it is never an orphan
+            normalizer: URLNormalizer that made the keys (default:
+                URLNormalizer(base_url))
+            damping: PageRank damping factor
+        """
+        normalizer = normalizer if normalizer is not None else URLNormalizer(base_url)
+        self.graph = LinkGraph(page_data, normalizer)
+        self.start_key = normalizer.normalize(base_url)
+        self.pagerank = self.graph.pagerank(damping)
+        self.in_degree = self.graph.in_degrees()
+        self.out_degree = self.graph.out_degrees()
+        self.depth = self.graph.depths(self.start_key)
+
+    @property
+    def broken_links(self):
+        """(page URL, link URL) for every link to a page that failed."""
+        return self.graph.broken
+
+    def orphans(self):
+        """Crawled pages no other crawled page links to, e.g. ones only a sitemap listed."""
+        crawled = self.graph.crawled
+        return [key for node, key in enumerate(self.graph.keys)
+                if crawled[node] and not self.in_degree[node] and key != self.start_key]
+
+    def columns(self, key):
+        """
+        The ANALYTICS_FIELDS values for one page.
+
+        depth is None for pages the start page doesn't lead to; CSV
+        reports leave it empty.
+        """
+        node = self.graph.index[key]
+        return {
+            "pagerank": round(self.pagerank[node], 8),
+            "in_degree": self.in_degree[node],
+            "out_degree": self.out_degree[node],
+            "depth": self.depth[node],
+            "orphan": not self.in_degree[node] and key != self.start_key,
+            "broken_links": self.graph.broken_counts[node],
+        }
+
+    def top_pages(self, count=10):
+        """The count highest-PageRank crawled pages as (key, rank) pairs."""
+        crawled = self.graph.crawled
+        ranked = sorted((node for node in range(len(self.graph)) if crawled[node]),
+                        key=self.pagerank.__getitem__, reverse=True)
+        return [(self.graph.keys[node], self.pagerank[node]) for node in ranked[:count]]
+
+    def print_summary(self, count=10):
+        """Print the top pages, orphan count and broken links."""
+        print(f"\n=== Link Analytics ===")
+        print(f"Internal links: {len(self.graph.targets)}")
+        print(f"Top pages by PageRank:")
+        for key, rank in self.top_pages(count):
+            print(f"  {rank:.4f}  {key}")
+        print(f"Orphan pages: {len(self.orphans())}")
+        print(f"Broken links: {len(self.broken_links)}")
+        for source, link in self.broken_links[:count]:
+            print(f"  {source} -> {link}")
+        if len(self.broken_links) > count:
+            print(f"  ... and {len(self.broken_links) - count} more")
+
+
+class AnnotatedPages(Mapping):
+    """
+    page_data with the analytics columns merged into each page as it is
+    read, so writing the report doesn't need a second copy of every page.
+    """
+
+    def __init__(self, page_data, analytics):
+        self.page_data = page_data
+        self.analytics = analytics
+
+    def __getitem__(self, key):
+        page = self.page_data[key]
+        if page is None:
+            return None
+        return {**page, **self.analytics.columns(key)}
+
+    def __iter__(self):
+        return iter(self.page_data)
+
+    def __len__(self):
+        return len(self.page_data)
+
+
+def annotate_pages(page_data, analytics):
+    """
+    Add the ANALYTICS_FIELDS to each page for write_report's extra_fields.
+
+    Returns:
+        A read-only mapping like page_data
+    """
+    return AnnotatedPages(page_data, analytics)
@@ -1,7 +1,417 @@
+import os
 import sys
 import asyncio
-from async_crawl import crawl_site_async
-from csv_report import write_csv_report
+import argparse
+from collections import Counter
+from async_crawl import AsyncCrawler, PARSE_MODES
+from batch_crawl import BatchCrawler, read_seeds, write_sites_summary
+from sharded_crawl import crawl_site_sharded, PARTITIONS
+from distributed_crawl import FrontierCrawler
+from frontier_backends import open_frontier
+from visited import VISITED_KINDS, create_visited_set
+from checkpoint import CheckpointStore
+from http_cache import ResponseCache
+from politeness import PolitenessScheduler
+from transport import TransportConfig, DEFAULT_USER_AGENT
+from body import DEFAULT_MAX_BODY_SIZE
+from retry import RetryPolicy
+from report_sinks import open_report_sink, write_report
+from columnar_report import PARQUET_AVAILABLE
+from urlnorm import URLNormalizer
+from metrics import CrawlMetrics, start_metrics_server
+from dedup import DuplicateDetector
+from page_store import PageStore
+from link_analytics import LinkAnalytics, ANALYTICS_FIELDS, annotate_pages
+from frontier import STRATEGIES, URLFilter, URLScorer, parse_score_rule
+from extraction import ExtractionSpec, PAGE_FIELDS, parse_fields, parse_selector, load_extractor
+
+
+def parse_args(argv):
+    """
+    Parse command-line arguments.
+
+    Keeps the original positional form (URL [max_concurrency] [max_pages])
+    and adds optional flags for tuning. With --seeds the URL is left out
+    and the numbers are per-site defaults.
+    """
+    parser = argparse.ArgumentParser(
+        usage="uv run main.py URL [max_concurrency] [max_pages] [options]\n"
+              "       uv run main.py --seeds FILE [max_concurrency] [max_pages] [options]",
+        epilog="Example: uv run main.py https://example.com 5 100",
+    )
+    parser.add_argument("base_url", metavar="URL", nargs="?", help="Starting URL to crawl")
+    parser.add_argument("max_concurrency", nargs="?", type=int, default=None,
+                        help="Maximum concurrent HTTP requests (default: 5)")
+    parser.add_argument("max_pages", nargs="?", type=int, default=None,
+                        help="Maximum number of pages to crawl (default: 100)")
+    parser.add_argument("--parse-mode", choices=PARSE_MODES, default="inline",
+                        help="Where HTML is parsed (default: inline)")
+    parser.add_argument("--parse-workers", type=int, default=None,
+                        help="Parse pool size for thread/process modes")
+    parser.add_argument("--visited", choices=VISITED_KINDS, default="set",
+                        help="Visited-set backend: exact strings, 64-bit fingerprints "
+                             "or a scalable Bloom filter (default: set)")
+    parser.add_argument("--bloom-error-rate", type=float, default=0.001,
+                        help="False-positive rate for --visited bloom (default: 0.001)")
+    parser.add_argument("--ignore-query", action="store_true",
+                        help="Treat URLs that differ only in their query string as one page")
+
+    order = parser.add_argument_group("crawl order and scope")
+    order.add_argument("--sitemap", action="append", default=[], metavar="URL",
+                       help="Seed the crawl with the pages in a sitemap or sitemap index "
+                            "(repeatable; \"auto\" reads Sitemap: lines from robots.txt)")
+    order.add_argument("--strategy", choices=STRATEGIES, default=None,
+                       help="Priority frontier with per-host turns: shallowest first (bfs), "
+                            "deepest first (dfs) or highest score first (score); "
+                            "default: first in, first out")
+    order.add_argument("--max-depth", type=int, default=None,
+                       help="Don't follow links more than this many clicks from the start page")
+    order.add_argument("--include", action="append", default=[], metavar="REGEX",
+                       help="Only follow links matching a pattern (repeatable)")
+    order.add_argument("--exclude", action="append", default=[], metavar="REGEX",
+                       help="Don't follow links matching the pattern (repeatable)")
+    order.add_argument("--score-rule", action="append", default=[], metavar="REGEX=WEIGHT",
+                       help="With --strategy score, add WEIGHT to URLs matching REGEX (repeatable)")
+    order.add_argument("--inlink-weight", type=float, default=1.0,
+                       help="With --strategy score, score per link found to a queued URL (default: 1)")
+
+    batch = parser.add_argument_group("batch crawling")
+    batch.add_argument("--seeds", default=None, metavar="FILE",
+                       help="Crawl every site in FILE (one \"URL [max_concurrency] [max_pages]\" "
+                            "per line) in one process with a shared connection pool")
+    batch.add_argument("--max-sites", type=int, default=10,
+                       help="With --seeds, sites crawled at the same time (default: 10)")
+    batch.add_argument("--report-dir", default="reports",
+                       help="With --seeds, directory for one report per site (named after "
+                            "the host, format from --output) and sites.csv (default: reports)")
+
+    sharding = parser.add_argument_group("multi-process crawling")
+    sharding.add_argument("--shards", type=int, default=1,
+                          help="Crawler processes, each with its own event loop; "
+                               "max_concurrency applies per process (default: 1)")
+    sharding.add_argument("--partition", choices=PARTITIONS, default="url",
+                          help="Split URLs between shards by normalized URL or by host (default: url)")
+
+    distributed = parser.add_argument_group("distributed crawling")
+    distributed.add_argument("--frontier", default=None,
+                             help="Shared frontier for cooperating workers: a SQLite file "
+                                  "or redis://host:port/db; run this command once per worker")
+    distributed.add_argument("--worker-id", default=None,
+                             help="Name for this worker's leases (default: hostname:pid)")
+    distributed.add_argument("--lease-timeout", type=float, default=60,
+                             help="Seconds before a claimed URL goes back to the frontier "
+                                  "if its worker never acks it (default: 60)")
+    distributed.add_argument("--claim-batch", type=int, default=50,
+                             help="URLs claimed from the frontier at a time (default: 50)")
+
+    state = parser.add_argument_group("crawl state")
+    state.add_argument("--checkpoint", default=None,
+                       help="SQLite file that records crawl progress (default with "
+                            "--resume: crawl_checkpoint.db)")
+    state.add_argument("--resume", action="store_true",
+                       help="Continue the crawl saved in the checkpoint file")
+    state.add_argument("--http-cache", default=None,
+                       help="SQLite response cache; recrawls send If-None-Match/"
+                            "If-Modified-Since and reuse unchanged pages")
+
+    report = parser.add_argument_group("report")
+    report.add_argument("--output", default="report.csv",
+                        help="Report file; .jsonl writes JSON Lines, .parquet writes pages, edges "
+                             "and images tables (CSV tables without pyarrow), otherwise CSV "
+                             "(default: report.csv)")
+    report.add_argument("--stream", action="store_true",
+                        help="Write report rows as pages finish instead of at the end")
+    report.add_argument("--no-keep-records", action="store_true",
+                        help="With --stream, keep only visited URLs in memory, not page records")
+    report.add_argument("--link-analytics", action="store_true",
+                        help="After the crawl, add PageRank, in/out degree, click depth, "
+                             "orphan and broken-link columns to the report")
+    report.add_argument("--compact-records", action="store_true",
+                        help="Keep page records in memory with interned URLs and array-backed "
+                             "link lists")
+
+    extraction = parser.add_argument_group("field extraction")
+    extraction.add_argument("--fields", default=None, metavar="FIELDS",
+                            help="Comma-separated page fields to extract, from "
+                                 f"{','.join(PAGE_FIELDS)} (default: all); the others are "
+                                 "left empty. Links are extracted anyway where they're followed.")
+    extraction.add_argument("--select", action="append", default=[], metavar="NAME=SELECTOR",
+                            help="Add a NAME column with the text of the first match of a CSS "
+                                 "selector, or an XPath with an xpath: prefix (needs lxml); "
+                                 "repeatable")
+    extraction.add_argument("--extractor", action="append", default=[],
+                            metavar="NAME=MODULE:FUNCTION",
+                            help="Add a NAME column computed by FUNCTION(html, page_url); "
+                                 "repeatable")
+
+    duplicates = parser.add_argument_group("duplicates")
+    duplicates.add_argument("--dedupe", action="store_true",
+                            help="Flag near-duplicate pages (duplicate_of column) and crawl "
+                                 "URL patterns that keep producing them last")
+    duplicates.add_argument("--dedupe-distance", type=int, default=3,
+                            help="Most fingerprint bits (of 64) near-duplicates differ in (default: 3)")
+    duplicates.add_argument("--demote-after", type=int, default=5,
+                            help="Duplicates a URL pattern must produce before it is demoted (default: 5)")
+
+    polite = parser.add_argument_group("politeness")
+    polite.add_argument("--per-host-concurrency", type=int, default=None,
+                        help="Simultaneous requests per host (default: max_concurrency)")
+    polite.add_argument("--requests-per-second", type=float, default=None,
+                        help="Request rate per host (default: unlimited unless "
+                             "robots.txt or 429/503 responses say otherwise)")
+    polite.add_argument("--ignore-robots", action="store_true",
+                        help="Don't fetch or obey robots.txt")
+
+    retries = parser.add_argument_group("retries")
+    retries.add_argument("--max-attempts", type=int, default=3,
+                         help="Tries per page for timeouts, connection errors and "
+                              "408/429/5xx responses; 1 disables retries (default: 3)")
+    retries.add_argument("--retry-base-delay", type=float, default=0.5,
+                         help="Seconds before the first retry, doubled each time (default: 0.5)")
+    retries.add_argument("--retry-budget", type=int, default=100,
+                         help="Retries allowed across the whole crawl (default: 100)")
+
+    monitoring = parser.add_argument_group("progress and metrics")
+    monitoring.add_argument("--progress-interval", type=float, default=1.0,
+                            help="Seconds between progress lines; 0 disables them (default: 1)")
+    monitoring.add_argument("--metrics-port", type=int, default=None,
+                            help="Serve Prometheus metrics at http://127.0.0.1:PORT/metrics")
+    monitoring.add_argument("--metrics-file", default=None,
+                            help="Append a JSON metrics snapshot to this file with every "
+                                 "progress line")
+
+    transport = parser.add_argument_group("HTTP transport")
+    transport.add_argument("--connection-limit", type=int, default=None,
+                           help="Total open connections (default: max_concurrency)")
+    transport.add_argument("--limit-per-host", type=int, default=None,
+                           help="Open connections per host (default: connection limit)")
+    transport.add_argument("--keepalive-timeout", type=float, default=30,
+                           help="Seconds to keep idle connections (default: 30)")
+    transport.add_argument("--dns-ttl", type=int, default=300,
+                           help="Seconds to cache DNS lookups (default: 300)")
+    transport.add_argument("--no-compression", action="store_true",
+                           help="Don't negotiate gzip/br response compression")
+    transport.add_argument("--timeout", type=float, default=10,
+                           help="Total seconds per request (default: 10)")
+    transport.add_argument("--connect-timeout", type=float, default=None,
+                           help="Seconds to establish a connection")
+    transport.add_argument("--max-body-size", type=int, default=DEFAULT_MAX_BODY_SIZE,
+                           help="Largest response body to download, in bytes; 0 disables "
+                                f"the limit (default: {DEFAULT_MAX_BODY_SIZE})")
+    transport.add_argument("--user-agent", default=DEFAULT_USER_AGENT,
+                           help=f"User-Agent header (default: {DEFAULT_USER_AGENT})")
+    args = parser.parse_args(argv)
+    if args.seeds is not None and args.base_url is not None:
+        # No URL with --seeds, so the numbers shift left
+        if args.max_pages is not None or not args.base_url.isdigit():
+            parser.error("give either a URL or --seeds, not both")
+        args.max_pages = args.max_concurrency
+        args.max_concurrency = int(args.base_url)
+        args.base_url = None
+    if args.seeds is None and args.base_url is None:
+        parser.error("a URL (or --seeds FILE) is required")
+    if args.max_concurrency is None:
+        args.max_concurrency = 5
+    if args.max_pages is None:
+        args.max_pages = 100
+    if args.seeds and (args.metrics_port is not None or args.metrics_file):
+        parser.error("--metrics-port and --metrics-file follow a single site (no --seeds)")
+    if args.resume and args.stream and args.output.endswith(".parquet"):
+        parser.error("a resumed --stream crawl can't append to a .parquet report")
+    if args.link_analytics and args.stream:
+        parser.error("--link-analytics adds columns to the report written at the end (no --stream)")
+    if args.no_keep_records and not args.stream:
+        parser.error("--no-keep-records requires --stream")
+    if args.resume and args.checkpoint is None:
+        args.checkpoint = "crawl_checkpoint.db"
+    if args.seeds and (args.shards > 1 or args.frontier or args.checkpoint):
+        parser.error("--seeds can't be combined with --shards, --frontier, --checkpoint or --resume")
+    if args.shards > 1 and (args.checkpoint or args.http_cache):
+        parser.error("--checkpoint, --resume and --http-cache need a single process (--shards 1)")
+    if args.frontier and (args.shards > 1 or args.checkpoint or args.http_cache):
+        parser.error("--frontier can't be combined with --shards, --checkpoint, --resume or --http-cache")
+    if args.frontier and (args.strategy or args.max_depth is not None or args.sitemap):
+        parser.error("--strategy, --max-depth and --sitemap need the local frontier (no --frontier)")
+    if args.shards > 1 and args.sitemap:
+        parser.error("--sitemap needs a single process (--shards 1)")
+    if args.score_rule and args.strategy != "score":
+        parser.error("--score-rule needs --strategy score")
+    try:
+        args.score_rule = [parse_score_rule(rule) for rule in args.score_rule]
+    except ValueError as e:
+        parser.error(f"--score-rule: {e}")
+    if args.shards > 1 and (args.metrics_port is not None or args.metrics_file):
+        parser.error("--metrics-port and --metrics-file need a single process (--shards 1)")
+    if args.compact_records and (args.shards > 1 or args.frontier):
+        parser.error("--compact-records needs a local crawl (no --shards or --frontier)")
+    if args.shards > 1 and args.dedupe:
+        parser.error("--dedupe needs a single process (--shards 1)")
+    if args.metrics_file and not args.progress_interval:
+        parser.error("--metrics-file is written with each progress line; set --progress-interval")
+    try:
+        transport_config(args)
+    except ValueError as e:
+        parser.error(f"HTTP transport: {e}")
+    args.extraction = None
+    if args.fields is not None or args.select or args.extractor:
+        try:
+            args.extraction = ExtractionSpec(
+                parse_fields(args.fields) if args.fields is not None else PAGE_FIELDS,
+                selectors=dict(parse_selector(option) for option in args.select),
+                extractors=dict(load_extractor(option) for option in args.extractor),
+            )
+        except ValueError as e:
+            parser.error(f"field extraction: {e}")
+        if args.extraction.needs_html and args.parse_mode == "stream":
+            parser.error("--select and --extractor need the whole page (no --parse-mode stream)")
+        if args.link_analytics and "outgoing_links" not in args.extraction.fields:
+            parser.error("--link-analytics needs outgoing_links in --fields")
+    return args
+
+
+def crawl_order(args):
+    """AsyncCrawler keyword arguments for the crawl order and scope options."""
+    return dict(
+        strategy=args.strategy,
+        scorer=URLScorer(args.score_rule, inlink_weight=args.inlink_weight),
+        max_depth=args.max_depth,
+        url_filter=URLFilter(args.include, args.exclude) if args.include or args.exclude else None,
+    )
+
+
+def report_fields(args):
+    """Report columns beyond csv_report.FIELDNAMES for the chosen options."""
+    fields = ()
+    if args.dedupe:
+        fields += ("duplicate_of",)
+    if args.link_analytics:
+        fields += ANALYTICS_FIELDS
+    if args.extraction is not None:
+        fields += args.extraction.names
+    return fields
+
+
+def transport_config(args):
+    """Build the TransportConfig from parsed arguments."""
+    return TransportConfig(
+        limit=args.connection_limit,
+        limit_per_host=args.limit_per_host,
+        keepalive_timeout=args.keepalive_timeout,
+        dns_cache_ttl=args.dns_ttl,
+        compress=not args.no_compression,
+        timeout=args.timeout,
+        connect_timeout=args.connect_timeout,
+        user_agent=args.user_agent,
+        max_body_size=args.max_body_size or None,
+    )
+
+
+async def crawl_batch(args):
+    """Crawl every site in the --seeds file, writing each site's report as it finishes."""
+    try:
+        seeds = read_seeds(args.seeds, args.max_concurrency, args.max_pages)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    print(f"starting batch crawl of {len(seeds)} sites from: {args.seeds}")
+    print(f"sites at a time: {args.max_sites}")
+    print()
+
+    # Reports are named after the host, in seed file order, so a rerun
+    # writes each site's report to the same file
+    os.makedirs(args.report_dir, exist_ok=True)
+    extension = os.path.splitext(args.output)[1] or ".csv"
+    extra_fields = report_fields(args)
+    report_files = {}
+    names = Counter()
+    for seed in seeds:
+        name = seed.host.replace(":", "_")
+        names[name] += 1
+        if names[name] > 1:
+            name += f"-{names[name]}"
+        report_files[seed] = os.path.join(args.report_dir, name + extension)
+
+    def site_options(seed):
+        # Everything that holds per-site state
+        return dict(
+            sink=(open_report_sink(report_files[seed], extra_fields=extra_fields)
+                  if args.stream else None),
+            keep_records=not args.no_keep_records,
+            visited=create_visited_set(args.visited, min(seed.max_pages, 1 << 20),
+                                       args.bloom_error_rate),
+            normalizer=URLNormalizer(seed.url, keep_query=not args.ignore_query),
+            # The retry budget is per site, so one dying site can't use it up
+            retry_policy=RetryPolicy(
+                max_attempts=args.max_attempts,
+                base_delay=args.retry_base_delay,
+                budget=args.retry_budget,
+            ),
+            duplicates=(DuplicateDetector(args.dedupe_distance, demote_after=args.demote_after)
+                        if args.dedupe else None),
+            page_store=PageStore() if args.compact_records else None,
+            extraction=args.extraction,
+            **crawl_order(args),
+        )
+
+    def site_done(result, crawler):
+        seed = result.seed
+        filename = report_files[seed]
+        if crawler is not None:
+            if crawler.sink is not None:
+                crawler.sink.close()
+            else:
+                pages = crawler.page_data
+                if args.link_analytics:
+                    pages = annotate_pages(pages, LinkAnalytics(pages, seed.url, crawler.urls))
+                with open_report_sink(filename, extra_fields=extra_fields) as sink:
+                    for page in pages.values():
+                        if page is not None:
+                            sink.write(page)
+        prefix = f"[{len(batch.results)}/{len(seeds)}] {seed.url}"
+        if result.error is not None:
+            print(f"{prefix}: failed: {result.error}")
+        else:
+            stats = result.stats
+            print(f"{prefix}: {stats['pages_crawled']} pages, {stats['pages_failed']} failed "
+                  f"in {result.elapsed:.1f}s -> {filename}")
+
+    cache = ResponseCache(args.http_cache) if args.http_cache else None
+    largest = max((seed.max_concurrency for seed in seeds), default=1)
+    batch = BatchCrawler(
+        seeds,
+        max_sites=args.max_sites,
+        transport=transport_config(args),
+        scheduler=PolitenessScheduler(
+            per_host_concurrency=args.per_host_concurrency or largest,
+            requests_per_second=args.requests_per_second,
+            respect_robots=not args.ignore_robots,
+            user_agent=args.user_agent,
+        ),
+        parse_mode=args.parse_mode,
+        parse_workers=args.parse_workers,
+        site_options=site_options,
+        on_site_done=site_done,
+        cache=cache,
+        sitemaps=args.sitemap,
+    )
+    try:
+        async with batch:
+            results = await batch.crawl()
+    finally:
+        if cache is not None:
+            cache.close()
+
+    summary_file = os.path.join(args.report_dir, "sites.csv")
+    write_sites_summary(results, summary_file)
+    print(f"\n=== Batch Complete ===")
+    print(f"Sites crawled: {len(results) - batch.sites_failed}")
+    print(f"Sites failed: {batch.sites_failed}")
+    print(f"Pages crawled: {batch.pages_crawled}")
+    if cache is not None:
+        print(f"Cache hits (304): {cache.hits}/{cache.requests} "
+              f"({cache.hit_ratio():.1%}), {cache.bytes_saved:,} bytes saved")
+    print(f"Site summary written to: {summary_file}")
 
 
 async def main():
@@ -10,45 +420,208 @@ async def main():
         print("Usage: uv run main.py URL [max_concurrency] [max_pages]")
         print("Example: uv run main.py https://example.com 5 100")
         sys.exit(1)
-    
-    base_url = sys.argv[1]
-    
-    # Get optional concurrency and max_pages arguments
-    max_concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 5
-    max_pages = int(sys.argv[3]) if len(sys.argv) > 3 else 100
-    
+
+    args = parse_args(sys.argv[1:])
+    if args.output.endswith(".parquet") and not PARQUET_AVAILABLE:
+        print("pyarrow is not installed; writing the report tables as CSV")
+    if args.seeds is not None:
+        await crawl_batch(args)
+        return
+    base_url = args.base_url
+    max_concurrency = args.max_concurrency
+    max_pages = args.max_pages
+
     print(f"starting crawl of: {base_url}")
     print(f"max_concurrency: {max_concurrency}")
     print(f"max_pages: {max_pages}")
     print()
-    
+
+    # Streamed reports are written while the crawl runs
+    # (a resumed crawl appends to the report it started)
+    extra_fields = report_fields(args)
+    sink = (open_report_sink(args.output, append=args.resume, extra_fields=extra_fields)
+            if args.stream else None)
+    checkpoint = CheckpointStore(args.checkpoint) if args.checkpoint else None
+    cache = ResponseCache(args.http_cache) if args.http_cache else None
+    frontier = (
+        open_frontier(args.frontier, lease_timeout=args.lease_timeout, max_pages=max_pages)
+        if args.frontier else None
+    )
+    politeness = dict(
+        per_host_concurrency=args.per_host_concurrency or max_concurrency,
+        requests_per_second=args.requests_per_second,
+        respect_robots=not args.ignore_robots,
+        user_agent=args.user_agent,
+    )
+    metrics = CrawlMetrics() if args.shards == 1 else None
+    metrics_file = open(args.metrics_file, "a", encoding="utf-8") if args.metrics_file else None
+    metrics_server = None
+    duplicates = (
+        DuplicateDetector(args.dedupe_distance, demote_after=args.demote_after)
+        if args.dedupe else None
+    )
+    # The retry budget is for the whole crawl, so shards split it
+    retry_policy = RetryPolicy(
+        max_attempts=args.max_attempts,
+        base_delay=args.retry_base_delay,
+        budget=max(1, args.retry_budget // args.shards),
+    )
+
     # Crawl the site asynchronously
     try:
-        page_data = await crawl_site_async(base_url, max_concurrency, max_pages)
-        
-        # Filter successful pages
-        successful_pages = {url: data for url, data in page_data.items() if data is not None}
+        if args.metrics_port is not None:
+            metrics_server = await start_metrics_server(metrics, args.metrics_port)
+            print(f"Metrics at http://127.0.0.1:{args.metrics_port}/metrics")
+
+        if args.shards > 1:
+            # Coordinator mode: shard processes crawl, this one merges
+            page_data, stats = await asyncio.to_thread(
+                crawl_site_sharded,
+                base_url,
+                shards=args.shards,
+                max_concurrency=max_concurrency,
+                max_pages=max_pages,
+                partition=args.partition,
+                sink=sink,
+                visited=args.visited,
+                bloom_error_rate=args.bloom_error_rate,
+                politeness=politeness,
+                keep_query=not args.ignore_query,
+                parse_mode=args.parse_mode,
+                parse_workers=args.parse_workers,
+                transport=transport_config(args),
+                retry_policy=retry_policy,
+                progress_interval=args.progress_interval,
+                extraction=args.extraction,
+                **crawl_order(args),
+            )
+        elif frontier is not None:
+            # One of any number of workers sharing the frontier
+            crawler = FrontierCrawler(
+                base_url,
+                frontier,
+                worker_id=args.worker_id,
+                batch_size=args.claim_batch,
+                max_concurrency=max_concurrency,
+                parse_mode=args.parse_mode,
+                parse_workers=args.parse_workers,
+                transport=transport_config(args),
+                sink=sink,
+                scheduler=PolitenessScheduler(**politeness),
+                retry_policy=retry_policy,
+                normalizer=URLNormalizer(base_url, keep_query=not args.ignore_query),
+                metrics=metrics,
+                progress_interval=args.progress_interval,
+                metrics_file=metrics_file,
+                duplicates=duplicates,
+                url_filter=crawl_order(args)["url_filter"],
+                extraction=args.extraction,
+            )
+            async with crawler:
+                await crawler.crawl()
+            stats = crawler.stats()
+            # Every worker's pages; the last worker to finish has them all
+            page_data = frontier.results()
+        else:
+            crawler = AsyncCrawler(
+                base_url,
+                max_concurrency,
+                max_pages,
+                parse_mode=args.parse_mode,
+                parse_workers=args.parse_workers,
+                transport=transport_config(args),
+                sink=sink,
+                keep_records=not args.no_keep_records,
+                # Size for max_pages up front, but let huge limits grow on demand
+                visited=create_visited_set(args.visited, min(max_pages, 1 << 20), args.bloom_error_rate),
+                checkpoint=checkpoint,
+                resume=args.resume,
+                cache=cache,
+                scheduler=PolitenessScheduler(**politeness),
+                retry_policy=retry_policy,
+                normalizer=URLNormalizer(base_url, keep_query=not args.ignore_query),
+                metrics=metrics,
+                progress_interval=args.progress_interval,
+                metrics_file=metrics_file,
+                duplicates=duplicates,
+                sitemaps=args.sitemap,
+                page_store=PageStore() if args.compact_records else None,
+                extraction=args.extraction,
+                **crawl_order(args),
+            )
+            async with crawler:
+                page_data = await crawler.crawl()
+            stats = crawler.stats()
+
         failed_pages = {url: data for url, data in page_data.items() if data is None}
-        
+
         # Print summary
         print(f"\n=== Crawl Complete ===")
-        print(f"Total pages found: {len(page_data)}")
-        print(f"Successful: {len(successful_pages)}")
-        print(f"Failed: {len(failed_pages)}")
-        
+        print(f"Total pages found: {stats['pages_found']}")
+        print(f"Successful: {stats['pages_crawled']}")
+        print(f"Failed: {stats['pages_failed']}")
+        for kind, count in stats["failure_counts"].most_common():
+            print(f"  {kind}: {count}")
+        if stats["retries"]:
+            print(f"Retries: {stats['retries']}")
+
+        if stats["pages_disallowed"]:
+            print(f"Skipped by robots.txt: {stats['pages_disallowed']}")
+        if stats["throttled"]:
+            print(f"Throttled responses (429/503): {stats['throttled']}")
+        if args.sitemap and crawler.sitemap_loader is not None:
+            loader = crawler.sitemap_loader
+            print(f"Sitemaps: {loader.sitemaps_read} read, {loader.urls_found} URLs listed"
+                  + (f", {loader.errors} failed" if loader.errors else ""))
+        if cache is not None:
+            print(f"Cache hits (304): {cache.hits}/{cache.requests} "
+                  f"({cache.hit_ratio():.1%}), {cache.bytes_saved:,} bytes saved")
+            if cache.sitemap_skips:
+                print(f"Skipped as unchanged since their sitemap lastmod: {cache.sitemap_skips}")
+
+        if metrics is not None:
+            metrics.print_summary()
+
+        if duplicates is not None:
+            duplicates.print_summary(len(crawler.deferred))
+
+        if args.link_analytics:
+            analytics = LinkAnalytics(
+                page_data, base_url, URLNormalizer(base_url, keep_query=not args.ignore_query)
+            )
+            analytics.print_summary()
+            page_data = annotate_pages(page_data, analytics)
+
         if failed_pages:
             print(f"\nFailed URLs:")
             for url in failed_pages.keys():
                 print(f"  - {url}")
-        
-        # Write CSV report
-        write_csv_report(page_data, filename="report.csv")
-            
+
+        # Write report
+        if sink is not None:
+            sink.close()
+            print(f"\nReport streamed to: {args.output}")
+            print(f"Total pages exported: {sink.count}")
+        else:
+            write_report(page_data, filename=args.output, extra_fields=extra_fields)
+
     except Exception as e:
         print(f"Error: {e}")
         sys.exit(1)
+    finally:
+        if sink is not None:
+            sink.close()
+        if checkpoint is not None:
+            checkpoint.close()
+        if cache is not None:
+            cache.close()
+        if frontier is not None:
+            frontier.close()
+        if metrics_file is not None:
+            metrics_file.close()
+        if metrics_server is not None:
+            await metrics_server.cleanup()
 
 
 if __name__ == "__main__":
     asyncio.run(main())
-
@@ -0,0 +1,355 @@
+import sys
+import json
+import time
+import asyncio
+from bisect import bisect_left
+import aiohttp
+from aiohttp import web
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+# Timed stages, in the order they happen to a request
+TIMINGS = {
+    "slot_wait": "Waiting for a per-host politeness slot (concurrency, rate limit, backoff)",
+    "connection_wait": "Waiting for a free connection in the pool",
+    "dns": "DNS resolution (cache misses only)",
+    "connect": "Opening a new connection, DNS and TLS included",
+    "ttfb": "Request sent to response headers received",
+    "body": "Reading and decoding the response body",
+    "fetch": "Whole fetch, slot wait included",
+    "parse": "Extracting page data",
+}
+
+PREFIX = "webcrawler"
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram, cheap enough to update on every request.
+
+    Counts are per bucket (not cumulative); the last bucket catches
+    everything above the largest bound.
+    """
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def mean(self):
+        return self.sum / self.count if self.count else 0.0
+
+    def quantile(self, q):
+        """
+        Estimate the q-quantile (0-1) by interpolating within its bucket.
+
+        Values past the last bound are reported as the observed maximum.
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                if index == len(self.bounds):
+                    return self.max
+                low = self.bounds[index - 1] if index else 0.0
+                high = min(self.bounds[index], self.max)
+                return low + (high - low) * max(0.0, rank - seen) / count
+            seen += count
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean": self.mean(),
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+            "max": self.max,
+        }
+
+
+class TimedContext:
+    """Wraps an async context manager and records how long entering it took."""
+
+    def __init__(self, context, histogram):
+        self.context = context
+        self.histogram = histogram
+
+    async def __aenter__(self):
+        start = time.perf_counter()
+        result = await self.context.__aenter__()
+        self.histogram.observe(time.perf_counter() - start)
+        return result
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        return await self.context.__aexit__(exc_type, exc_val, exc_tb)
+
+
+class CrawlMetrics:
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        """
+        Throughput, latency and queue metrics for one crawler.
+
+        The crawler records timings and bytes as it goes; page and error
+        counters are read from crawler.stats() when a snapshot is taken,
+        so nothing is counted twice. Connection-level timings come from
+        an aiohttp TraceConfig (see trace_config()).
+
+        Args:
+            bounds: Histogram bucket upper bounds in seconds
+        """
+        self.histograms = {name: Histogram(bounds) for name in TIMINGS}
+        self.bytes_received = 0
+        self.in_flight = 0
+        self.max_queue_depth = 0
+        self.started = time.monotonic()
+        self.crawler = None
+
+    def bind(self, crawler):
+        """Read page counters and queue depth from crawler."""
+        self.crawler = crawler
+
+    def observe(self, name, seconds):
+        self.histograms[name].observe(seconds)
+
+    def timed(self, name, context):
+        """Time how long it takes to enter an async context manager."""
+        return TimedContext(context, self.histograms[name])
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def queue_depth(self):
+        """Read the crawler's queue depth, tracking the maximum seen."""
+        if self.crawler is None:
+            return 0
+        depth = self.crawler.queue.qsize()
+        if depth > self.max_queue_depth:
+            self.max_queue_depth = depth
+        return depth
+
+    def trace_config(self):
+        """
+        Build a TraceConfig that records DNS, connect, pool wait and TTFB.
+
+        aiohttp gives each request its own trace context, so concurrent
+        requests never share timing state.
+        """
+        histograms = self.histograms
+
+        def start(attribute):
+            async def handler(session, context, params):
+                setattr(context, attribute, time.perf_counter())
+            return handler
+
+        def end(attribute, name):
+            async def handler(session, context, params):
+                started = getattr(context, attribute, None)
+                if started is not None:
+                    histograms[name].observe(time.perf_counter() - started)
+            return handler
+
+        config = aiohttp.TraceConfig()
+        config.on_request_start.append(start("request_start"))
+        # Fires once the response headers are in
+        config.on_request_end.append(end("request_start", "ttfb"))
+        config.on_connection_queued_start.append(start("queued_start"))
+        config.on_connection_queued_end.append(end("queued_start", "connection_wait"))
+        config.on_connection_create_start.append(start("create_start"))
+        config.on_connection_create_end.append(end("create_start", "connect"))
+        config.on_dns_resolvehost_start.append(start("dns_start"))
+        config.on_dns_resolvehost_end.append(end("dns_start", "dns"))
+        return config
+
+    def snapshot(self):
+        """
+        All metrics as a JSON-serializable dict.
+
+        Rates are averages since the metrics were created.
+        """
+        elapsed = self.elapsed()
+        stats = self.crawler.stats() if self.crawler is not None else {}
+        pages = stats.get("pages_crawled", 0)
+        snapshot = {
+            "time": time.time(),
+            "elapsed": elapsed,
+            "pages_per_sec": pages / elapsed if elapsed else 0.0,
+            "bytes_received": self.bytes_received,
+            "bytes_per_sec": self.bytes_received / elapsed if elapsed else 0.0,
+            "queue_depth": self.queue_depth(),
+            "max_queue_depth": self.max_queue_depth,
+            "in_flight": self.in_flight,
+        }
+        snapshot.update(stats)
+        snapshot["failure_counts"] = dict(stats.get("failure_counts", {}))
+        snapshot["timings"] = {
+            name: histogram.summary() for name, histogram in self.histograms.items()
+        }
+        return snapshot
+
+    def prometheus(self):
+        """Render the metrics in the Prometheus text exposition format."""
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+            for suffix, labels, value in samples:
+                label_text = ",".join(f'{key}="{label}"' for key, label in labels)
+                if label_text:
+                    label_text = "{" + label_text + "}"
+                lines.append(f"{PREFIX}_{name}{suffix}{label_text} {value}")
+
+        stats = self.crawler.stats() if self.crawler is not None else {}
+        for name, help_text in (
+            ("pages_crawled", "Pages fetched and parsed"),
+            ("pages_failed", "Pages that failed for good"),
+            ("pages_disallowed", "Pages skipped by robots.txt"),
+            ("retries", "Fetches retried after a transient failure"),
+            ("throttled", "429/503 responses"),
+        ):
+            metric(f"{name}_total", "counter", help_text, [("", (), stats.get(name, 0))])
+        metric("failures_total", "counter", "Failed pages by failure class",
+               [("", (("kind", kind),), count)
+                for kind, count in sorted(stats.get("failure_counts", {}).items())])
+        metric("bytes_received_total", "counter", "Decoded response body bytes",
+               [("", (), self.bytes_received)])
+        metric("pages_found", "gauge", "Distinct URLs queued so far",
+               [("", (), stats.get("pages_found", 0))])
+        metric("queue_depth", "gauge", "URLs waiting on the frontier",
+               [("", (), self.queue_depth())])
+        metric("in_flight", "gauge", "Fetches in progress", [("", (), self.in_flight)])
+
+        for name, help_text in TIMINGS.items():
+            histogram = self.histograms[name]
+            samples = []
+            cumulative = 0
+            for bound, count in zip(histogram.bounds, histogram.counts):
+                cumulative += count
+                samples.append(("_bucket", (("le", repr(bound)),), cumulative))
+            samples.append(("_bucket", (("le", "+Inf"),), histogram.count))
+            samples.append(("_sum", (), histogram.sum))
+            samples.append(("_count", (), histogram.count))
+            metric(f"{name}_seconds", "histogram", help_text, samples)
+        return "\n".join(lines) + "\n"
+
+    def print_summary(self):
+        """Print the final breakdown: rates, then each timing's distribution."""
+        snapshot = self.snapshot()
+        print(f"\n=== Metrics ===")
+        print(f"Elapsed: {snapshot['elapsed']:.1f}s")
+        print(f"Pages/sec: {snapshot['pages_per_sec']:.1f}")
+        print(f"Bytes received: {snapshot['bytes_received']:,} "
+              f"({snapshot['bytes_per_sec'] / 1024:.1f} KiB/s)")
+        print(f"Max queue depth: {snapshot['max_queue_depth']}")
+        print(f"{'timing':<16}{'count':>8}{'mean':>9}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}")
+        for name, summary in snapshot["timings"].items():
+            if not summary["count"]:
+                continue
+            print(f"{name:<16}{summary['count']:>8}"
+                  + "".join(f"{summary[key] * 1000:>7.1f}ms"
+                            for key in ("mean", "p50", "p90", "p99", "max")))
+
+
+def format_progress(stats, elapsed, queue_depth, metrics=None):
+    """Build the one-line progress summary."""
+    line = (f"[{elapsed:7.1f}s] {stats['pages_crawled']} crawled, "
+            f"{stats['pages_failed']} failed, {queue_depth} queued")
+    if elapsed:
+        line += f", {stats['pages_crawled'] / elapsed:.1f} pages/s"
+    if metrics is not None and elapsed:
+        line += f", {metrics.bytes_received / elapsed / 1024:.0f} KiB/s"
+    if stats["retries"]:
+        line += f", {stats['retries']} retries"
+    return line
+
+
+class ProgressReporter:
+    """
+    Prints a progress line (and optionally writes a metrics snapshot)
+    every interval seconds, instead of a line per page.
+
+    Output goes through one write and flush per interval, so it costs
+    the same at 10 or 10,000 pages per second.
+    """
+
+    def __init__(self, crawler, interval=1.0, snapshot_file=None, stream=None):
+        """
+        Args:
+            crawler: AsyncCrawler to report on
+            interval: Seconds between reports
+            snapshot_file: Optional open text file; each report appends
+                crawler.metrics.snapshot() to it as a JSON line
+            stream: Where progress lines go (default: sys.stdout)
+        """
+        self.crawler = crawler
+        self.interval = interval
+        self.snapshot_file = snapshot_file
+        self.stream = stream
+        self.started = time.monotonic()
+        self.task = None
+
+    def report(self):
+        crawler = self.crawler
+        stream = self.stream if self.stream is not None else sys.stdout
+        metrics = crawler.metrics
+        queue_depth = metrics.queue_depth() if metrics is not None else crawler.queue.qsize()
+        stream.write(format_progress(crawler.stats(), time.monotonic() - self.started,
+                                     queue_depth, metrics) + "\n")
+        stream.flush()
+        if self.snapshot_file is not None and metrics is not None:
+            self.snapshot_file.write(json.dumps(metrics.snapshot()) + "\n")
+            self.snapshot_file.flush()
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            self.report()
+
+    def start(self):
+        self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        """Stop reporting, with one last report so the totals are shown."""
+        if self.task is None:
+            return
+        self.task.cancel()
+        await asyncio.gather(self.task, return_exceptions=True)
+        self.task = None
+        self.report()
+
+
+async def start_metrics_server(metrics, port, host="127.0.0.1"):
+    """
+    Serve metrics.prometheus() at http://host:port/metrics.
+
+    Returns:
+        The aiohttp AppRunner; await runner.cleanup() to stop serving
+    """
+    async def handle(request):
+        return web.Response(body=metrics.prometheus().encode("utf-8"), headers={
+            "Content-Type": PROMETHEUS_CONTENT_TYPE,
+            "Cache-Control": "no-cache",
+        })
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
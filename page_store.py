@@ -0,0 +1,147 @@
+from array import array
+from collections.abc import Mapping
+
+# Keys every page record has, in extract_page_data's order
+RECORD_KEYS = ("url", "h1", "first_paragraph", "outgoing_links", "image_urls")
+
+
+class URLTable:
+    """Interns URLs: each distinct URL string is kept once and gets an integer ID."""
+
+    def __init__(self):
+        self.ids = {}
+        self.urls = []
+
+    def __len__(self):
+        return len(self.urls)
+
+    def intern(self, url):
+        """Return url's ID, assigning the next one if it is new."""
+        url_id = self.ids.get(url)
+        if url_id is None:
+            url_id = self.ids[url] = len(self.urls)
+            self.urls.append(url)
+        return url_id
+
+    def id_of(self, url):
+        """Return url's ID, or None if it was never interned."""
+        return self.ids.get(url)
+
+
+class AdjacencyArrays:
+    """
+    Append-only CSR (compressed sparse row) lists of URL IDs.
+
+    Row i's IDs are targets[offsets[i]:offsets[i + 1]]: two flat arrays
+    instead of one Python list (and its string pointers) per row.
+    """
+
+    def __init__(self):
+        self.offsets = array("Q", [0])
+        self.targets = array("I")
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def append(self, ids):
+        """Add a row and return its index."""
+        self.targets.extend(ids)
+        self.offsets.append(len(self.targets))
+        return len(self.offsets) - 2
+
+    def row(self, index):
+        return self.targets[self.offsets[index]:self.offsets[index + 1]]
+
+
+class PageRecord(Mapping):
+    """
+    Read-only view of one page in a PageStore.
+
+    Behaves like the extract_page_data dict (same keys, values and
+    equality), so reports and callers can't tell the difference; link
+    and image lists are rebuilt from the store on access. Keys beyond
+    RECORD_KEYS (fingerprint, duplicate_of, ...) are kept as they are.
+    """
+
+    __slots__ = ("store", "row", "h1", "first_paragraph", "extra")
+
+    def __init__(self, store, row, h1, first_paragraph, extra):
+        self.store = store
+        self.row = row
+        self.h1 = h1
+        self.first_paragraph = first_paragraph
+        # Dict of the other keys, or None when there are none
+        self.extra = extra
+
+    def __getitem__(self, key):
+        if key == "url":
+            return self.store.urls.urls[self.store.page_urls[self.row]]
+        if key == "h1":
+            return self.h1
+        if key == "first_paragraph":
+            return self.first_paragraph
+        if key == "outgoing_links":
+            return self.store.resolve(self.store.links.row(self.row))
+        if key == "image_urls":
+            return self.store.resolve(self.store.images.row(self.row))
+        if self.extra is not None and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __iter__(self):
+        yield from RECORD_KEYS
+        if self.extra is not None:
+            yield from self.extra
+
+    def __len__(self):
+        return len(RECORD_KEYS) + (len(self.extra) if self.extra is not None else 0)
+
+    def __repr__(self):
+        return f"PageRecord({dict(self)!r})"
+
+    @property
+    def link_ids(self):
+        """The page's outgoing links as an array of URL IDs."""
+        return self.store.links.row(self.row)
+
+
+class PageStore:
+    def __init__(self):
+        """
+        Compact storage for a crawl's page records.
+
+        Every URL (page, link or image) is interned once in a URLTable,
+        links and images are CSR arrays of URL IDs, and each page keeps a
+        PageRecord with __slots__. Navigation links repeated on every page
+        cost 4 bytes per page instead of a string each.
+        """
+        self.urls = URLTable()
+        # Row -> URL ID of the page itself
+        self.page_urls = array("I")
+        self.links = AdjacencyArrays()
+        self.images = AdjacencyArrays()
+
+    def __len__(self):
+        return len(self.page_urls)
+
+    def add(self, data):
+        """
+        Store one page's data.
+
+        Args:
+            data: Page data dictionary from extract_page_data
+
+        Returns:
+            A PageRecord equal to data
+        """
+        intern = self.urls.intern
+        self.page_urls.append(intern(data["url"]))
+        row = self.links.append([intern(url) for url in data["outgoing_links"]])
+        self.images.append([intern(url) for url in data["image_urls"]])
+        extra = {key: value for key, value in data.items() if key not in RECORD_KEYS}
+        return PageRecord(self, row, data["h1"], data["first_paragraph"], extra or None)
+
+    def resolve(self, ids):
+        """Map URL IDs back to URL strings."""
+        urls = self.urls.urls
+        return [urls[url_id] for url_id in ids]
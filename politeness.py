@@ -0,0 +1,197 @@
+import time
+import asyncio
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+from errors import parse_retry_after
+
+# Responses that mean "slow down"
+THROTTLE_STATUSES = (429, 503)
+
+
+class TokenBucket:
+    """
+    Requests-per-second limiter.
+
+    reserve() takes a token and returns how long to wait for it, so callers
+    queue up behind each other instead of polling. A rate of None means
+    unlimited.
+    """
+
+    def __init__(self, rate=None, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def reserve(self):
+        if self.rate is None:
+            return 0.0
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+
+class HostState:
+    """Per-host limits, robots.txt rules and throttling state."""
+
+    def __init__(self, concurrency, rate):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.bucket = TokenBucket(rate)
+        # Rate the host recovers towards after throttling (None: unlimited)
+        self.target_rate = rate
+        self.blocked_until = 0.0
+        self.robots = None
+        self.robots_task = None
+
+
+class PolitenessScheduler:
+    def __init__(self, per_host_concurrency=2, requests_per_second=None,
+                 respect_robots=True, user_agent="BootCrawler/1.0",
+                 min_rate=0.1, throttled_rate=1.0):
+        """
+        Per-host politeness: concurrency, request rate, robots.txt and backoff.
+
+        Args:
+            per_host_concurrency: Simultaneous requests allowed per host
+            requests_per_second: Request rate per host (None: unlimited
+                unless robots.txt or the server asks us to slow down)
+            respect_robots: Fetch robots.txt once per host and obey it,
+                including Crawl-delay
+            user_agent: Agent name matched against robots.txt rules
+            min_rate: Lowest rate backoff will drop a host to
+            throttled_rate: Rate an unlimited host drops to on its first
+                429/503
+        """
+        self.per_host_concurrency = per_host_concurrency
+        self.requests_per_second = requests_per_second
+        self.respect_robots = respect_robots
+        self.user_agent = user_agent
+        self.min_rate = min_rate
+        self.throttled_rate = throttled_rate
+        self.hosts = {}
+        self.session = None
+        self.throttle_count = 0
+
+    def bind(self, session):
+        """Use session (the crawler's) to fetch robots.txt."""
+        self.session = session
+
+    def host_state(self, url):
+        parsed = urlparse(url)
+        host = parsed.netloc
+        state = self.hosts.get(host)
+        if state is None:
+            state = HostState(self.per_host_concurrency, self.requests_per_second)
+            self.hosts[host] = state
+        return state
+
+    async def allowed(self, url):
+        """
+        Check robots.txt for url, fetching it the first time a host is seen.
+
+        Returns:
+            True if the crawler may fetch url
+        """
+        if not self.respect_robots:
+            return True
+        state = self.host_state(url)
+        if state.robots is None:
+            # Concurrent callers for a new host share one robots.txt fetch
+            if state.robots_task is None:
+                state.robots_task = asyncio.ensure_future(self.load_robots(url, state))
+            await asyncio.shield(state.robots_task)
+        return state.robots.can_fetch(self.user_agent, url)
+
+    async def load_robots(self, url, state):
+        parsed = urlparse(url)
+        robots_url = f"{parsed.scheme}://{parsed.netloc}/robots.txt"
+        robots = RobotFileParser(robots_url)
+        try:
+            async with self.session.get(robots_url) as response:
+                if response.status >= 500:
+                    # Server error: assume everything is off limits
+                    robots.disallow_all = True
+                elif response.status >= 400:
+                    # No robots.txt: everything is allowed
+                    robots.allow_all = True
+                else:
+                    robots.parse((await response.text(errors="replace")).splitlines())
+        except Exception:
+            robots.disallow_all = True
+
+        # urllib.robotparser only understands whole-second Crawl-delay values
+        delay = robots.crawl_delay(self.user_agent)
+        if delay:
+            self.limit_rate(state, 1 / float(delay))
+        request_rate = robots.request_rate(self.user_agent)
+        if request_rate:
+            self.limit_rate(state, request_rate.requests / request_rate.seconds)
+        state.robots = robots
+
+    def limit_rate(self, state, rate):
+        """Cap a host's rate (and the rate it recovers to)."""
+        if state.target_rate is None or rate < state.target_rate:
+            state.target_rate = rate
+        if state.bucket.rate is None or rate < state.bucket.rate:
+            state.bucket.rate = rate
+
+    def slot(self, url):
+        """
+        Async context manager that holds a request slot for url's host.
+
+        Waits for a free per-host connection, the host's rate limit and any
+        Retry-After pause before entering.
+        """
+        return HostSlot(self.host_state(url))
+
+    def record_response(self, url, status, headers):
+        """
+        Adapt the host's rate to a response.
+
+        429/503 halve the rate and honour Retry-After; other responses let a
+        throttled host slowly climb back to its target rate.
+        """
+        state = self.host_state(url)
+        bucket = state.bucket
+        if status in THROTTLE_STATUSES:
+            self.throttle_count += 1
+            if bucket.rate is None:
+                bucket.rate = self.throttled_rate
+            else:
+                bucket.rate = max(self.min_rate, bucket.rate / 2)
+            retry_after = parse_retry_after(headers.get("Retry-After"))
+            if retry_after:
+                state.blocked_until = max(state.blocked_until, time.monotonic() + retry_after)
+        elif bucket.rate is not None and bucket.rate != state.target_rate:
+            recovered = bucket.rate * 1.1
+            if state.target_rate is not None and recovered >= state.target_rate:
+                recovered = state.target_rate
+            elif state.target_rate is None and recovered >= self.throttled_rate * 100:
+                recovered = None
+            bucket.rate = recovered
+
+
+class HostSlot:
+    def __init__(self, state):
+        self.state = state
+
+    async def __aenter__(self):
+        await self.state.semaphore.acquire()
+        try:
+            pause = self.state.blocked_until - time.monotonic()
+            if pause > 0:
+                await asyncio.sleep(pause)
+            delay = self.state.bucket.reserve()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        except BaseException:
+            self.state.semaphore.release()
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.state.semaphore.release()
@@ -0,0 +1,131 @@
+import csv
+import json
+from csv_report import FIELDNAMES, page_to_row
+from columnar_report import ColumnarReportSink
+
+
+class ReportSink:
+    """
+    Receives each page's data as soon as the crawler finishes it.
+
+    Rows are buffered and written out every flush_every pages, so a crash
+    loses at most one buffer instead of the whole crawl. Subclasses only
+    implement write_rows().
+    """
+
+    def __init__(self, filename, flush_every=100, append=False):
+        self.filename = filename
+        self.flush_every = flush_every
+        self.buffer = []
+        self.count = 0
+        self.file = open(filename, "a" if append else "w", newline="", encoding="utf-8")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def write(self, page):
+        """
+        Add one page to the report.
+
+        Args:
+            page: Page data dictionary from extract_page_data
+        """
+        self.buffer.append(page)
+        self.count += 1
+        if len(self.buffer) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        """Write buffered pages and push them to disk."""
+        if self.buffer:
+            self.write_rows(self.buffer)
+            self.buffer = []
+        self.file.flush()
+
+    def close(self):
+        """Flush remaining pages and close the file."""
+        if self.file.closed:
+            return
+        self.flush()
+        self.file.close()
+
+    def write_rows(self, pages):
+        raise NotImplementedError
+
+
+class CsvReportSink(ReportSink):
+    """Streams rows in the same format as write_csv_report."""
+
+    def __init__(self, filename, flush_every=100, append=False, extra_fields=()):
+        super().__init__(filename, flush_every, append)
+        self.extra_fields = tuple(extra_fields)
+        self.writer = csv.DictWriter(self.file, fieldnames=FIELDNAMES + list(self.extra_fields))
+        # Appending to an existing report must not repeat the header
+        if self.file.tell() == 0:
+            self.writer.writeheader()
+            self.file.flush()
+
+    def write_rows(self, pages):
+        self.writer.writerows(page_to_row(page, self.extra_fields) for page in pages)
+
+
+class JsonlReportSink(ReportSink):
+    """Streams one JSON object per page (JSON Lines)."""
+
+    def write_rows(self, pages):
+        # PageRecords (see page_store.py) are mappings, not dicts
+        self.file.writelines(
+            json.dumps(page if isinstance(page, dict) else dict(page), ensure_ascii=False) + "\n"
+            for page in pages
+        )
+
+
+def open_report_sink(filename, flush_every=None, append=False, extra_fields=()):
+    """
+    Open a sink for filename, picking the format from its extension.
+
+    Args:
+        filename: Output path; .jsonl/.ndjson writes JSON Lines, .parquet
+                  writes pages/edges/images tables (see columnar_report),
+                  anything else writes CSV
+        flush_every: Pages buffered between writes (default: 100, or
+                  10000 per Parquet row group)
+        append: Add to an existing report (used when resuming a crawl)
+        extra_fields: Extra CSV columns (see csv_report.page_to_row);
+                  JSON Lines already has every key
+
+    Returns:
+        A ReportSink
+    """
+    if filename.endswith(".parquet"):
+        if flush_every is None:
+            return ColumnarReportSink(filename, append=append, extra_fields=extra_fields)
+        return ColumnarReportSink(filename, flush_every, append, extra_fields)
+    if flush_every is None:
+        flush_every = 100
+    if filename.endswith((".jsonl", ".ndjson")):
+        return JsonlReportSink(filename, flush_every, append)
+    return CsvReportSink(filename, flush_every, append, extra_fields)
+
+
+def write_report(page_data, filename="report.csv", extra_fields=()):
+    """
+    Write a finished crawl's page data in the format implied by filename.
+
+    Args:
+        page_data: Dictionary of page data keyed by normalized URL
+        filename: Output filename (default: report.csv)
+        extra_fields: Extra CSV columns (see csv_report.page_to_row)
+    """
+    with open_report_sink(filename, extra_fields=extra_fields) as sink:
+        for page in page_data.values():
+            if page is not None:
+                sink.write(page)
+
+    if isinstance(sink, ColumnarReportSink):
+        filename = ", ".join(sink.paths.values())
+    print(f"\nReport written to: {filename}")
+    print(f"Total pages exported: {sink.count}")
@@ -0,0 +1,45 @@
+import random
+
+
+class RetryPolicy:
+    def __init__(self, max_attempts=3, base_delay=0.5, max_delay=30.0, budget=100):
+        """
+        When and how long to wait before fetching a failed page again.
+
+        Args:
+            max_attempts: Total tries per page, including the first
+            base_delay: Seconds before the first retry (doubled each time)
+            max_delay: Upper bound on any single backoff
+            budget: Retries allowed across the whole crawl, so a dying site
+                can't turn every page into max_attempts requests
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget
+        self.retries = 0
+
+    def should_retry(self, error, attempt):
+        """
+        Decide whether to retry after attempt (0-based) failed with error.
+
+        Consumes one unit of the retry budget when it says yes.
+        """
+        if not getattr(error, "retryable", False):
+            return False
+        if attempt + 1 >= self.max_attempts or self.retries >= self.budget:
+            return False
+        self.retries += 1
+        return True
+
+    def delay(self, error, attempt):
+        """
+        Backoff before the next try: full-jitter exponential, but never
+        shorter than a Retry-After the server sent.
+        """
+        ceiling = min(self.max_delay, self.base_delay * 2 ** attempt)
+        delay = random.uniform(0, ceiling)
+        retry_after = getattr(error, "retry_after", None)
+        if retry_after:
+            delay = max(delay, min(retry_after, self.max_delay))
+        return delay
@@ -0,0 +1,306 @@
+import queue
+import asyncio
+import multiprocessing
+from hashlib import blake2b
+from collections import Counter
+from async_crawl import AsyncCrawler
+from visited import create_visited_set
+from politeness import PolitenessScheduler
+from urlnorm import URLNormalizer
+
+PARTITIONS = ("url", "host")
+
+# Seconds between the coordinator's checks for a finished crawl
+POLL_INTERVAL = 0.02
+
+
+def shard_for(key, shards):
+    """Map a partition key to a shard number, the same way in every process."""
+    digest = blake2b(key.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") % shards
+
+
+def owner_of(url, normalized_url, shards, partition, normalizer):
+    """Return the shard that crawls url."""
+    if partition == "host":
+        return shard_for(normalizer.host(url), shards)
+    return shard_for(normalized_url, shards)
+
+
+class ShardRouter:
+    """
+    Sends links to the shard that owns them and tracks outstanding work.
+
+    Every page on the frontier and every batch of links in flight between
+    shards counts as one unit of outstanding work in a counter shared by
+    all processes. Work is added before the work that produced it is
+    finished, so the counter only reaches zero when the whole crawl is done.
+    """
+
+    def __init__(self, shard_id, shards, inboxes, outstanding, admitted,
+                 max_pages, partition="url", normalizer=None):
+        self.shard_id = shard_id
+        self.shards = shards
+        self.inboxes = inboxes
+        self.outstanding = outstanding
+        self.admitted = admitted
+        self.max_pages = max_pages
+        self.partition = partition
+        self.normalizer = normalizer
+        # Links bound for each other shard, sent once the page is done
+        self.outgoing = [[] for _ in range(shards)]
+        # Keys already forwarded, so popular links cross the pipe once
+        self.sent = set()
+        self.forwarded = 0
+
+    def route(self, url, normalized_url, depth=0):
+        """
+        Claim a link for another shard.
+
+        Args:
+            url: The link
+            normalized_url: Its key
+            depth: Clicks from the start page, forwarded with the link
+
+        Returns:
+            True if the link belongs elsewhere (and will be forwarded),
+            False if this shard should crawl it
+        """
+        owner = owner_of(url, normalized_url, self.shards, self.partition, self.normalizer)
+        if owner == self.shard_id:
+            return False
+        if normalized_url not in self.sent:
+            self.sent.add(normalized_url)
+            self.outgoing[owner].append((url, normalized_url, depth))
+        return True
+
+    def send(self):
+        """Forward buffered links, one message per destination shard."""
+        for owner, links in enumerate(self.outgoing):
+            if not links:
+                continue
+            self.add_work(1)
+            self.inboxes[owner].put(links)
+            self.forwarded += len(links)
+            self.outgoing[owner] = []
+
+    def add_work(self, amount):
+        with self.outstanding.get_lock():
+            self.outstanding.value += amount
+
+    def reserve_page(self):
+        """Count a page against the crawl-wide max_pages, if there is room."""
+        with self.admitted.get_lock():
+            if self.admitted.value >= self.max_pages:
+                return False
+            self.admitted.value += 1
+            return True
+
+    def page_queued(self):
+        self.add_work(1)
+
+    def page_done(self):
+        # Links found on the page go out before the page stops counting
+        self.send()
+        self.add_work(-1)
+
+
+class ShardSink:
+    """Report sink that ships finished pages to the coordinator in batches."""
+
+    def __init__(self, results, flush_every=100):
+        self.results = results
+        self.flush_every = flush_every
+        self.buffer = []
+
+    def write(self, page):
+        self.buffer.append(page)
+        if len(self.buffer) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.results.put(("pages", self.buffer))
+            self.buffer = []
+
+
+async def read_inbox(crawler, router, inbox):
+    """Queue links forwarded by other shards until the stop message (None)."""
+    loop = asyncio.get_running_loop()
+    while True:
+        links = await loop.run_in_executor(None, inbox.get)
+        if links is None:
+            return
+        for url, normalized_url, depth in links:
+            await crawler.enqueue(url, normalized_url, depth=depth)
+        # Pages it queued are counted now, so the message can stop counting
+        router.add_work(-1)
+
+
+async def run_shard(shard_id, shards, base_url, inboxes, results, outstanding,
+                    admitted, options):
+    options = dict(options)
+    max_pages = options.pop("max_pages")
+    partition = options.pop("partition")
+    visited_kind, error_rate = options.pop("visited")
+    politeness = options.pop("politeness")
+
+    normalizer = URLNormalizer(base_url, keep_query=options.pop("keep_query"))
+    router = ShardRouter(shard_id, shards, inboxes, outstanding, admitted,
+                         max_pages, partition, normalizer)
+    sink = ShardSink(results)
+    crawler = AsyncCrawler(
+        base_url,
+        max_pages=max_pages,
+        sink=sink,
+        keep_records=False,
+        visited=create_visited_set(visited_kind, min(max_pages, 1 << 20), error_rate),
+        scheduler=PolitenessScheduler(**politeness) if politeness is not None else None,
+        normalizer=normalizer,
+        router=router,
+        **options,
+    )
+    async with crawler:
+        crawler.start_workers()
+        try:
+            await read_inbox(crawler, router, inboxes[shard_id])
+            # The coordinator only says stop once no work is outstanding
+            await crawler.queue.join()
+        finally:
+            await crawler.stop_workers()
+            sink.flush()
+
+    failed = [url for url, data in crawler.page_data.items() if data is None]
+    stats = crawler.stats()
+    stats["forwarded"] = router.forwarded
+    results.put(("done", shard_id, failed, stats))
+
+
+def shard_main(shard_id, shards, base_url, inboxes, results, outstanding, admitted, options):
+    """Process entry point: run one shard on its own event loop."""
+    asyncio.run(run_shard(shard_id, shards, base_url, inboxes, results,
+                          outstanding, admitted, options))
+
+
+def crawl_site_sharded(base_url, shards=2, max_concurrency=5, max_pages=100,
+                       partition="url", sink=None, visited="set",
+                       bloom_error_rate=0.001, politeness=None, keep_query=True,
+                       **options):
+    """
+    Crawl a site with one AsyncCrawler per process.
+
+    Each shard owns the URLs whose normalized form (or host, with
+    partition="host") hashes to it, and forwards links it finds for other
+    shards through their inbox queues. The coordinator merges finished
+    pages into one page_data dict (or streams them to sink) and stops the
+    shards once no pages or forwarded links are outstanding anywhere.
+
+    Args:
+        base_url: The starting URL to crawl
+        shards: Number of worker processes
+        max_concurrency: Concurrent requests per shard
+        max_pages: Maximum pages across all shards
+        partition: "url" (hash of the normalized URL) or "host"
+        sink: Optional report sink for pages as they finish; page_data then
+            only records failed pages
+        visited: Visited-set kind for each shard
+        bloom_error_rate: False-positive rate for visited="bloom"
+        politeness: PolitenessScheduler keyword arguments for each shard, or
+            None for no scheduler. Per-host limits are divided between the
+            shards so the site sees the same totals.
+        keep_query: Keep query strings in the dedupe key
+        **options: Other AsyncCrawler arguments (parse_mode, transport,
+            retry_policy, ...); they must be picklable
+
+    Returns:
+        (page_data, stats): pages keyed by normalized URL (None for failed
+        pages) and AsyncCrawler.stats() counters summed over the shards,
+        plus "forwarded" (links sent between shards)
+    """
+    if partition not in PARTITIONS:
+        raise ValueError(f"Unknown partition: {partition}. Expected one of {PARTITIONS}")
+
+    if politeness is not None:
+        politeness = dict(politeness)
+        per_host = politeness.get("per_host_concurrency", 2)
+        politeness["per_host_concurrency"] = max(1, per_host // shards)
+        if politeness.get("requests_per_second"):
+            politeness["requests_per_second"] /= shards
+
+    options.update(
+        max_concurrency=max_concurrency,
+        max_pages=max_pages,
+        partition=partition,
+        visited=(visited, bloom_error_rate),
+        politeness=politeness,
+        keep_query=keep_query,
+    )
+
+    context = multiprocessing.get_context("spawn")
+    inboxes = [context.Queue() for _ in range(shards)]
+    results = context.Queue()
+    outstanding = context.Value("q", 0)
+    admitted = context.Value("q", 0)
+
+    normalizer = URLNormalizer(base_url, keep_query=keep_query)
+    processes = [
+        context.Process(
+            target=shard_main,
+            args=(shard_id, shards, base_url, inboxes, results, outstanding, admitted, options),
+            daemon=True,
+        )
+        for shard_id in range(shards)
+    ]
+    for process in processes:
+        process.start()
+
+    # Seed the crawl with the start URL on the shard that owns it
+    base_key = normalizer.normalize(base_url)
+    with outstanding.get_lock():
+        outstanding.value += 1
+    inboxes[owner_of(base_url, base_key, shards, partition, normalizer)].put([(base_url, base_key, 0)])
+
+    page_data = {}
+    stats = Counter()
+    failure_counts = Counter()
+    stopping = False
+    finished = 0
+
+    def handle(message):
+        nonlocal finished
+        if message[0] == "pages":
+            for page in message[1]:
+                if sink is not None:
+                    sink.write(page)
+                else:
+                    page_data[normalizer.normalize(page["url"])] = page
+        else:
+            _, _, failed, shard_stats = message
+            for url in failed:
+                page_data[url] = None
+            failure_counts.update(shard_stats.pop("failure_counts"))
+            stats.update(shard_stats)
+            finished += 1
+
+    try:
+        while finished < shards:
+            try:
+                handle(results.get(timeout=POLL_INTERVAL))
+                continue
+            except queue.Empty:
+                pass
+            if not stopping and outstanding.value == 0:
+                stopping = True
+                for inbox in inboxes:
+                    inbox.put(None)
+            for process in processes:
+                if process.exitcode not in (None, 0):
+                    raise RuntimeError(f"Shard process exited with code {process.exitcode}")
+    finally:
+        for process in processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+
+    stats["failure_counts"] = failure_counts
+    return page_data, stats
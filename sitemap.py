@@ -0,0 +1,250 @@
+import zlib
+import asyncio
+import contextlib
+from functools import lru_cache
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+from xml.etree.ElementTree import XMLPullParser, ParseError
+import aiohttp
+from errors import FetchError, FetchTimeoutError, ConnectError, HTTPStatusError, BodyTooLargeError
+
+# The sitemaps.org limit for one uncompressed sitemap file
+DEFAULT_MAX_SITEMAP_SIZE = 50 * 1024 * 1024
+# Stop following sitemap indexes after this many files
+DEFAULT_MAX_SITEMAPS = 1000
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+class SitemapEntry:
+    """One <url> from a urlset, or one <sitemap> from a sitemap index."""
+
+    def __init__(self, loc, lastmod=None, priority=None):
+        self.loc = loc
+        # Seconds since the epoch, or None
+        self.lastmod = lastmod
+        # 0.0-1.0, or None
+        self.priority = priority
+
+
+# Sitemaps repeat the same few dates
+@lru_cache(maxsize=4096)
+def parse_lastmod(value):
+    """
+    Parse a W3C datetime (2024-05-01, 2024-05-01T10:00:00+02:00, ...).
+
+    Returns:
+        Seconds since the epoch (dates without a zone are UTC), or None if
+        the value can't be parsed
+    """
+    try:
+        parsed = datetime.fromisoformat(value.strip())
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def parse_priority(value):
+    try:
+        priority = float(value)
+    except ValueError:
+        return None
+    return min(max(priority, 0.0), 1.0)
+
+
+@lru_cache(maxsize=256)
+def local_name(tag):
+    """Strip the {namespace} from an element tag."""
+    return tag.rpartition("}")[2]
+
+
+class SitemapParser:
+    """
+    Incremental parser for sitemap and sitemap index files.
+
+    Bytes go in as they arrive (gzip is detected from the first bytes and
+    inflated on the fly) and finished entries come out. Each <url> or
+    <sitemap> element is dropped from the tree once read, so memory stays
+    flat however many URLs the file lists.
+    """
+
+    def __init__(self, max_size=DEFAULT_MAX_SITEMAP_SIZE):
+        """
+        Args:
+            max_size: Largest uncompressed size to accept (None: no limit);
+                also guards against gzip bombs
+        """
+        self.max_size = max_size
+        self.size = 0
+        self.parser = XMLPullParser(events=("start", "end"))
+        self.root = None
+        self.inflater = None
+        self.started = False
+        self.head = b""
+
+    def feed(self, data):
+        """
+        Parse the next chunk of the file.
+
+        Returns:
+            List of ("url" | "sitemap", SitemapEntry) finished so far
+
+        Raises:
+            BodyTooLargeError: The file passed max_size uncompressed
+            ParseError: The file isn't well-formed XML or valid gzip
+        """
+        if not self.started:
+            # Wait for two bytes to check for the gzip header
+            self.head += data
+            if len(self.head) < len(GZIP_MAGIC):
+                return []
+            data, self.head = self.head, b""
+            self.started = True
+            if data.startswith(GZIP_MAGIC):
+                self.inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if self.inflater is not None:
+            # Never inflate more than the size limit allows
+            limit = self.max_size - self.size + 1 if self.max_size is not None else 0
+            data = self.inflate(self.inflater.decompress, data, limit)
+        self.size += len(data)
+        if self.max_size is not None and self.size > self.max_size:
+            raise BodyTooLargeError(self.max_size)
+        self.parser.feed(data)
+        return self.read_events()
+
+    def close(self):
+        """Finish the file and return its last entries."""
+        if not self.started and self.head:
+            self.started = True
+            self.parser.feed(self.head)
+        if self.inflater is not None:
+            self.parser.feed(self.inflate(self.inflater.flush))
+        self.parser.close()
+        return self.read_events()
+
+    def inflate(self, method, *args):
+        """Call a decompressobj method, reporting corrupt gzip as a ParseError."""
+        try:
+            return method(*args)
+        except zlib.error as e:
+            raise ParseError(f"Bad gzip data: {e}")
+
+    def read_events(self):
+        entries = []
+        for event, element in self.parser.read_events():
+            if event == "start":
+                if self.root is None:
+                    self.root = element
+                continue
+            kind = local_name(element.tag)
+            if kind != "url" and kind != "sitemap":
+                continue
+            fields = {local_name(child.tag): (child.text or "").strip() for child in element}
+            loc = fields.get("loc")
+            if loc:
+                lastmod = fields.get("lastmod")
+                priority = fields.get("priority")
+                entries.append((kind, SitemapEntry(
+                    loc,
+                    parse_lastmod(lastmod) if lastmod else None,
+                    parse_priority(priority) if priority else None,
+                )))
+            # Finished entries are dropped from the tree
+            self.root.clear()
+        return entries
+
+
+class SitemapLoader:
+    def __init__(self, session, scheduler=None, max_size=DEFAULT_MAX_SITEMAP_SIZE,
+                 max_sitemaps=DEFAULT_MAX_SITEMAPS, chunk_size=65536):
+        """
+        Stream page URLs out of sitemaps, following sitemap indexes.
+
+        Args:
+            session: aiohttp session to fetch with (the crawler's)
+            scheduler: Optional PolitenessScheduler; sitemap requests
+                take a per-host slot like page requests
+            max_size: Largest uncompressed sitemap in bytes
+            max_sitemaps: Most sitemap files to read in total
+            chunk_size: Bytes read from the response at a time
+        """
+        self.session = session
+        self.scheduler = scheduler
+        self.max_size = max_size
+        self.max_sitemaps = max_sitemaps
+        self.chunk_size = chunk_size
+        self.sitemaps_read = 0
+        self.urls_found = 0
+        self.errors = 0
+
+    async def entries(self, url):
+        """
+        Yield a SitemapEntry for every page listed in url and the sitemaps
+        it indexes.
+
+        Nested indexes are followed depth-first, each file at most once.
+        A sitemap that can't be fetched or parsed is reported and skipped.
+        """
+        pending = [url]
+        seen = {url}
+        while pending and self.sitemaps_read < self.max_sitemaps:
+            sitemap_url = pending.pop()
+            self.sitemaps_read += 1
+            nested = []
+            try:
+                async for kind, entry in self.read(sitemap_url):
+                    if kind == "sitemap":
+                        if entry.loc not in seen:
+                            seen.add(entry.loc)
+                            nested.append(entry.loc)
+                    else:
+                        self.urls_found += 1
+                        yield entry
+            except (FetchError, ParseError) as e:
+                self.errors += 1
+                print(f"Error reading sitemap {sitemap_url}: {e}")
+            # Keep the index's order
+            pending.extend(reversed(nested))
+
+    async def read(self, url):
+        """Fetch one sitemap file and yield ("url" | "sitemap", SitemapEntry) as it parses."""
+        slot = self.scheduler.slot(url) if self.scheduler is not None else contextlib.nullcontext()
+        parser = SitemapParser(self.max_size)
+        try:
+            async with slot, self.session.get(url) as response:
+                if response.status >= 400:
+                    raise HTTPStatusError(response.status, response.headers)
+                async for chunk in response.content.iter_chunked(self.chunk_size):
+                    for item in parser.feed(chunk):
+                        yield item
+            for item in parser.close():
+                yield item
+        except asyncio.TimeoutError:
+            raise FetchTimeoutError("Request timeout")
+        except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError) as e:
+            raise ConnectError(f"Request failed: {e}")
+        except aiohttp.ClientError as e:
+            raise FetchError(f"Request failed: {e}")
+
+
+async def discover_sitemaps(session, base_url):
+    """
+    Find a site's sitemaps from the Sitemap: lines in its robots.txt.
+
+    Returns:
+        The listed sitemap URLs, or [origin/sitemap.xml] if there are none
+    """
+    parsed = urlsplit(base_url)
+    origin = f"{parsed.scheme}://{parsed.netloc}"
+    sitemaps = []
+    try:
+        async with session.get(origin + "/robots.txt") as response:
+            if response.status < 400:
+                for line in (await response.text(errors="replace")).splitlines():
+                    name, _, value = line.partition(":")
+                    if name.strip().lower() == "sitemap" and value.strip():
+                        sitemaps.append(value.strip())
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        pass
+    return sitemaps or [origin + "/sitemap.xml"]
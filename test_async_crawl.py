@@ -0,0 +1,318 @@
+import os
+import asyncio
+import tempfile
+import unittest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from async_crawl import AsyncCrawler, crawl_site_async
+from visited import create_visited_set
+from checkpoint import CheckpointStore
+from http_cache import ResponseCache
+from retry import RetryPolicy
+from transport import TransportConfig
+from errors import BodyTooLargeError, ContentTypeError
+import crawl
+
+
+def make_site(pages):
+    """Build an app serving {path: html} pages as text/html."""
+    async def handle(request):
+        html = pages.get(request.path)
+        if html is None:
+            raise web.HTTPNotFound()
+        return web.Response(text=html, content_type="text/html")
+
+    app = web.Application()
+    app.router.add_get("/{tail:.*}", handle)
+    return app
+
+
+class TestAsyncCrawler(unittest.IsolatedAsyncioTestCase):
+    async def start_site(self, pages):
+        server = TestServer(make_site(pages))
+        await server.start_server()
+        self.addAsyncCleanup(server.close)
+        return str(server.make_url("/"))
+
+    async def test_crawl_follows_links_once(self):
+        base_url = await self.start_site({
+            "/": '<h1>Home</h1><a href="/a">A</a><a href="/b">B</a><a href="/a#top">A</a>',
+            "/a": '<p>Page A</p><a href="/">Home</a><a href="/b">B</a>',
+            "/b": '<p>Page B</p><a href="https://external.com/">Out</a>',
+        })
+        page_data = await crawl_site_async(base_url, max_concurrency=3, max_pages=10)
+        host = base_url.split("://")[1].rstrip("/")
+        self.assertEqual(sorted(page_data), [host, f"{host}/a", f"{host}/b"])
+        self.assertEqual(page_data[f"{host}/a"]["first_paragraph"], "Page A")
+
+    async def test_crawl_marks_failed_pages(self):
+        base_url = await self.start_site({
+            "/": '<a href="/missing">Missing</a>',
+        })
+        page_data = await crawl_site_async(base_url, max_concurrency=2, max_pages=10)
+        host = base_url.split("://")[1].rstrip("/")
+        self.assertIsNone(page_data[f"{host}/missing"])
+
+    async def test_crawl_stops_at_max_pages(self):
+        hub = "".join(f'<a href="/p{i}">{i}</a>' for i in range(2000))
+        pages = {"/": hub}
+        pages.update({f"/p{i}": "<p>leaf</p>" for i in range(2000)})
+        base_url = await self.start_site(pages)
+        async with AsyncCrawler(base_url, max_concurrency=4, max_pages=25) as crawler:
+            page_data = await crawler.crawl()
+            self.assertEqual(crawler.queue.qsize(), 0)
+        self.assertEqual(len(page_data), 25)
+        self.assertTrue(all(data is not None for data in page_data.values()))
+
+    async def test_crawl_streams_to_sink_without_records(self):
+        base_url = await self.start_site({
+            "/": '<h1>Home</h1><a href="/a">A</a>',
+            "/a": '<h1>A</h1>',
+        })
+
+        class ListSink:
+            def __init__(self):
+                self.pages = []
+
+            def write(self, page):
+                self.pages.append(page)
+
+            def flush(self):
+                pass
+
+        sink = ListSink()
+        page_data = await crawl_site_async(
+            base_url, max_concurrency=2, max_pages=10, sink=sink, keep_records=False
+        )
+        self.assertEqual(sorted(page["h1"] for page in sink.pages), ["A", "Home"])
+        self.assertEqual(page_data, {})
+
+    async def test_crawl_with_compact_visited_sets(self):
+        hub = "".join(f'<a href="/p{i}">{i}</a><a href="/p{i}/">{i}</a>' for i in range(50))
+        pages = {"/": hub}
+        pages.update({f"/p{i}": '<a href="/">Home</a>' for i in range(50)})
+        base_url = await self.start_site(pages)
+        for kind in ("fingerprint", "bloom"):
+            # A tiny error rate keeps Bloom false positives out of the count
+            visited = create_visited_set(kind, capacity=16, error_rate=1e-9)
+            async with AsyncCrawler(base_url, max_concurrency=4, max_pages=100, visited=visited) as crawler:
+                page_data = await crawler.crawl()
+            self.assertEqual(len(page_data), 51)
+            self.assertEqual(crawler.pages_crawled, 51)
+
+    async def test_crawl_resumes_from_checkpoint(self):
+        hits = []
+        release = asyncio.Event()
+        pages = {
+            "/": '<a href="/a">A</a><a href="/slow">Slow</a>',
+            "/a": '<h1>A</h1><a href="/b">B</a>',
+            "/b": '<h1>B</h1>',
+            "/slow": '<h1>Slow</h1>',
+        }
+
+        async def handle(request):
+            hits.append(request.path)
+            if request.path == "/slow":
+                await release.wait()
+            return web.Response(text=pages[request.path], content_type="text/html")
+
+        app = web.Application()
+        app.router.add_get("/{tail:.*}", handle)
+        server = TestServer(app)
+        await server.start_server()
+        self.addAsyncCleanup(server.close)
+        base_url = str(server.make_url("/"))
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "state.db")
+
+        # First run is interrupted while /slow is still in flight
+        with CheckpointStore(path) as checkpoint:
+            async with AsyncCrawler(base_url, max_concurrency=2, checkpoint=checkpoint) as crawler:
+                with self.assertRaises(asyncio.TimeoutError):
+                    await asyncio.wait_for(crawler.crawl(), timeout=0.5)
+
+        release.set()
+        hits.clear()
+        with CheckpointStore(path) as checkpoint:
+            async with AsyncCrawler(base_url, max_concurrency=2, checkpoint=checkpoint,
+                                    resume=True) as crawler:
+                page_data = await crawler.crawl()
+
+        self.assertEqual(hits, ["/slow"])
+        self.assertEqual(sorted(data["h1"] for data in page_data.values()), ["", "A", "B", "Slow"])
+
+    async def test_resumed_strategy_crawl_keeps_its_page_budget(self):
+        pages = {"/": "".join(f'<a href="/{n}">{n}</a>' for n in range(1, 10))}
+        pages.update({f"/{n}": f"<h1>{n}</h1>" for n in range(1, 10)})
+        base_url = await self.start_site(pages)
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "state.db")
+        crawled = []
+        for resume in (False, True):
+            with CheckpointStore(path) as checkpoint:
+                async with AsyncCrawler(base_url, 2, 4, checkpoint=checkpoint, resume=resume,
+                                        strategy="bfs", progress_interval=None) as crawler:
+                    page_data = await crawler.crawl()
+                    crawled.append(crawler.pages_crawled)
+        # The first run spent the whole budget; the resumed one fetches nothing
+        self.assertEqual(crawled, [4, 4])
+        self.assertEqual(sum(data is not None for data in page_data.values()), 4)
+
+    async def test_recrawl_uses_conditional_get_cache(self):
+        pages = {
+            "/": '<h1>Home</h1><a href="/a">A</a>',
+            "/a": '<h1>A</h1><a href="/">Home</a>',
+        }
+        statuses = []
+
+        async def handle(request):
+            etag = f'"{hash(pages[request.path])}"'
+            if request.headers.get("If-None-Match") == etag:
+                statuses.append(304)
+                return web.Response(status=304, headers={"ETag": etag})
+            statuses.append(200)
+            return web.Response(text=pages[request.path], content_type="text/html",
+                                headers={"ETag": etag})
+
+        app = web.Application()
+        app.router.add_get("/{tail:.*}", handle)
+        server = TestServer(app)
+        await server.start_server()
+        self.addAsyncCleanup(server.close)
+        base_url = str(server.make_url("/"))
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "cache.db")
+
+        with ResponseCache(path) as cache:
+            first = await crawl_site_async(base_url, cache=cache)
+        with ResponseCache(path) as cache:
+            second = await crawl_site_async(base_url, cache=cache)
+            self.assertEqual((cache.hits, cache.requests), (2, 2))
+            self.assertGreater(cache.bytes_saved, 0)
+
+        self.assertEqual(statuses, [200, 200, 304, 304])
+        self.assertEqual(first, second)
+
+    async def start_flaky_site(self, failures):
+        """Serve pages that answer 503 for their first failures[path] requests."""
+        hits = []
+        pages = {
+            "/": '<a href="/flaky">Flaky</a><a href="/down">Down</a><a href="/gone">Gone</a>',
+            "/flaky": '<h1>Flaky</h1>',
+            "/down": '<h1>Down</h1>',
+        }
+
+        async def handle(request):
+            hits.append(request.path)
+            if request.path not in pages:
+                raise web.HTTPNotFound()
+            if failures.get(request.path, 0):
+                failures[request.path] -= 1
+                raise web.HTTPServiceUnavailable()
+            return web.Response(text=pages[request.path], content_type="text/html")
+
+        app = web.Application()
+        app.router.add_get("/{tail:.*}", handle)
+        server = TestServer(app)
+        await server.start_server()
+        self.addAsyncCleanup(server.close)
+        return str(server.make_url("/")), hits
+
+    async def test_transient_errors_are_retried(self):
+        base_url, hits = await self.start_flaky_site({"/flaky": 1, "/down": 100})
+        policy = RetryPolicy(max_attempts=3, base_delay=0.01)
+        async with AsyncCrawler(base_url, max_concurrency=3, retry_policy=policy) as crawler:
+            page_data = await crawler.crawl()
+        host = base_url.split("://")[1].rstrip("/")
+
+        self.assertEqual(page_data[f"{host}/flaky"]["h1"], "Flaky")
+        self.assertIsNone(page_data[f"{host}/down"])
+        self.assertIsNone(page_data[f"{host}/gone"])
+        # 404 is permanent; 503 is tried max_attempts times
+        self.assertEqual(hits.count("/gone"), 1)
+        self.assertEqual(hits.count("/down"), 3)
+        self.assertEqual(hits.count("/flaky"), 2)
+        self.assertEqual(policy.retries, 3)
+        self.assertEqual(dict(crawler.failure_counts), {"http_status": 2})
+        # Finished pages don't keep their retry counts
+        self.assertEqual(crawler.attempts, {})
+
+    async def test_retry_budget_limits_retries(self):
+        base_url, hits = await self.start_flaky_site({"/flaky": 100, "/down": 100})
+        policy = RetryPolicy(max_attempts=10, base_delay=0.01, budget=2)
+        async with AsyncCrawler(base_url, max_concurrency=3, retry_policy=policy) as crawler:
+            await crawler.crawl()
+        self.assertEqual(hits.count("/flaky") + hits.count("/down"), 4)
+        self.assertEqual(crawler.pages_failed, 3)
+
+    async def start_body_site(self):
+        """Serve a normal page, an oversized page, a chunked oversized page and an image."""
+        reads = []
+        big = "<p>" + "x" * 5000 + "</p>"
+
+        async def chunked(request):
+            response = web.StreamResponse(headers={"Content-Type": "text/html"})
+            await response.prepare(request)
+            for _ in range(10):
+                await response.write(b"<p>" + b"y" * 1000 + b"</p>")
+            return response
+
+        async def image(request):
+            reads.append(request.path)
+            return web.Response(body=b"\x89PNG" * 1000, content_type="image/png")
+
+        app = web.Application()
+        app.router.add_get("/", lambda request: web.Response(
+            text='<h1>Home</h1><a href="/big">Big</a><a href="/chunked">C</a><a href="/logo.png">L</a>',
+            content_type="text/html"))
+        app.router.add_get("/big", lambda request: web.Response(text=big, content_type="text/html"))
+        app.router.add_get("/chunked", chunked)
+        app.router.add_get("/logo.png", image)
+        server = TestServer(app)
+        await server.start_server()
+        self.addAsyncCleanup(server.close)
+        return str(server.make_url("/"))
+
+    async def test_body_size_cap(self):
+        base_url = await self.start_body_site()
+        transport = TransportConfig(max_body_size=4096, chunk_size=512)
+        async with AsyncCrawler(base_url, transport=transport) as crawler:
+            with self.assertRaises(BodyTooLargeError):
+                await crawler.get_html(base_url + "big")
+            with self.assertRaises(BodyTooLargeError):
+                await crawler.get_html(base_url + "chunked")
+            with self.assertRaises(ContentTypeError):
+                await crawler.get_html(base_url + "logo.png")
+            page_data = await crawler.crawl()
+        self.assertEqual(crawler.failure_counts["body_too_large"], 2)
+        self.assertEqual(crawler.failure_counts["content_type"], 1)
+        self.assertEqual(sum(data is not None for data in page_data.values()), 1)
+
+    async def test_sync_get_html_body_size_cap(self):
+        base_url = await self.start_body_site()
+        html = await asyncio.to_thread(crawl.get_html, base_url, 4096)
+        self.assertIn("<h1>Home</h1>", html)
+        with self.assertRaises(BodyTooLargeError):
+            await asyncio.to_thread(crawl.get_html, base_url + "chunked", 4096)
+        with self.assertRaises(ContentTypeError):
+            await asyncio.to_thread(crawl.get_html, base_url + "logo.png")
+
+    async def test_stream_parse_mode_matches_inline(self):
+        hub = "".join(f'<a href="/p{i}">{i}</a>' for i in range(20))
+        pages = {"/": "<main><h1>Hub</h1><p>" + "text " * 20000 + "</p></main>" + hub}
+        pages.update({f"/p{i}": f'<h1>Page {i}</h1><img src="/i{i}.png">' for i in range(20)})
+        base_url = await self.start_site(pages)
+        inline = await crawl_site_async(base_url, max_pages=50)
+        streamed = await crawl_site_async(base_url, max_pages=50, parse_mode="stream")
+        self.assertEqual(len(streamed), 21)
+        self.assertEqual(inline, streamed)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import os
+import tempfile
+import unittest
+import contextlib
+import io
+from aiohttp.test_utils import TestServer
+from batch_crawl import BatchCrawler, SiteSeed, read_seeds, write_sites_summary
+from main import parse_args
+from test_async_crawl import make_site
+
+
+def chain(length):
+    """A site of length pages, each linking to the next."""
+    pages = {"/": '<a href="/1">1</a>'}
+    for n in range(1, length):
+        pages[f"/{n}"] = f'<h1>Page {n}</h1><a href="/{n + 1}">Next</a>'
+    pages[f"/{length - 1}"] = "<h1>Last page</h1>"
+    return pages
+
+
+class TestReadSeeds(unittest.TestCase):
+    def test_limits_default_per_line(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "seeds.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("# customer sites\nhttps://a.com/\n\nhttps://b.com/ 2  # slow\n"
+                        "https://c.com/ 8 500\n")
+            seeds = read_seeds(path, max_concurrency=4, max_pages=50)
+            self.assertEqual([(seed.url, seed.max_concurrency, seed.max_pages) for seed in seeds],
+                             [("https://a.com/", 4, 50), ("https://b.com/", 2, 50),
+                              ("https://c.com/", 8, 500)])
+
+            for line in ("a.com 2", "https://a.com/ two", "https://a.com/ 1 2 3"):
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(line + "\n")
+                with self.assertRaises(ValueError):
+                    read_seeds(path)
+
+    def test_seeds_command_line(self):
+        args = parse_args(["--seeds", "seeds.txt", "3", "40"])
+        self.assertEqual((args.base_url, args.max_concurrency, args.max_pages), (None, 3, 40))
+        for argv in (["--seeds", "seeds.txt", "--resume"],
+                     ["--seeds", "seeds.txt", "--checkpoint", "crawl.db"],
+                     ["--seeds", "seeds.txt", "--shards", "2"]):
+            with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+                parse_args(argv)
+
+
+class TestBatchCrawler(unittest.IsolatedAsyncioTestCase):
+    async def start_site(self, pages):
+        server = TestServer(make_site(pages))
+        await server.start_server()
+        self.addAsyncCleanup(server.close)
+        return str(server.make_url("/"))
+
+    async def test_sites_share_a_session_and_keep_their_own_budgets(self):
+        seeds = [
+            SiteSeed(await self.start_site(chain(20)), max_concurrency=2, max_pages=5),
+            SiteSeed(await self.start_site(chain(3)), max_concurrency=1, max_pages=100),
+            # Nothing listens here; the site fails without stopping the others
+            SiteSeed("http://127.0.0.1:1/", max_concurrency=1, max_pages=100),
+        ]
+        finished = []
+
+        def site_done(result, crawler):
+            self.assertIs(crawler.session, batch.session)
+            finished.append((result.seed, len(crawler.page_data)))
+
+        async with BatchCrawler(seeds, max_sites=3, on_site_done=site_done) as batch:
+            results = await batch.crawl()
+        self.assertTrue(batch.session.closed)
+
+        pages = {seed.url: count for seed, count in finished}
+        self.assertEqual(pages, {seeds[0].url: 5, seeds[1].url: 3, seeds[2].url: 1})
+        self.assertEqual([result.seed for result in results], [seed for seed, _ in finished])
+        self.assertEqual(batch.pages_crawled, 8)
+        by_url = {result.seed.url: result for result in results}
+        self.assertEqual(by_url[seeds[2].url].stats["pages_failed"], 1)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "sites.csv")
+            write_sites_summary(results, path)
+            with open(path, encoding="utf-8") as f:
+                self.assertEqual(len(f.read().splitlines()), 4)
+
+    async def test_max_sites_limits_sites_in_flight(self):
+        seeds = [SiteSeed(await self.start_site(chain(4)), max_pages=10) for _ in range(4)]
+        order = []
+        async with BatchCrawler(seeds, max_sites=1,
+                                on_site_done=lambda result, crawler: order.append(result.seed)) as batch:
+            await batch.crawl()
+        # One at a time, so they finish in file order
+        self.assertEqual(order, seeds)
+        self.assertEqual(batch.pages_crawled, 16)
+
+    async def test_site_that_raises_is_reported(self):
+        seeds = [SiteSeed(await self.start_site(chain(2)))]
+
+        def site_options(seed):
+            raise ValueError("bad options")
+
+        async with BatchCrawler(seeds, site_options=site_options) as batch:
+            results = await batch.crawl()
+        self.assertEqual(results[0].error, "bad options")
+        self.assertEqual(batch.sites_failed, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
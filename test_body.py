@@ -0,0 +1,50 @@
+import codecs
+import unittest
+from body import BodyDecoder, content_type_charset, sniff_charset, decode_body, SNIFF_BYTES
+
+
+class TestCharsetDetection(unittest.TestCase):
+    def test_content_type_charset(self):
+        self.assertEqual(content_type_charset("text/html; charset=ISO-8859-1"), "iso8859-1")
+        self.assertEqual(content_type_charset('text/html; charset="utf-8"'), "utf-8")
+        self.assertIsNone(content_type_charset("text/html"))
+        self.assertIsNone(content_type_charset("text/html; charset=bogus"))
+
+    def test_sniff_meta_charset(self):
+        self.assertEqual(sniff_charset(b'<meta charset="windows-1252">'), "cp1252")
+        self.assertEqual(
+            sniff_charset(b'<meta http-equiv="Content-Type" content="text/html; charset=koi8-r">'),
+            "koi8-r",
+        )
+        self.assertIsNone(sniff_charset(b"<p>no declaration</p>"))
+
+
+class TestBodyDecoder(unittest.TestCase):
+    def test_header_charset_wins_over_meta(self):
+        body = '<meta charset="utf-8"><p>café</p>'.encode("latin-1")
+        self.assertEqual(decode_body(body, "text/html; charset=latin-1"),
+                         '<meta charset="utf-8"><p>café</p>')
+
+    def test_meta_charset_without_header(self):
+        body = '<meta charset="windows-1252"><p>café</p>'.encode("cp1252")
+        self.assertEqual(decode_body(body, "text/html"), '<meta charset="windows-1252"><p>café</p>')
+
+    def test_bom_wins(self):
+        body = codecs.BOM_UTF8 + "<p>café</p>".encode("utf-8")
+        self.assertEqual(decode_body(body, "text/html; charset=latin-1"), "<p>café</p>")
+
+    def test_chunks_split_multibyte_characters(self):
+        text = "<p>" + "é" * SNIFF_BYTES + "</p>"
+        body = text.encode("utf-8")
+        decoder = BodyDecoder("text/html")
+        parts = [decoder.feed(body[i:i + 7]) for i in range(0, len(body), 7)]
+        parts.append(decoder.close())
+        self.assertEqual("".join(parts), text)
+        self.assertEqual(decoder.encoding, "utf-8")
+
+    def test_invalid_bytes_are_replaced(self):
+        self.assertEqual(decode_body(b"<p>\xff</p>", "text/html; charset=utf-8"), "<p>�</p>")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,5 @@
 import unittest
+from bs4 import BeautifulSoup
 from crawl import normalize_url, get_h1_from_html, get_first_paragraph_from_html, get_urls_from_html, get_images_from_html, extract_page_data
 
 class TestCrawl(unittest.TestCase):
@@ -144,6 +145,13 @@ class TestCrawl(unittest.TestCase):
         ]
         self.assertEqual(actual, expected)
 
+    def test_get_urls_from_html_drops_repeated_links(self):
+        input_url = "https://blog.boot.dev"
+        input_body = '<a href="/b">B</a><a href="/a">A</a><a href="/b">B</a><a href="https://blog.boot.dev/a">A</a>'
+        actual = get_urls_from_html(input_body, input_url)
+        expected = ["https://blog.boot.dev/b", "https://blog.boot.dev/a"]
+        self.assertEqual(actual, expected)
+
     def test_get_urls_from_html_no_href(self):
         input_url = "https://blog.boot.dev"
         input_body = '<html><body><a>No href attribute</a></body></html>'
@@ -270,6 +278,49 @@ class TestCrawl(unittest.TestCase):
         }
         self.assertEqual(actual, expected)
 
+    # --- Single-pass parser matches the BeautifulSoup tree ---
+    def assert_matches_soup(self, input_body):
+        soup = BeautifulSoup(input_body, 'html.parser')
+        h1_tag = soup.find('h1')
+        main_tag = soup.find('main')
+        p_tag = main_tag.find('p') if main_tag else None
+        if p_tag is None:
+            p_tag = soup.find('p')
+        expected = {
+            "h1": h1_tag.get_text(strip=True) if h1_tag else "",
+            "first_paragraph": p_tag.get_text(strip=True) if p_tag else "",
+        }
+        data = extract_page_data(input_body, "https://site.com")
+        actual = {"h1": data["h1"], "first_paragraph": data["first_paragraph"]}
+        self.assertEqual(actual, expected)
+
+    def test_extract_page_data_nested_inline_tags(self):
+        self.assert_matches_soup('<h1>Hello <b>big</b> world</h1><p>a &amp; <i>b</i></p>')
+
+    def test_extract_page_data_unclosed_paragraphs(self):
+        self.assert_matches_soup('<p>one<p>two</p>three</p>four')
+
+    def test_extract_page_data_implicitly_closed_paragraph(self):
+        self.assert_matches_soup('<main><div><p>inside</div>after</p></main><p>late</p>')
+
+    def test_extract_page_data_skips_script_text(self):
+        self.assert_matches_soup('<p>x<script>var a = "<p>";</script><style>p{}</style>y</p>')
+
+    def test_extract_page_data_main_without_paragraph(self):
+        self.assert_matches_soup('<p>outside</p><main><br/><h1>t</h1></main><main><p>second</p></main>')
+
+    def test_extract_page_data_stray_void_end_tags(self):
+        # Only as many </br> as there were <br> are swallowed
+        self.assert_matches_soup('<p>a<br>b<br></br>c</br></p><p>d</p>'
+                                 + '<img src="x.png">' * 200 + '<h1>t<br></h1>')
+
+    def test_get_urls_from_html_bare_href(self):
+        input_url = "https://blog.boot.dev/a"
+        input_body = '<a href>self</a><a HREF="/b"></a><a href="/c"/>'
+        actual = get_urls_from_html(input_body, input_url)
+        expected = ["https://blog.boot.dev/a", "https://blog.boot.dev/b", "https://blog.boot.dev/c"]
+        self.assertEqual(actual, expected)
+
 if __name__ == "__main__":
     unittest.main()
 
@@ -0,0 +1,173 @@
+import os
+import random
+import tempfile
+from hashlib import blake2b
+import unittest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from async_crawl import AsyncCrawler
+from crawl import extract_page_data
+from distributed_crawl import crawl_with_frontier
+from frontier_backends import SqliteFrontier
+from dedup import (
+    DuplicateDetector, DuplicateIndex, hamming_distance, shingles, simhash,
+    text_fingerprint, url_pattern, FINGERPRINT_BITS,
+)
+
+WORDS = ("crawler page link report queue fetch parse host index text body "
+         "header footer menu price item list sort order cart search").split()
+
+
+def sentence(rng, length=12):
+    return " ".join(rng.choice(WORDS) for _ in range(length)) + "."
+
+
+def naive_simhash(features):
+    """Reference SimHash with one vote counter per bit."""
+    votes = [0] * FINGERPRINT_BITS
+    for feature in features:
+        value = int.from_bytes(blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+        for bit in range(FINGERPRINT_BITS):
+            votes[bit] += 1 if (value >> bit) & 1 else -1
+    return sum(1 << bit for bit, vote in enumerate(votes) if vote > 0)
+
+
+def make_query_site(pages):
+    """Like test_async_crawl.make_site, but keyed by path and query."""
+    async def handle(request):
+        html = pages.get(request.path_qs)
+        if html is None:
+            raise web.HTTPNotFound()
+        return web.Response(text=html, content_type="text/html")
+
+    app = web.Application()
+    app.router.add_get("/{tail:.*}", handle)
+    return app
+
+
+class TestFingerprints(unittest.TestCase):
+    def test_simhash_matches_reference(self):
+        rng = random.Random(1)
+        features = shingles(" ".join(sentence(rng) for _ in range(50)))
+        self.assertEqual(simhash(features), naive_simhash(features))
+        self.assertIsNone(simhash(set()))
+
+    def test_near_duplicates_are_close(self):
+        rng = random.Random(2)
+        paragraphs = [sentence(rng, 30) for _ in range(20)]
+        original = text_fingerprint(" ".join(paragraphs))
+        # A listing in another order only changes the shingles at the seams
+        reordered = paragraphs[10:] + paragraphs[:10]
+        self.assertLessEqual(hamming_distance(original, text_fingerprint(" ".join(reordered))), 3)
+        different = paragraphs[:10] + [sentence(rng, 30) for _ in range(10)]
+        self.assertGreater(hamming_distance(original, text_fingerprint(" ".join(different))), 3)
+
+    def test_extract_page_data_fingerprint_is_opt_in(self):
+        html = "<h1>Title</h1><script>var x = 1;</script><p>Some visible text here</p>"
+        self.assertNotIn("fingerprint", extract_page_data(html, "https://example.com/"))
+        data = extract_page_data(html, "https://example.com/", fingerprint=True)
+        self.assertEqual(data["fingerprint"], text_fingerprint("Title Some visible text here"))
+
+    def test_url_pattern(self):
+        self.assertEqual(url_pattern("https://Example.com/item/12?sort=price&sid=ab"),
+                         "example.com/item/{n}?sid&sort")
+        self.assertEqual(url_pattern("https://example.com/item/7?sid=cd&sort=name"),
+                         "example.com/item/{n}?sid&sort")
+
+
+class TestDuplicateIndex(unittest.TestCase):
+    def test_finds_fingerprints_within_distance(self):
+        index = DuplicateIndex(max_distance=3)
+        rng = random.Random(3)
+        stored = [rng.getrandbits(FINGERPRINT_BITS) for _ in range(200)]
+        for number, fingerprint in enumerate(stored):
+            index.add(fingerprint, number)
+        self.assertEqual(len(index), 200)
+        # Flip three bits spread over different blocks
+        self.assertEqual(index.find(stored[42] ^ (1 | 1 << 20 | 1 << 63)), 42)
+        self.assertIsNone(index.find(stored[42] ^ 0b1111))
+
+
+class TestDuplicateDetector(unittest.TestCase):
+    def test_demotes_patterns_that_keep_duplicating(self):
+        detector = DuplicateDetector(demote_after=3, demote_ratio=0.5)
+        self.assertIsNone(detector.check("https://a.com/list?page=1", 0xFF00, 1000))
+        self.assertIsNone(detector.check("https://a.com/item/1", 0x00FF, 1000))
+        for page in range(2, 5):
+            self.assertFalse(detector.is_demoted("https://a.com/list?page=9"))
+            self.assertEqual(detector.check(f"https://a.com/list?page={page}", 0xFF01, 500),
+                             "https://a.com/list?page=1")
+        self.assertTrue(detector.is_demoted("https://a.com/list?page=9"))
+        self.assertFalse(detector.is_demoted("https://a.com/item/2"))
+
+        summary = detector.summary(never_fetched=4)
+        self.assertEqual(summary["duplicates"], 3)
+        self.assertEqual(summary["duplicate_bytes"], 1500)
+        self.assertEqual(summary["demoted_patterns"], ["a.com/list?page"])
+        self.assertEqual(summary["bytes_saved"], 2000)
+
+
+class TestDuplicateCrawl(unittest.IsolatedAsyncioTestCase):
+    async def start_site(self):
+        rng = random.Random(4)
+        listing = " ".join(f"<p>{sentence(rng, 20)}</p>" for _ in range(10))
+        pages = {"/": '<a href="/list?p=1">List</a><a href="/item/1">Item</a>'}
+        for n in range(1, 11):
+            # Every list page shows the same items
+            pages[f"/list?p={n}"] = f'<h1>Items</h1>{listing}<a href="/list?p={n + 1}">Next</a>'
+        for n in range(1, 16):
+            pages[f"/item/{n}"] = (f"<h1>Item {n}</h1><p>{sentence(rng, 40)}</p>"
+                                   f'<a href="/item/{n + 1}">Next</a>')
+        # The last pages link nowhere
+        pages["/list?p=10"] = f"<h1>Items</h1>{listing}"
+        pages["/item/15"] = pages["/item/15"].split("<a")[0]
+        server = TestServer(make_query_site(pages))
+        await server.start_server()
+        self.addAsyncCleanup(server.close)
+        return str(server.make_url("/"))
+
+    async def crawl(self, max_pages):
+        base_url = await self.start_site()
+        detector = DuplicateDetector(demote_after=3, demote_ratio=0.5)
+        async with AsyncCrawler(base_url, 1, max_pages, duplicates=detector,
+                                progress_interval=None) as crawler:
+            page_data = await crawler.crawl()
+        host = base_url.split("://")[1].rstrip("/")
+        return page_data, crawler, detector, host
+
+    async def test_duplicates_are_flagged_and_deferred(self):
+        page_data, crawler, detector, host = await self.crawl(max_pages=20)
+        self.assertEqual(page_data[f"{host}/list?p=1"]["duplicate_of"], "")
+        self.assertEqual(page_data[f"{host}/list?p=2"]["duplicate_of"], f"http://{host}/list?p=1")
+        self.assertEqual(page_data[f"{host}/item/2"]["duplicate_of"], "")
+        # Once /list?p=4 demoted the pattern, the items used up the budget
+        self.assertTrue(all(f"{host}/item/{n}" in page_data for n in range(1, 16)))
+        self.assertNotIn(f"{host}/list?p=5", page_data)
+        self.assertEqual(list(crawler.deferred), [f"{host}/list?p=5"])
+        self.assertEqual(detector.summary(len(crawler.deferred))["never_fetched"], 1)
+
+    async def test_frontier_workers_demote_patterns(self):
+        base_url = await self.start_site()
+        host = base_url.split("://")[1].rstrip("/")
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        backend = SqliteFrontier(os.path.join(directory.name, "frontier.db"), max_pages=20)
+        self.addCleanup(backend.close)
+        detector = DuplicateDetector(demote_after=3, demote_ratio=0.5)
+        await crawl_with_frontier(base_url, backend, max_concurrency=1, duplicates=detector,
+                                  poll_interval=0.05, progress_interval=None)
+        # As in a local crawl, the items come before the demoted /list?p=5
+        results = backend.results()
+        self.assertTrue(all(f"{host}/item/{n}" in results for n in range(1, 16)))
+        self.assertNotIn(f"{host}/list?p=5", results)
+        self.assertEqual(detector.demoted, {f"{host}/list?p"})
+
+    async def test_deferred_urls_are_crawled_with_budget_left(self):
+        page_data, crawler, detector, host = await self.crawl(max_pages=100)
+        self.assertEqual(len(page_data), 26)
+        self.assertEqual(crawler.deferred, {})
+        self.assertEqual(detector.duplicates, 9)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,191 @@
+import os
+import itertools
+import tempfile
+import unittest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+import extraction
+from async_crawl import AsyncCrawler
+from crawl import PageParser, extract_page_data, parse_page
+from extraction import ExtractionSpec, parse_fields, parse_selector, load_extractor
+from http_cache import ResponseCache
+from test_async_crawl import make_site
+
+
+def word_count(html, page_url):
+    return len(html.split())
+
+
+DOCUMENTS = [
+    "<h1>Title</h1><p>First</p><a href='/a'>A</a><p>Second</p>",
+    "<p>Outside</p><main><div><p>Inside <b>bold</b></p></div></main><h1>Late</h1>",
+    "<p>Before</p><main><h2>No paragraph</h2></main><p>After</p><h1>T</h1>",
+    "<main><p>Nested <p>unclosed</main><h1><span>Deep</span> title</h1>",
+    "<div><h1>Only a title<p>Para in h1</p></h1></div><main></main>",
+    "No tags at all",
+]
+
+
+class TestFieldExtraction(unittest.TestCase):
+    def test_only_requested_fields_are_computed(self):
+        html = "<h1>Title</h1><p>Text</p><a href='/a'>A</a><img src='/i.png'>"
+        data = extract_page_data(html, "https://a.com/", spec=ExtractionSpec(["outgoing_links"]))
+        self.assertEqual(data, {"url": "https://a.com/", "h1": "", "first_paragraph": "",
+                                "outgoing_links": ["https://a.com/a"], "image_urls": []})
+        data = extract_page_data(html, "https://a.com/", spec=ExtractionSpec(["h1"]))
+        self.assertEqual((data["h1"], data["outgoing_links"]), ("Title", []))
+
+    def test_early_stop_matches_full_parse(self):
+        full = [parse_page(html, "https://a.com/") for html in DOCUMENTS]
+        for fields in (["h1"], ["first_paragraph"], ["h1", "first_paragraph"]):
+            for html, expected in zip(DOCUMENTS, full):
+                parser = parse_page(html, "https://a.com/", fields=fields)
+                if "h1" in fields:
+                    self.assertEqual(parser.h1(), expected.h1(), html)
+                if "first_paragraph" in fields:
+                    self.assertEqual(parser.first_paragraph(), expected.first_paragraph(), html)
+
+    def test_parser_stops_once_fields_are_found(self):
+        parser = PageParser("https://a.com/", fields=["h1", "first_paragraph"])
+        parser.feed("<main><h1>Title</h1><p>Text</p>")
+        self.assertTrue(parser.complete)
+        # The rest of the page is never looked at
+        parser.feed("<a href='/a'>A</a><p>More</p>")
+        parser.close()
+        self.assertEqual((parser.h1(), parser.first_paragraph()), ("Title", "Text"))
+        self.assertEqual(parser.captures["p"][1], ["Text"])
+
+        # A <p> outside <main> may still be beaten by one inside a later <main>
+        parser = PageParser("https://a.com/", fields=["first_paragraph"])
+        parser.feed("<p>Text</p>")
+        self.assertFalse(parser.complete)
+        # Links and fingerprints need the whole page
+        parser = PageParser("https://a.com/", fields=["h1", "outgoing_links"])
+        parser.feed("<h1>Title</h1>")
+        self.assertFalse(parser.complete)
+
+    def test_selectors_and_extractors(self):
+        html = ("<html><head><title>Page</title></head><body>"
+                "<span class='price'> 9.99 </span><span class='price'>1</span></body></html>")
+        spec = ExtractionSpec(["h1"], selectors={"price": "css:span.price", "sku": ".sku"},
+                              extractors={"words": word_count})
+        data = extract_page_data(html, "https://a.com/", spec=spec)
+        self.assertEqual((data["price"], data["sku"], data["words"]), ("9.99", "", 5))
+        self.assertEqual(spec.names, ("price", "sku", "words"))
+
+    @unittest.skipIf(extraction.lxml_html is None, "lxml is not installed")
+    def test_xpath_selectors(self):
+        html = "<link rel='canonical' href='https://a.com/c'><h2>Sub <i>title</i></h2>"
+        spec = ExtractionSpec([], selectors={
+            "canonical": "xpath://link[@rel='canonical']/@href",
+            "subtitle": "xpath://h2",
+            "missing": "xpath://h3",
+        })
+        self.assertEqual(spec.extract(html, "https://a.com/"),
+                         {"canonical": "https://a.com/c", "subtitle": "Sub title", "missing": ""})
+
+    @unittest.skipIf(extraction.lxml_html is None, "lxml is not installed")
+    def test_xpath_on_xml_declared_and_empty_pages(self):
+        spec = ExtractionSpec(["h1"], {"subtitle": "xpath://h2"})
+        html = ('<?xml version="1.0" encoding="utf-8"?>\n'
+                '<html xmlns="http://www.w3.org/1999/xhtml">'
+                "<body><h1>Title</h1><h2>Sub</h2></body></html>")
+        data = extract_page_data(html, "https://a.com/", spec=spec)
+        self.assertEqual((data["h1"], data["subtitle"]), ("Title", "Sub"))
+        for html in ("<!-- nothing here -->", "", '<?xml version="1.0"?>'):
+            self.assertEqual(spec.extract(html, "https://a.com/"), {"subtitle": ""})
+
+    def test_invalid_specs(self):
+        for fields, selectors in ((["title"], None), (["h1"], {"h1": "h1"}),
+                                  (["h1"], {"bad": "div["}), (["h1"], {"url": "a"})):
+            with self.assertRaises(ValueError):
+                ExtractionSpec(fields, selectors)
+        self.assertEqual(parse_fields("h1, outgoing_links"), ("h1", "outgoing_links"))
+        self.assertEqual(parse_selector("title=css:h1.a[x=y]"), ("title", "css:h1.a[x=y]"))
+        self.assertEqual(load_extractor("words=test_extraction:word_count"), ("words", word_count))
+        for option in ("no-selector", "=h1"):
+            with self.assertRaises(ValueError):
+                parse_selector(option)
+        for option in ("words=test_extraction", "words=test_extraction:missing"):
+            with self.assertRaises(ValueError):
+                load_extractor(option)
+
+
+class TestExtractionCrawl(unittest.IsolatedAsyncioTestCase):
+    async def test_links_are_extracted_only_where_followed(self):
+        pages = {"/": '<h1>Home</h1><a href="/a">A</a><a href="/b">B</a>',
+                 "/a": '<h1>A</h1><a href="/c">C</a>' + "<p>filler</p>" * 1000,
+                 "/b": '<h1>B</h1><a href="/">Home</a><p class="lead">Lead</p>'}
+        server = TestServer(make_site(pages))
+        await server.start_server()
+        self.addAsyncCleanup(server.close)
+        base_url = str(server.make_url("/"))
+        host = base_url.split("://")[1].rstrip("/")
+
+        for parse_mode, spec in itertools.product(
+                ("inline", "thread", "stream"),
+                (ExtractionSpec(["h1"]), ExtractionSpec(["h1"], {"lead": "p.lead"}))):
+            if parse_mode == "stream" and spec.needs_html:
+                with self.assertRaises(ValueError):
+                    AsyncCrawler(base_url, parse_mode=parse_mode, extraction=spec)
+                continue
+            async with AsyncCrawler(base_url, 2, 10, parse_mode=parse_mode, max_depth=1,
+                                    extraction=spec, progress_interval=None) as crawler:
+                page_data = await crawler.crawl()
+            self.assertEqual(sorted(page_data), [host, f"{host}/a", f"{host}/b"])
+            # The start page's links are followed; the depth-1 pages' are not
+            self.assertEqual(len(page_data[host]["outgoing_links"]), 2)
+            for key in (f"{host}/a", f"{host}/b"):
+                self.assertEqual(page_data[key]["outgoing_links"], [])
+            self.assertEqual(page_data[f"{host}/a"]["h1"], "A")
+            if spec.needs_html:
+                self.assertEqual(page_data[f"{host}/b"]["lead"], "Lead")
+
+    async def test_cached_records_are_reused_only_for_the_same_spec(self):
+        pages = {"/": '<h1>Home</h1><a href="/a">A</a>',
+                 "/a": '<h1>A</h1><a href="/b">B</a>',
+                 "/b": '<h1>B</h1>'}
+
+        async def handle(request):
+            etag = f'"{request.path}"'
+            if request.headers.get("If-None-Match") == etag:
+                return web.Response(status=304, headers={"ETag": etag})
+            return web.Response(text=pages[request.path], content_type="text/html",
+                                headers={"ETag": etag})
+
+        app = web.Application()
+        app.router.add_get("/{tail:.*}", handle)
+        server = TestServer(app)
+        await server.start_server()
+        self.addAsyncCleanup(server.close)
+        base_url = str(server.make_url("/"))
+
+        async def crawl(cache, max_depth, spec):
+            async with AsyncCrawler(base_url, 2, 10, cache=cache, max_depth=max_depth,
+                                    extraction=spec, progress_interval=None) as crawler:
+                return await crawler.crawl()
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "cache.db")
+            with ResponseCache(path) as cache:
+                # /a is at max_depth, so it is cached without its links
+                self.assertEqual(len(await crawl(cache, 1, ExtractionSpec(["h1"]))), 2)
+            with ResponseCache(path) as cache:
+                page_data = await crawl(cache, 2, ExtractionSpec(["h1"]))
+                # The start page's record is reused; /a's is not
+                self.assertEqual((cache.hits, cache.requests), (1, 3))
+            self.assertEqual(len(page_data), 3)
+            with ResponseCache(path) as cache:
+                page_data = await crawl(cache, 2, ExtractionSpec(["h1"], {"title": "h1"}))
+                self.assertEqual(cache.hits, 0)
+            self.assertEqual({data["title"] for data in page_data.values()}, {"Home", "A", "B"})
+
+    def test_cache_keys(self):
+        self.assertEqual(ExtractionSpec().cache_key, "")
+        self.assertEqual(ExtractionSpec(["outgoing_links", "h1"]).cache_key, "h1,outgoing_links")
+        self.assertEqual(ExtractionSpec(["h1"], {"t": "title"}, {"w": word_count}).cache_key,
+                         "h1;t=title;w=test_extraction:word_count")
+
+
+if __name__ == "__main__":
+    unittest.main()
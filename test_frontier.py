@@ -0,0 +1,120 @@
+import asyncio
+import unittest
+from aiohttp.test_utils import TestServer
+from async_crawl import AsyncCrawler
+from frontier import PriorityFrontier, URLFilter, URLScorer, parse_score_rule
+from test_async_crawl import make_site
+
+
+def drain(frontier):
+    items = []
+    while not frontier.empty():
+        items.append(frontier.get_nowait()[1])
+        frontier.task_done()
+    return items
+
+
+class TestPriorityFrontier(unittest.IsolatedAsyncioTestCase):
+    async def test_bfs_and_dfs_order_by_depth(self):
+        for strategy, expected in (("bfs", ["a.com/1", "a.com/3", "a.com/2"]),
+                                   ("dfs", ["a.com/2", "a.com/1", "a.com/3"])):
+            frontier = PriorityFrontier(strategy)
+            frontier.put_nowait(("https://a.com/1", "a.com/1", 1))
+            frontier.put_nowait(("https://a.com/2", "a.com/2", 3))
+            frontier.put_nowait(("https://a.com/3", "a.com/3", 1))
+            self.assertEqual(frontier.qsize(), 3)
+            self.assertEqual(drain(frontier), expected)
+
+    async def test_hosts_take_turns(self):
+        frontier = PriorityFrontier("bfs")
+        for n in range(4):
+            frontier.put_nowait((f"https://big.com/{n}", f"big.com/{n}", 1))
+        frontier.put_nowait(("https://small.com/", "small.com", 2))
+        # small.com's deeper page still goes second
+        self.assertEqual(drain(frontier)[:3], ["big.com/0", "small.com", "big.com/1"])
+
+    async def test_score_rules_and_inlinks(self):
+        scorer = URLScorer([("/blog/", 5)], inlink_weight=1, depth_weight=0)
+        frontier = PriorityFrontier("score", scorer)
+        frontier.put_nowait(("https://a.com/page/1", "a.com/page/1", 1))
+        frontier.put_nowait(("https://a.com/page/2", "a.com/page/2", 1))
+        frontier.put_nowait(("https://a.com/blog/x", "a.com/blog/x", 1))
+        # Found twice more: 1 + 2 inlinks beat page/1's one
+        frontier.link_found("a.com/page/2")
+        frontier.link_found("a.com/page/2")
+        frontier.link_found("a.com/not-queued")
+        self.assertEqual(frontier.qsize(), 3)
+        self.assertEqual(drain(frontier), ["a.com/blog/x", "a.com/page/2", "a.com/page/1"])
+        self.assertEqual(frontier.heaps, {})
+
+    async def test_join_waits_for_task_done(self):
+        frontier = PriorityFrontier("bfs")
+        frontier.put_nowait(("https://a.com/", "a.com", 0))
+        item = await frontier.get()
+        join = asyncio.ensure_future(frontier.join())
+        await asyncio.sleep(0)
+        self.assertFalse(join.done())
+        frontier.task_done()
+        await asyncio.wait_for(join, 1)
+        self.assertEqual(item[1], "a.com")
+
+    def test_filter_and_rules(self):
+        url_filter = URLFilter(include=[r"/docs/"], exclude=[r"\.pdf$"])
+        self.assertTrue(url_filter.allows("https://a.com/docs/intro"))
+        self.assertFalse(url_filter.allows("https://a.com/docs/manual.pdf"))
+        self.assertFalse(url_filter.allows("https://a.com/blog/"))
+        self.assertEqual(parse_score_rule(r"\?page=\d+=-2"), (r"\?page=\d+", -2.0))
+        with self.assertRaises(ValueError):
+            parse_score_rule("no-weight")
+
+
+class TestFrontierCrawl(unittest.IsolatedAsyncioTestCase):
+    async def start_site(self):
+        # A long pagination chain and a few articles off the home page
+        pages = {"/": '<a href="/page/1">Older</a>'
+                      + "".join(f'<a href="/article/{n}">{n}</a>' for n in range(3))}
+        for n in range(1, 20):
+            pages[f"/page/{n}"] = f'<a href="/page/{n + 1}">Older</a><a href="/">Home</a>'
+        for n in range(3):
+            pages[f"/article/{n}"] = f'<h1>Article {n}</h1><a href="/about">About</a>'
+        pages["/about"] = "<p>About</p>"
+        server = TestServer(make_site(pages))
+        await server.start_server()
+        self.addAsyncCleanup(server.close)
+        return str(server.make_url("/"))
+
+    async def crawl(self, max_pages=100, **options):
+        base_url = await self.start_site()
+        async with AsyncCrawler(base_url, 1, max_pages, progress_interval=None,
+                                **options) as crawler:
+            page_data = await crawler.crawl()
+        host = base_url.split("://")[1].rstrip("/")
+        return {key[len(host):] or "/" for key in page_data}
+
+    async def test_max_depth(self):
+        pages = await self.crawl(max_depth=2)
+        self.assertEqual(pages, {"/", "/page/1", "/page/2", "/article/0", "/article/1",
+                                 "/article/2", "/about"})
+
+    async def test_exclude_filter_keeps_budget_for_other_pages(self):
+        pages = await self.crawl(max_pages=5, url_filter=URLFilter(exclude=[r"/page/"]))
+        self.assertEqual(pages, {"/", "/article/0", "/article/1", "/article/2", "/about"})
+
+    async def test_score_strategy_spends_budget_on_high_value_pages(self):
+        # First in, first out: the pagination link from the home page gets a page
+        pages = await self.crawl(max_pages=5)
+        self.assertEqual(pages, {"/", "/page/1", "/article/0", "/article/1", "/article/2"})
+
+        # With a priority frontier the budget is spent as pages come off
+        # it: /about (three inlinks) goes before the down-weighted chain
+        scorer = URLScorer([(r"/page/", -10)])
+        pages = await self.crawl(max_pages=5, strategy="score", scorer=scorer)
+        self.assertEqual(pages, {"/", "/article/0", "/article/1", "/article/2", "/about"})
+
+    async def test_dfs_follows_the_chain_to_max_depth(self):
+        pages = await self.crawl(max_pages=7, strategy="dfs", max_depth=5)
+        self.assertEqual(pages, {"/", "/article/0"} | {f"/page/{n}" for n in range(1, 6)})
+
+
+if __name__ == "__main__":
+    unittest.main()
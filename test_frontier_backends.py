@@ -0,0 +1,204 @@
+import os
+import time
+import asyncio
+import tempfile
+import unittest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from async_crawl import crawl_site_async
+from distributed_crawl import crawl_with_frontier
+from frontier_backends import SqliteFrontier, RedisFrontier
+
+try:
+    import redis
+    import fakeredis
+except ImportError:
+    redis = fakeredis = None
+
+
+class BackendTests:
+    """Behaviour every FrontierBackend must have; subclasses provide make_backend()."""
+
+    def test_add_deduplicates(self):
+        backend = self.make_backend()
+        self.assertEqual(backend.add([("https://a.com/", "a.com"), ("https://a.com/x", "a.com/x")]), 2)
+        self.assertEqual(backend.add([("https://a.com/x/", "a.com/x"), ("https://a.com/y", "a.com/y")]), 1)
+        self.assertEqual(backend.counts()["pending"], 3)
+
+    def test_max_pages(self):
+        backend = self.make_backend(max_pages=2)
+        self.assertEqual(backend.add([(f"https://a.com/{i}", f"a.com/{i}") for i in range(5)]), 2)
+        self.assertEqual(backend.add([("https://a.com/z", "a.com/z")]), 0)
+
+    def test_claim_and_ack(self):
+        backend = self.make_backend()
+        backend.add([(f"https://a.com/{i}", f"a.com/{i}") for i in range(3)])
+        claimed = backend.claim("w1", 2)
+        self.assertEqual(claimed, [("https://a.com/0", "a.com/0"), ("https://a.com/1", "a.com/1")])
+        self.assertEqual(backend.claim("w2", 5), [("https://a.com/2", "a.com/2")])
+        self.assertFalse(backend.is_finished())
+
+        backend.ack([("a.com/0", {"h1": "zero"}), ("a.com/1", None), ("a.com/2", {"h1": "two"})])
+        self.assertTrue(backend.is_finished())
+        self.assertEqual(backend.results(),
+                         {"a.com/0": {"h1": "zero"}, "a.com/1": None, "a.com/2": {"h1": "two"}})
+        self.assertEqual(backend.counts(), {"pending": 0, "leased": 0, "done": 2, "failed": 1})
+
+    def test_expired_lease_is_reclaimed(self):
+        backend = self.make_backend(lease_timeout=0.05)
+        backend.add([("https://a.com/", "a.com")])
+        self.assertEqual(len(backend.claim("dead", 10)), 1)
+        self.assertEqual(backend.claim("w2", 10), [])
+        time.sleep(0.1)
+        self.assertEqual(backend.claim("w2", 10), [("https://a.com/", "a.com")])
+        self.assertEqual(backend.reclaimed, 1)
+
+    def test_renewed_lease_is_kept(self):
+        backend = self.make_backend(lease_timeout=0.3)
+        backend.add([("https://a.com/", "a.com"), ("https://a.com/x", "a.com/x")])
+        self.assertEqual(len(backend.claim("w1", 1)), 1)
+        time.sleep(0.2)
+        backend.renew("w1", ["a.com"])
+        time.sleep(0.2)
+        self.assertEqual(backend.claim("w2", 10), [("https://a.com/x", "a.com/x")])
+        # Renewing a URL that isn't leased doesn't take it off the frontier
+        backend.add([("https://a.com/y", "a.com/y")])
+        backend.renew("w1", ["a.com/y"])
+        self.assertEqual(backend.claim("w2", 10), [("https://a.com/y", "a.com/y")])
+        self.assertEqual(backend.reclaimed, 0)
+
+    def test_only_the_lease_holder_renews_and_acks(self):
+        backend = self.make_backend(lease_timeout=0.1)
+        backend.add([("https://a.com/", "a.com")])
+        self.assertEqual(len(backend.claim("slow", 1)), 1)
+        time.sleep(0.15)
+        # The slow worker's lease ran out and w2 has the URL now
+        self.assertEqual(backend.claim("w2", 1), [("https://a.com/", "a.com")])
+        backend.renew("slow", ["a.com"])
+        backend.ack([("a.com", {"h1": "stale"})], "slow")
+        self.assertEqual(backend.counts()["leased"], 1)
+        self.assertEqual(backend.results(), {})
+        backend.ack([("a.com", {"h1": "fresh"})], "w2")
+        self.assertTrue(backend.is_finished())
+        self.assertEqual(backend.results(), {"a.com": {"h1": "fresh"}})
+
+
+class TestSqliteFrontier(BackendTests, unittest.TestCase):
+    def make_backend(self, **options):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        backend = SqliteFrontier(os.path.join(directory.name, "frontier.db"), **options)
+        self.addCleanup(backend.close)
+        return backend
+
+
+if fakeredis is not None:
+    class DroppingRedis(fakeredis.FakeRedis):
+        """Loses the connection the first time a transaction leases URLs."""
+
+        dropped = False
+
+        def pipeline(self, *args, **kwargs):
+            pipe = super().pipeline(*args, **kwargs)
+            execute = pipe.execute
+
+            def drop_or_execute(*args, **kwargs):
+                if not self.dropped and any(args[0] == "ZADD" for args, _ in pipe.command_stack):
+                    self.dropped = True
+                    raise redis.ConnectionError("Connection lost")
+                return execute(*args, **kwargs)
+
+            pipe.execute = drop_or_execute
+            return pipe
+
+
+@unittest.skipIf(fakeredis is None, "fakeredis is not installed")
+class TestRedisFrontier(BackendTests, unittest.TestCase):
+    def make_backend(self, **options):
+        return RedisFrontier(fakeredis.FakeRedis(), **options)
+
+    def test_dropped_claim_loses_nothing(self):
+        backend = RedisFrontier(DroppingRedis())
+        backend.add([("https://a.com/", "a.com"), ("https://a.com/x", "a.com/x")])
+        with self.assertRaises(redis.ConnectionError):
+            backend.claim("w1", 2)
+        # Nothing was popped without being leased
+        self.assertFalse(backend.is_finished())
+        self.assertEqual(backend.claim("w2", 10),
+                         [("https://a.com/", "a.com"), ("https://a.com/x", "a.com/x")])
+
+
+class TestFrontierWorkers(unittest.IsolatedAsyncioTestCase):
+    async def test_workers_share_one_frontier(self):
+        pages = {"/": "".join(f'<a href="/p{i}">{i}</a>' for i in range(30))}
+        pages.update({f"/p{i}": f'<h1>{i}</h1><a href="/">Home</a><a href="/p{(i + 1) % 30}">Next</a>'
+                      for i in range(30)})
+        hits = []
+
+        async def handle(request):
+            hits.append(request.path)
+            return web.Response(text=pages[request.path], content_type="text/html")
+
+        app = web.Application()
+        app.router.add_get("/{tail:.*}", handle)
+        server = TestServer(app)
+        await server.start_server()
+        self.addAsyncCleanup(server.close)
+        base_url = str(server.make_url("/"))
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "frontier.db")
+
+        # A worker that died holding the start URL: its lease runs out
+        with SqliteFrontier(path) as backend:
+            backend.add([(base_url, base_url.split("://")[1].rstrip("/"))])
+        with SqliteFrontier(path, lease_timeout=0.2) as dead:
+            self.assertEqual(len(dead.claim("dead", 1)), 1)
+
+        backends = [SqliteFrontier(path, lease_timeout=5) for _ in range(3)]
+        for backend in backends:
+            self.addCleanup(backend.close)
+        runs = await asyncio.gather(*(
+            crawl_with_frontier(base_url, backend, max_concurrency=2, batch_size=4,
+                                worker_id=f"w{n}", poll_interval=0.05)
+            for n, backend in enumerate(backends)
+        ))
+
+        expected = await crawl_site_async(base_url, max_pages=100)
+        self.assertEqual(backends[0].results(), expected)
+        self.assertEqual(sorted(hits[:31]), sorted(set(hits[:31])))
+        self.assertEqual(sum(stats["pages_crawled"] for _, stats in runs), 31)
+        self.assertTrue(all(stats["pages_found"] == 31 for _, stats in runs))
+
+    async def test_leases_are_renewed_while_a_page_is_fetched(self):
+        hits = []
+
+        async def handle(request):
+            hits.append(request.path)
+            if request.path == "/slow":
+                # Longer than the lease: the worker has to renew it
+                await asyncio.sleep(0.8)
+                return web.Response(text="<h1>Slow</h1>", content_type="text/html")
+            return web.Response(text='<a href="/slow">Slow</a>', content_type="text/html")
+
+        app = web.Application()
+        app.router.add_get("/{tail:.*}", handle)
+        server = TestServer(app)
+        await server.start_server()
+        self.addAsyncCleanup(server.close)
+        base_url = str(server.make_url("/"))
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        backend = SqliteFrontier(os.path.join(directory.name, "frontier.db"), lease_timeout=0.3)
+        self.addCleanup(backend.close)
+        _, stats = await crawl_with_frontier(base_url, backend, poll_interval=0.05)
+
+        self.assertEqual(sorted(hits), ["/", "/slow"])
+        self.assertEqual(backend.reclaimed, 0)
+        self.assertEqual((stats["pages_crawled"], stats["pages_found"]), (2, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
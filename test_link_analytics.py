@@ -0,0 +1,123 @@
+import os
+import csv
+import random
+import tempfile
+import unittest
+import link_analytics
+from link_analytics import LinkAnalytics, LinkGraph, ANALYTICS_FIELDS, annotate_pages
+from report_sinks import write_report
+from columnar_report import ColumnarReportSink, pa, pq
+from urlnorm import URLNormalizer
+
+
+def page(url, *links):
+    return {"url": url, "h1": "", "first_paragraph": "", "outgoing_links": list(links),
+            "image_urls": []}
+
+
+def naive_pagerank(links, count, damping=0.85, iterations=200):
+    """Reference PageRank on {source: [targets]} with a dense loop."""
+    ranks = [1.0 / count] * count
+    for _ in range(iterations):
+        new_ranks = [(1 - damping) / count] * count
+        for source in range(count):
+            targets = links.get(source, [])
+            for target in targets or range(count):
+                new_ranks[target] += damping * ranks[source] / (len(targets) or count)
+        ranks = new_ranks
+    return ranks
+
+
+SITE = {
+    "a.com": page("https://a.com/", "https://a.com/b", "https://a.com/c#top", "https://other.com/"),
+    "a.com/b": page("https://a.com/b", "https://a.com/c", "https://a.com/gone", "https://a.com/b"),
+    "a.com/c": page("https://a.com/c", "https://www.a.com/"),
+    # Only a sitemap listed it
+    "a.com/d": page("https://a.com/d", "https://a.com/"),
+    "a.com/gone": None,
+}
+
+
+class TestLinkAnalytics(unittest.TestCase):
+    def test_degrees_depth_orphans_and_broken_links(self):
+        analytics = LinkAnalytics(SITE, "https://a.com/")
+        columns = {key: analytics.columns(key) for key, data in SITE.items() if data is not None}
+        self.assertEqual({key: (c["in_degree"], c["out_degree"], c["depth"])
+                          for key, c in columns.items()},
+                         {"a.com": (2, 2, 0), "a.com/b": (1, 2, 1), "a.com/c": (2, 1, 1),
+                          "a.com/d": (0, 1, None)})
+        self.assertEqual(analytics.orphans(), ["a.com/d"])
+        self.assertTrue(columns["a.com/d"]["orphan"])
+        self.assertFalse(columns["a.com"]["orphan"])
+        self.assertEqual(analytics.broken_links, [("https://a.com/b", "https://a.com/gone")])
+        self.assertEqual(columns["a.com/b"]["broken_links"], 1)
+        self.assertEqual(analytics.top_pages(1)[0][0], "a.com")
+
+    def test_pagerank_matches_reference(self):
+        rng = random.Random(5)
+        count = 60
+        links = {source: rng.sample(range(count), rng.randrange(0, 6)) for source in range(count)}
+        page_data = {}
+        for source in range(count):
+            targets = [f"https://a.com/{target}" for target in links[source] if target != source]
+            page_data[f"a.com/{source}"] = page(f"https://a.com/{source}", *targets)
+        links = {source: [t for t in targets if t != source] for source, targets in links.items()}
+
+        ranks = LinkGraph(page_data, URLNormalizer()).pagerank()
+        self.assertAlmostEqual(sum(ranks), 1.0)
+        for actual, expected in zip(ranks, naive_pagerank(links, count)):
+            self.assertAlmostEqual(actual, expected, places=6)
+
+    @unittest.skipIf(link_analytics.np is None, "numpy is not installed")
+    def test_numpy_and_python_agree(self):
+        graph = LinkGraph(SITE, URLNormalizer())
+        vectorized = graph.pagerank()
+        numpy = link_analytics.np
+        link_analytics.np = None
+        try:
+            plain = graph.pagerank()
+            self.assertEqual(graph.in_degrees(), [2, 1, 2, 0, 1])
+        finally:
+            link_analytics.np = numpy
+        for actual, expected in zip(vectorized, plain):
+            self.assertAlmostEqual(actual, expected, places=9)
+
+    def test_annotated_report(self):
+        analytics = LinkAnalytics(SITE, "https://a.com/")
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "report.csv")
+            write_report(annotate_pages(SITE, analytics), path, extra_fields=ANALYTICS_FIELDS)
+            with open(path, newline="", encoding="utf-8") as f:
+                rows = list(csv.DictReader(f))
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[3]["page_url"], "https://a.com/d")
+        self.assertEqual((rows[3]["orphan"], rows[3]["depth"], rows[3]["in_degree"]),
+                         ("True", "", "0"))
+
+    def write_columnar(self, directory, **options):
+        pages = annotate_pages(SITE, LinkAnalytics(SITE, "https://a.com/"))
+        # One row group per page, so the unreachable page's is all nulls
+        with ColumnarReportSink(os.path.join(directory, "report.parquet"), flush_every=1,
+                                extra_fields=ANALYTICS_FIELDS, **options) as sink:
+            for page in pages.values():
+                if page is not None:
+                    sink.write(page)
+        return sink.paths["pages"]
+
+    def test_columnar_csv_report(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with open(self.write_columnar(directory, file_format="csv"),
+                      newline="", encoding="utf-8") as f:
+                rows = list(csv.DictReader(f))
+        self.assertEqual([row["depth"] for row in rows], ["0", "1", "1", ""])
+
+    @unittest.skipIf(pa is None, "pyarrow is not installed")
+    def test_columnar_parquet_report(self):
+        with tempfile.TemporaryDirectory() as directory:
+            table = pq.read_table(self.write_columnar(directory))
+        self.assertEqual(table.column("depth").to_pylist(), [0, 1, 1, None])
+        self.assertEqual(table.column("orphan").to_pylist(), [False, False, False, True])
+
+
+if __name__ == "__main__":
+    unittest.main()
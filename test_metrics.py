@@ -0,0 +1,96 @@
+import io
+import json
+import unittest
+import aiohttp
+from aiohttp.test_utils import TestServer
+from async_crawl import AsyncCrawler
+from politeness import PolitenessScheduler
+from metrics import CrawlMetrics, Histogram, ProgressReporter, start_metrics_server
+from test_async_crawl import make_site
+
+
+class TestHistogram(unittest.TestCase):
+    def test_counts_and_quantiles(self):
+        histogram = Histogram(bounds=(0.1, 0.2, 0.5))
+        for value in (0.05, 0.15, 0.15, 0.3, 2.0):
+            histogram.observe(value)
+        self.assertEqual(histogram.counts, [1, 2, 1, 1])
+        self.assertEqual(histogram.count, 5)
+        self.assertAlmostEqual(histogram.mean(), 0.53)
+        self.assertEqual(histogram.max, 2.0)
+        # The median falls in the 0.1-0.2 bucket
+        self.assertTrue(0.1 <= histogram.quantile(0.5) <= 0.2)
+        # Past the last bound we only know the maximum
+        self.assertEqual(histogram.quantile(0.99), 2.0)
+
+    def test_empty(self):
+        self.assertEqual(Histogram().summary()["p99"], 0.0)
+
+
+class TestCrawlMetrics(unittest.IsolatedAsyncioTestCase):
+    async def crawl(self, **options):
+        pages = {"/": "".join(f'<a href="/p{i}">{i}</a>' for i in range(9))}
+        pages.update({f"/p{i}": f"<h1>{i}</h1><p>{'x' * 100}</p>" for i in range(9)})
+        pages["/p8"] = '<a href="/missing">Missing</a>'
+        server = TestServer(make_site(pages))
+        await server.start_server()
+        self.addAsyncCleanup(server.close)
+
+        metrics = CrawlMetrics()
+        base_url = str(server.make_url("/"))
+        async with AsyncCrawler(base_url, max_concurrency=3, max_pages=20,
+                                metrics=metrics, **options) as crawler:
+            await crawler.crawl()
+        expected_bytes = sum(len(html) for path, html in pages.items())
+        return metrics, crawler, expected_bytes
+
+    async def test_records_timings_and_bytes(self):
+        metrics, crawler, expected_bytes = await self.crawl(
+            scheduler=PolitenessScheduler(respect_robots=False), progress_interval=None
+        )
+        timings = metrics.histograms
+        # 10 pages plus the 404
+        self.assertEqual(timings["fetch"].count, 11)
+        self.assertEqual(timings["ttfb"].count, 11)
+        self.assertEqual(timings["slot_wait"].count, 11)
+        self.assertEqual(timings["parse"].count, 10)
+        self.assertEqual(timings["body"].count, 10)
+        self.assertGreaterEqual(timings["connect"].count, 1)
+        self.assertEqual(metrics.bytes_received, expected_bytes)
+        self.assertEqual(metrics.in_flight, 0)
+
+        snapshot = json.loads(json.dumps(metrics.snapshot()))
+        self.assertEqual(snapshot["pages_crawled"], 10)
+        self.assertEqual(snapshot["failure_counts"], {"http_status": 1})
+        self.assertEqual(snapshot["timings"]["fetch"]["count"], 11)
+
+    async def test_prometheus_endpoint(self):
+        metrics, crawler, _ = await self.crawl(progress_interval=None)
+        runner = await start_metrics_server(metrics, 0)
+        self.addAsyncCleanup(runner.cleanup)
+        port = runner.addresses[0][1]
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f"http://127.0.0.1:{port}/metrics") as response:
+                self.assertTrue(response.headers["Content-Type"].startswith("text/plain"))
+                text = await response.text()
+        lines = text.splitlines()
+        self.assertIn("# TYPE webcrawler_pages_crawled_total counter", lines)
+        self.assertIn("webcrawler_pages_crawled_total 10", lines)
+        self.assertIn('webcrawler_failures_total{kind="http_status"} 1', lines)
+        self.assertIn('webcrawler_fetch_seconds_bucket{le="+Inf"} 11', lines)
+        self.assertIn("webcrawler_fetch_seconds_count 11", lines)
+
+    async def test_progress_line_and_snapshots(self):
+        output = io.StringIO()
+        snapshots = io.StringIO()
+        metrics, crawler, _ = await self.crawl(progress_interval=0.01, metrics_file=snapshots)
+        # The reporter always writes a final line; swap in a buffer to check it
+        reporter = ProgressReporter(crawler, stream=output, snapshot_file=snapshots)
+        reporter.report()
+        self.assertRegex(output.getvalue(), r"10 crawled, 1 failed, 0 queued, [\d.]+ pages/s")
+        last = json.loads(snapshots.getvalue().splitlines()[-1])
+        self.assertEqual(last["pages_crawled"], 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import os
+import json
+import tempfile
+import tracemalloc
+import unittest
+from aiohttp.test_utils import TestServer
+from async_crawl import AsyncCrawler
+from csv_report import write_csv_report
+from report_sinks import write_report
+from page_store import PageStore
+from test_async_crawl import make_site
+
+
+def site_pages(count, navigation=30):
+    """Page dicts sharing the same navigation links, like a real site's."""
+    nav = [f"https://site.com/section/{n}" for n in range(navigation)]
+    pages = {}
+    for index in range(count):
+        pages[f"site.com/page/{index}"] = {
+            "url": f"https://site.com/page/{index}",
+            "h1": f"Page {index}",
+            "first_paragraph": "Some text",
+            "outgoing_links": nav + [f"https://site.com/page/{index + 1}"],
+            "image_urls": ["https://site.com/logo.png"],
+        }
+    return pages
+
+
+class TestPageStore(unittest.TestCase):
+    def test_records_equal_page_dicts(self):
+        store = PageStore()
+        data = dict(site_pages(1)["site.com/page/0"], duplicate_of="")
+        record = store.add(data)
+        self.assertEqual(record, data)
+        self.assertEqual(dict(record), data)
+        self.assertEqual(list(record), list(data))
+        self.assertEqual(record.get("fingerprint"), None)
+        with self.assertRaises(KeyError):
+            record["fingerprint"]
+        self.assertEqual(store.resolve(record.link_ids), data["outgoing_links"])
+
+    def test_urls_are_interned(self):
+        store = PageStore()
+        for data in site_pages(100).values():
+            store.add(data)
+        # 30 navigation links, 101 pages and the logo
+        self.assertEqual(len(store.urls), 132)
+        self.assertEqual(len(store.links), 100)
+        self.assertEqual(len(store.links.targets), 3100)
+
+    def test_reports_are_identical(self):
+        pages = site_pages(20)
+        pages["site.com/missing"] = None
+        store = PageStore()
+        compact = {key: store.add(data) if data is not None else None
+                   for key, data in pages.items()}
+        with tempfile.TemporaryDirectory() as directory:
+            for name in ("dict", "compact"):
+                write_csv_report(pages if name == "dict" else compact,
+                                 os.path.join(directory, f"{name}.csv"))
+            write_report(compact, os.path.join(directory, "compact.jsonl"))
+            with open(os.path.join(directory, "dict.csv"), encoding="utf-8") as expected:
+                with open(os.path.join(directory, "compact.csv"), encoding="utf-8") as actual:
+                    self.assertEqual(actual.read(), expected.read())
+            with open(os.path.join(directory, "compact.jsonl"), encoding="utf-8") as f:
+                self.assertEqual([json.loads(line) for line in f],
+                                 [data for data in pages.values() if data is not None])
+
+    def test_uses_less_memory_than_dicts(self):
+        def measure(build):
+            tracemalloc.start()
+            try:
+                kept = build()
+                return tracemalloc.get_traced_memory()[0], kept
+            finally:
+                tracemalloc.stop()
+
+        # Each page gets its own link strings, as the parser makes them
+        def pages():
+            return {key: dict(data, outgoing_links=[url.encode().decode()
+                                                    for url in data["outgoing_links"]])
+                    for key, data in site_pages(2000).items()}
+
+        dict_bytes, _ = measure(lambda: [pages()])
+        store = PageStore()
+        compact_bytes, _ = measure(
+            lambda: {key: store.add(data) for key, data in pages().items()}
+        )
+        self.assertLess(compact_bytes * 2, dict_bytes)
+
+
+class TestCompactCrawl(unittest.IsolatedAsyncioTestCase):
+    async def test_page_data_matches_dict_records(self):
+        pages = {"/": '<a href="/a">A</a><a href="/b">B</a><a href="/a">A again</a>',
+                 "/a": '<h1>A</h1><a href="/">Home</a><img src="/logo.png">',
+                 "/b": '<p>B</p><a href="/">Home</a><a href="/missing">Gone</a>'}
+        server = TestServer(make_site(pages))
+        await server.start_server()
+        self.addAsyncCleanup(server.close)
+        base_url = str(server.make_url("/"))
+
+        results = []
+        for page_store in (None, PageStore()):
+            async with AsyncCrawler(base_url, 2, 10, page_store=page_store,
+                                    progress_interval=None) as crawler:
+                results.append(await crawler.crawl())
+        plain, compact = results
+        self.assertEqual(compact, plain)
+        home = compact[base_url.split("://")[1].rstrip("/")]
+        # The repeated link is listed once
+        self.assertEqual(home["outgoing_links"], [base_url + "a", base_url + "b"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+import time
+import asyncio
+import unittest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from async_crawl import AsyncCrawler
+from politeness import PolitenessScheduler, TokenBucket
+
+
+class StubSite:
+    """Local server whose pages, robots.txt and throttling a test controls."""
+
+    def __init__(self, pages, robots=None):
+        self.pages = pages
+        self.robots = robots
+        self.requests = []
+        self.throttle_next = 0
+        self.active = 0
+        self.peak_active = 0
+
+    async def handle(self, request):
+        self.requests.append((time.monotonic(), request.path))
+        if request.path == "/robots.txt":
+            if self.robots is None:
+                raise web.HTTPNotFound()
+            return web.Response(text=self.robots)
+        if self.throttle_next:
+            self.throttle_next -= 1
+            return web.Response(status=429, headers={"Retry-After": "1"})
+        self.active += 1
+        self.peak_active = max(self.peak_active, self.active)
+        try:
+            await asyncio.sleep(0.02)
+        finally:
+            self.active -= 1
+        return web.Response(text=self.pages[request.path], content_type="text/html")
+
+    def page_requests(self):
+        return [(at, path) for at, path in self.requests if path != "/robots.txt"]
+
+
+class TestPoliteness(unittest.IsolatedAsyncioTestCase):
+    async def start(self, site):
+        app = web.Application()
+        app.router.add_get("/{tail:.*}", site.handle)
+        server = TestServer(app)
+        await server.start_server()
+        self.addAsyncCleanup(server.close)
+        return str(server.make_url("/"))
+
+    async def test_robots_rules_and_single_fetch(self):
+        site = StubSite(
+            {"/": '<a href="/public">P</a><a href="/private/x">X</a>', "/public": "<p>ok</p>"},
+            robots="User-agent: *\nDisallow: /private/\n",
+        )
+        base_url = await self.start(site)
+        scheduler = PolitenessScheduler(per_host_concurrency=4)
+        async with AsyncCrawler(base_url, max_concurrency=4, scheduler=scheduler) as crawler:
+            page_data = await crawler.crawl()
+        paths = [path for _, path in site.requests]
+        self.assertEqual(paths.count("/robots.txt"), 1)
+        self.assertNotIn("/private/x", paths)
+        self.assertEqual(len(page_data), 2)
+        self.assertEqual(crawler.pages_disallowed, 1)
+
+    async def test_crawl_delay_limits_rate(self):
+        links = "".join(f'<a href="/p{i}">{i}</a>' for i in range(2))
+        pages = {"/": links}
+        pages.update({f"/p{i}": "<p>leaf</p>" for i in range(2)})
+        site = StubSite(pages, robots="User-agent: *\nCrawl-delay: 1\n")
+        base_url = await self.start(site)
+        scheduler = PolitenessScheduler(per_host_concurrency=4)
+        async with AsyncCrawler(base_url, max_concurrency=4, scheduler=scheduler) as crawler:
+            await crawler.crawl()
+        times = [at for at, _ in site.page_requests()]
+        gaps = [later - earlier for earlier, later in zip(times, times[1:])]
+        self.assertEqual(len(times), 3)
+        self.assertTrue(all(gap >= 0.9 for gap in gaps), gaps)
+
+    async def test_per_host_concurrency(self):
+        links = "".join(f'<a href="/p{i}">{i}</a>' for i in range(10))
+        pages = {"/": links}
+        pages.update({f"/p{i}": "<p>leaf</p>" for i in range(10)})
+        site = StubSite(pages)
+        base_url = await self.start(site)
+        scheduler = PolitenessScheduler(per_host_concurrency=2)
+        async with AsyncCrawler(base_url, max_concurrency=8, scheduler=scheduler) as crawler:
+            await crawler.crawl()
+        self.assertEqual(site.peak_active, 2)
+
+    async def test_throttle_response_backs_off(self):
+        site = StubSite({"/": "<p>home</p>"})
+        base_url = await self.start(site)
+        scheduler = PolitenessScheduler(requests_per_second=8, respect_robots=False)
+        async with AsyncCrawler(base_url, scheduler=scheduler) as crawler:
+            site.throttle_next = 1
+            with self.assertRaises(Exception):
+                await crawler.get_html(base_url)
+            state = scheduler.host_state(base_url)
+            self.assertEqual(state.bucket.rate, 4)
+            self.assertEqual(scheduler.throttle_count, 1)
+
+            started = time.monotonic()
+            await crawler.get_html(base_url)
+            self.assertGreaterEqual(time.monotonic() - started, 0.9)
+            self.assertAlmostEqual(state.bucket.rate, 4.4)
+
+
+class TestRateHelpers(unittest.TestCase):
+    def test_token_bucket_spaces_requests(self):
+        bucket = TokenBucket(rate=10)
+        self.assertEqual(bucket.reserve(), 0.0)
+        self.assertAlmostEqual(bucket.reserve(), 0.1, places=2)
+        self.assertAlmostEqual(bucket.reserve(), 0.2, places=2)
+
+    def test_unlimited_bucket(self):
+        bucket = TokenBucket()
+        self.assertEqual([bucket.reserve() for _ in range(3)], [0.0, 0.0, 0.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,147 @@
+import os
+import csv
+import json
+import tempfile
+import unittest
+from csv_report import write_csv_report
+from report_sinks import CsvReportSink, JsonlReportSink, open_report_sink
+from columnar_report import ColumnarReportSink, pa, pq
+
+PAGES = {
+    "site.com": {
+        "url": "https://site.com",
+        "h1": "Home",
+        "first_paragraph": "Hello, \"world\"",
+        "outgoing_links": ["https://site.com/a", "https://site.com/b"],
+        "image_urls": ["https://site.com/logo.png"],
+    },
+    "site.com/missing": None,
+    "site.com/a": {
+        "url": "https://site.com/a",
+        "h1": "",
+        "first_paragraph": "",
+        "outgoing_links": [],
+        "image_urls": [],
+    },
+}
+
+
+class TestReportSinks(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def test_csv_sink_matches_write_csv_report(self):
+        write_csv_report(PAGES, filename=self.path("batch.csv"))
+        with CsvReportSink(self.path("stream.csv"), flush_every=1) as sink:
+            for page in PAGES.values():
+                if page is not None:
+                    sink.write(page)
+        with open(self.path("batch.csv"), encoding="utf-8") as expected:
+            with open(self.path("stream.csv"), encoding="utf-8") as actual:
+                self.assertEqual(actual.read(), expected.read())
+
+    def test_jsonl_sink_writes_one_object_per_line(self):
+        with open_report_sink(self.path("report.jsonl")) as sink:
+            self.assertIsInstance(sink, JsonlReportSink)
+            sink.write(PAGES["site.com"])
+            sink.write(PAGES["site.com/a"])
+        with open(self.path("report.jsonl"), encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual(rows, [PAGES["site.com"], PAGES["site.com/a"]])
+
+    def test_sink_flushes_every_n_pages(self):
+        sink = CsvReportSink(self.path("report.csv"), flush_every=2)
+        self.addCleanup(sink.close)
+        sink.write(PAGES["site.com"])
+        with open(self.path("report.csv"), encoding="utf-8") as f:
+            self.assertEqual(len(f.read().splitlines()), 1)
+        sink.write(PAGES["site.com/a"])
+        with open(self.path("report.csv"), encoding="utf-8") as f:
+            self.assertEqual(len(f.read().splitlines()), 3)
+
+
+class TestColumnarReportSink(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.filename = os.path.join(self.directory.name, "crawl.parquet")
+
+    def write(self, **options):
+        pages = [dict(PAGES["site.com"], duplicate_of=""),
+                 dict(PAGES["site.com/a"], duplicate_of="https://site.com")]
+        with ColumnarReportSink(self.filename, flush_every=1, extra_fields=("duplicate_of",),
+                                **options) as sink:
+            for page in pages:
+                sink.write(page)
+        return sink
+
+    def test_csv_tables(self):
+        sink = self.write(file_format="csv")
+        tables = {}
+        for table, path in sink.paths.items():
+            self.assertEqual(path, os.path.join(self.directory.name, f"crawl.{table}.csv"))
+            with open(path, newline="", encoding="utf-8") as f:
+                tables[table] = list(csv.reader(f))
+        self.assertEqual(tables["pages"], [
+            ["url", "h1", "first_paragraph", "link_count", "image_count", "duplicate_of"],
+            ["https://site.com", "Home", "Hello, \"world\"", "2", "1", ""],
+            ["https://site.com/a", "", "", "0", "0", "https://site.com"],
+        ])
+        self.assertEqual(tables["edges"], [["source", "target"],
+                                           ["https://site.com", "https://site.com/a"],
+                                           ["https://site.com", "https://site.com/b"]])
+        self.assertEqual(tables["images"], [["page_url", "image_url"],
+                                            ["https://site.com", "https://site.com/logo.png"]])
+
+    @unittest.skipIf(pa is None, "pyarrow is not installed")
+    def test_parquet_tables(self):
+        sink = self.write()
+        with open_report_sink(os.path.join(self.directory.name, "other.parquet")) as other:
+            self.assertIsInstance(other, ColumnarReportSink)
+        pages = pq.ParquetFile(sink.paths["pages"])
+        # One row group per flush
+        self.assertEqual(pages.metadata.num_row_groups, 2)
+        table = pages.read()
+        self.assertTrue(pa.types.is_dictionary(table.schema.field("url").type))
+        self.assertEqual(table.column("link_count").to_pylist(), [2, 0])
+        self.assertEqual(table.column("duplicate_of").to_pylist(), ["", "https://site.com"])
+        edges = pq.read_table(sink.paths["edges"])
+        self.assertEqual(edges.column("target").to_pylist(),
+                         ["https://site.com/a", "https://site.com/b"])
+        self.assertEqual(pq.read_table(sink.paths["images"]).num_rows, 1)
+
+    @unittest.skipIf(pa is None, "pyarrow is not installed")
+    def test_parquet_extra_field_types(self):
+        # An extractor's values may change type from one row group to the next
+        pages = [dict(PAGES["site.com"], words=3, depth=0),
+                 dict(PAGES["site.com/a"], words="many", depth=None)]
+        with ColumnarReportSink(self.filename, flush_every=1,
+                                extra_fields=("words", "depth")) as sink:
+            for page in pages:
+                sink.write(page)
+        table = pq.read_table(sink.paths["pages"])
+        self.assertEqual(table.column("words").to_pylist(), ["3", "many"])
+        self.assertEqual(table.column("depth").to_pylist(), [0, None])
+
+        sink = ColumnarReportSink(self.filename, extra_fields=("depth",))
+        sink.write(dict(PAGES["site.com"], depth="deep"))
+        with self.assertRaises(ValueError):
+            sink.flush()
+        # Nothing of the bad batch was written to any table
+        sink.buffer = []
+        sink.close()
+        self.assertEqual([pq.read_table(path).num_rows for path in sink.paths.values()],
+                         [0, 0, 0])
+
+    @unittest.skipIf(pa is None, "pyarrow is not installed")
+    def test_parquet_cant_append(self):
+        with self.assertRaises(ValueError):
+            ColumnarReportSink(self.filename, append=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
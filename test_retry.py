@@ -0,0 +1,65 @@
+import unittest
+from errors import FetchError, FetchTimeoutError, HTTPStatusError, ContentTypeError, parse_retry_after
+from retry import RetryPolicy
+
+
+class TestFetchErrors(unittest.TestCase):
+    def test_status_classification(self):
+        self.assertTrue(HTTPStatusError(503).retryable)
+        self.assertTrue(HTTPStatusError(429).retryable)
+        self.assertFalse(HTTPStatusError(404).retryable)
+        self.assertEqual(str(HTTPStatusError(404)), "HTTP error: 404")
+
+    def test_retry_after_header(self):
+        error = HTTPStatusError(429, {"Retry-After": "7"})
+        self.assertEqual(error.retry_after, 7.0)
+        self.assertIsNone(HTTPStatusError(500).retry_after)
+
+    def test_kinds(self):
+        self.assertEqual(FetchTimeoutError("Request timeout").kind, "timeout")
+        self.assertEqual(ContentTypeError("image/png").kind, "content_type")
+        self.assertFalse(ContentTypeError("image/png").retryable)
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after("120"), 120.0)
+        self.assertIsNone(parse_retry_after("soon"))
+        self.assertIsNone(parse_retry_after(None))
+        self.assertEqual(parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT"), 0.0)
+
+
+class TestRetryPolicy(unittest.TestCase):
+    def test_only_retryable_errors(self):
+        policy = RetryPolicy()
+        self.assertFalse(policy.should_retry(HTTPStatusError(404), 0))
+        self.assertFalse(policy.should_retry(FetchError("boom"), 0))
+        self.assertTrue(policy.should_retry(FetchTimeoutError("slow"), 0))
+
+    def test_max_attempts(self):
+        policy = RetryPolicy(max_attempts=3)
+        error = HTTPStatusError(503)
+        self.assertTrue(policy.should_retry(error, 0))
+        self.assertTrue(policy.should_retry(error, 1))
+        self.assertFalse(policy.should_retry(error, 2))
+
+    def test_budget_is_shared(self):
+        policy = RetryPolicy(max_attempts=5, budget=2)
+        error = HTTPStatusError(502)
+        self.assertEqual([policy.should_retry(error, 0) for _ in range(3)], [True, True, False])
+        self.assertEqual(policy.retries, 2)
+
+    def test_delay_bounds(self):
+        policy = RetryPolicy(base_delay=1, max_delay=4)
+        error = HTTPStatusError(503)
+        for attempt in range(6):
+            delay = policy.delay(error, attempt)
+            self.assertTrue(0 <= delay <= min(4, 2 ** attempt))
+
+    def test_delay_honours_retry_after(self):
+        policy = RetryPolicy(base_delay=0.1, max_delay=30)
+        self.assertGreaterEqual(policy.delay(HTTPStatusError(429, {"Retry-After": "3"}), 0), 3)
+        capped = policy.delay(HTTPStatusError(429, {"Retry-After": "600"}), 0)
+        self.assertEqual(capped, 30)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import asyncio
+import unittest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from async_crawl import crawl_site_async
+from sharded_crawl import crawl_site_sharded, shard_for
+
+
+def make_tree_site(page_count, fan_out=4):
+    """Pages link to their children and back to the root, like benchmarks.fixture_site."""
+    async def handle(request):
+        index = int(request.match_info["index"] or 0)
+        if index >= page_count:
+            raise web.HTTPNotFound()
+        children = range(index * fan_out + 1, index * fan_out + fan_out + 1)
+        links = "".join(f'<a href="/{child}">{child}</a>' for child in children)
+        return web.Response(
+            text=f'<h1>Page {index}</h1><a href="/">Home</a>{links}',
+            content_type="text/html",
+        )
+
+    app = web.Application()
+    app.router.add_get("/{index:[0-9]*}", handle)
+    return app
+
+
+class TestShardedCrawl(unittest.IsolatedAsyncioTestCase):
+    async def start_site(self, page_count):
+        server = TestServer(make_tree_site(page_count))
+        await server.start_server()
+        self.addAsyncCleanup(server.close)
+        return str(server.make_url("/"))
+
+    async def test_matches_single_process_crawl(self):
+        # 41 pages: /40 links to missing pages, which fail
+        base_url = await self.start_site(41)
+        expected = await crawl_site_async(base_url, max_concurrency=4, max_pages=500)
+        page_data, stats = await asyncio.to_thread(
+            crawl_site_sharded, base_url, shards=3, max_concurrency=4, max_pages=500
+        )
+        self.assertEqual(page_data, expected)
+        self.assertEqual(stats["pages_crawled"], 41)
+        self.assertEqual(stats["pages_found"], len(expected))
+        self.assertGreater(stats["forwarded"], 0)
+
+    async def test_max_pages_is_crawl_wide(self):
+        base_url = await self.start_site(400)
+        page_data, stats = await asyncio.to_thread(
+            crawl_site_sharded, base_url, shards=2, max_concurrency=4, max_pages=30
+        )
+        self.assertEqual(len(page_data), 30)
+        self.assertEqual(stats["pages_crawled"], 30)
+
+    def test_shard_for_is_stable(self):
+        self.assertEqual(shard_for("example.com/a", 4), shard_for("example.com/a", 4))
+        self.assertEqual({shard_for(f"example.com/{i}", 4) for i in range(100)}, {0, 1, 2, 3})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,159 @@
+import os
+import gzip
+import tempfile
+import unittest
+from collections import Counter
+from xml.etree.ElementTree import ParseError
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from async_crawl import AsyncCrawler
+from http_cache import ResponseCache
+from errors import BodyTooLargeError
+from sitemap import SitemapParser, parse_lastmod
+
+NAMESPACE = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+
+
+def urlset(entries):
+    """Render a urlset from (loc, lastmod) pairs."""
+    urls = "".join(f"<url><loc>{loc}</loc>" + (f"<lastmod>{lastmod}</lastmod>" if lastmod else "")
+                   + "<priority>0.5</priority></url>" for loc, lastmod in entries)
+    return f'<?xml version="1.0" encoding="UTF-8"?><urlset {NAMESPACE}>{urls}</urlset>'
+
+
+def parse_in_chunks(data, size, **options):
+    parser = SitemapParser(**options)
+    entries = []
+    for start in range(0, len(data), size):
+        entries += parser.feed(data[start:start + size])
+    return entries + parser.close(), parser
+
+
+class TestSitemapParser(unittest.TestCase):
+    def test_urlset_in_any_chunking_and_gzipped(self):
+        xml = urlset([(f"https://a.com/{n}", "2024-05-01") for n in range(500)]).encode()
+        for data in (xml, gzip.compress(xml)):
+            for size in (1, 7, 65536):
+                entries, parser = parse_in_chunks(data, size)
+                self.assertEqual([entry.loc for kind, entry in entries],
+                                 [f"https://a.com/{n}" for n in range(500)])
+                self.assertEqual({kind for kind, entry in entries}, {"url"})
+                self.assertEqual(entries[0][1].priority, 0.5)
+                self.assertEqual(entries[0][1].lastmod, parse_lastmod("2024-05-01T00:00:00+00:00"))
+                # Read entries don't pile up in the tree
+                self.assertEqual(len(parser.root), 0)
+
+    def test_sitemap_index(self):
+        xml = (f'<sitemapindex {NAMESPACE}><sitemap><loc> https://a.com/s1.xml </loc></sitemap>'
+               f'<sitemap><lastmod>2024-01-01</lastmod><loc>https://a.com/s2.xml.gz</loc></sitemap>'
+               f'</sitemapindex>').encode()
+        entries, _ = parse_in_chunks(xml, 100)
+        self.assertEqual([(kind, entry.loc) for kind, entry in entries],
+                         [("sitemap", "https://a.com/s1.xml"), ("sitemap", "https://a.com/s2.xml.gz")])
+
+    def test_size_limit_applies_after_inflating(self):
+        data = gzip.compress(urlset([(f"https://a.com/{n}", None) for n in range(1000)]).encode())
+        self.assertLess(len(data), 10_000)
+        with self.assertRaises(BodyTooLargeError):
+            parse_in_chunks(data, 65536, max_size=10_000)
+
+    def test_corrupt_gzip(self):
+        for size in (1, 65536):
+            with self.assertRaises(ParseError):
+                parse_in_chunks(b"\x1f\x8bnotgzip" * 20, size)
+
+    def test_parse_lastmod(self):
+        self.assertEqual(parse_lastmod("2024-05-01T12:00:00+02:00"),
+                         parse_lastmod("2024-05-01T10:00:00Z"))
+        self.assertIsNotNone(parse_lastmod("2024-05-01T10:00:00.123+00:00"))
+        self.assertIsNone(parse_lastmod("last tuesday"))
+
+
+class TestSitemapCrawl(unittest.IsolatedAsyncioTestCase):
+    async def start_site(self, lastmod, broken=False):
+        """
+        Home links nowhere; the pages are only listed in gzipped sitemaps behind an index.
+
+        With broken, the index also lists a sitemap that isn't valid gzip.
+        """
+        self.requests = Counter()
+        routes = web.RouteTableDef()
+
+        @routes.get("/robots.txt")
+        async def robots(request):
+            return web.Response(text=f"User-agent: *\nSitemap: {request.url.origin()}/index.xml\n")
+
+        @routes.get("/index.xml")
+        async def index(request):
+            origin = request.url.origin()
+            return web.Response(text=(
+                f"<sitemapindex {NAMESPACE}><sitemap><loc>{origin}/pages.xml.gz</loc></sitemap>"
+                f"<sitemap><loc>{origin}/index.xml</loc></sitemap>"
+                + (f"<sitemap><loc>{origin}/broken.xml.gz</loc></sitemap>" if broken else "")
+                + "</sitemapindex>"
+            ), content_type="application/xml")
+
+        @routes.get("/broken.xml.gz")
+        async def broken_sitemap(request):
+            return web.Response(body=b"\x1f\x8bnotgzip" * 20,
+                                content_type="application/octet-stream")
+
+        @routes.get("/pages.xml.gz")
+        async def pages(request):
+            origin = request.url.origin()
+            xml = urlset([(f"{origin}/page/{n}", lastmod[n]) for n in range(len(lastmod))]
+                         + [("https://elsewhere.com/page", None)])
+            return web.Response(body=gzip.compress(xml.encode()),
+                                content_type="application/octet-stream")
+
+        @routes.get("/{path:.*}")
+        async def page(request):
+            self.requests[request.path] += 1
+            return web.Response(text=f"<h1>{request.path}</h1>", content_type="text/html",
+                                headers={"Cache-Control": "max-age=0"})
+
+        app = web.Application()
+        app.add_routes(routes)
+        server = TestServer(app)
+        await server.start_server()
+        self.addAsyncCleanup(server.close)
+        return str(server.make_url("/"))
+
+    async def crawl(self, base_url, **options):
+        async with AsyncCrawler(base_url, 2, 100, sitemaps=["auto"], progress_interval=None,
+                                **options) as crawler:
+            page_data = await crawler.crawl()
+        return page_data, crawler
+
+    async def test_sitemap_seeds_unlinked_pages(self):
+        base_url = await self.start_site([None] * 5)
+        page_data, crawler = await self.crawl(base_url)
+        host = base_url.split("://")[1].rstrip("/")
+        self.assertEqual(set(page_data), {host} | {f"{host}/page/{n}" for n in range(5)})
+        self.assertEqual(crawler.sitemap_loader.sitemaps_read, 2)
+        self.assertEqual(crawler.sitemap_loader.urls_found, 6)
+
+    async def test_corrupt_sitemap_is_skipped(self):
+        base_url = await self.start_site([None] * 3, broken=True)
+        page_data, crawler = await self.crawl(base_url)
+        self.assertEqual(len(page_data), 4)
+        self.assertEqual(crawler.sitemap_loader.errors, 1)
+
+    async def test_lastmod_skips_pages_unchanged_since_cached(self):
+        base_url = await self.start_site(["2020-01-01", "2020-01-01", "2999-01-01", None])
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "cache.db")
+            with ResponseCache(path) as cache:
+                first, _ = await self.crawl(base_url, cache=cache)
+            self.assertEqual(self.requests["/page/0"], 1)
+
+            with ResponseCache(path) as cache:
+                second, _ = await self.crawl(base_url, cache=cache)
+                self.assertEqual(cache.sitemap_skips, 2)
+        self.assertEqual(second, first)
+        # Old lastmod: reused; future lastmod and no lastmod: fetched again
+        self.assertEqual([self.requests[f"/page/{n}"] for n in range(4)], [1, 1, 2, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import sys
+import asyncio
+import unittest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from async_crawl import crawl_site_async
+from crawl import crawl_page, SyncCrawler
+from test_async_crawl import make_site
+
+
+class TestSyncCrawler(unittest.IsolatedAsyncioTestCase):
+    """The sync engine runs in a thread against a server on the test's loop."""
+
+    async def start_site(self, pages):
+        self.connections = set()
+        app = make_site(pages)
+
+        @web.middleware
+        async def track(request, handler):
+            self.connections.add(request.transport.get_extra_info("peername"))
+            return await handler(request)
+
+        app.middlewares.append(track)
+        server = TestServer(app)
+        await server.start_server()
+        self.addAsyncCleanup(server.close)
+        return str(server.make_url("/"))
+
+    def tree_site(self, count=40):
+        pages = {"/": "".join(f'<a href="/p{i}">{i}</a>' for i in range(1, 6))}
+        for i in range(1, count):
+            children = "".join(f'<a href="/p{c}">{c}</a>' for c in range(i * 5 + 1, i * 5 + 6) if c < count)
+            pages[f"/p{i}"] = f'<h1>Page {i}</h1><p>Text {i}</p><a href="/">Home</a>{children}'
+        pages["/p7"] += '<a href="/missing">Missing</a>'
+        return pages
+
+    async def test_deep_site_does_not_recurse(self):
+        depth = sys.getrecursionlimit() + 100
+        pages = {"/": '<a href="/d1">next</a>'}
+        pages.update({f"/d{i}": f'<p>{i}</p><a href="/d{i + 1}">next</a>' for i in range(1, depth - 1)})
+        pages[f"/d{depth - 1}"] = "<p>bottom</p>"
+        base_url = await self.start_site(pages)
+        page_data = await asyncio.to_thread(crawl_page, base_url, progress_interval=None)
+        self.assertEqual(len(page_data), depth)
+        self.assertTrue(all(data is not None for data in page_data.values()))
+        # One pooled connection for the whole serial crawl
+        self.assertEqual(len(self.connections), 1)
+
+    async def test_error_pages_keep_their_connection(self):
+        links = "".join(f'<a href="/missing{i}">{i}</a>' for i in range(3))
+        pages = {"/": links + '<a href="/a">A</a>', "/a": "<h1>A</h1>"}
+        base_url = await self.start_site(pages)
+        page_data = await asyncio.to_thread(crawl_page, base_url, progress_interval=None)
+        self.assertEqual(sum(data is None for data in page_data.values()), 3)
+        # The 404 bodies are read, so the connection goes back to the pool
+        self.assertEqual(len(self.connections), 1)
+
+    async def test_threaded_crawl_matches_async(self):
+        base_url = await self.start_site(self.tree_site())
+        expected = await crawl_site_async(base_url, max_concurrency=4, max_pages=100)
+        self.connections.clear()
+        page_data = await asyncio.to_thread(crawl_page, base_url, max_pages=100,
+                                            max_workers=4, progress_interval=None)
+        self.assertEqual(page_data, expected)
+        host = base_url.split("://")[1].rstrip("/")
+        self.assertIsNone(page_data[f"{host}/missing"])
+        self.assertLessEqual(len(self.connections), 4)
+
+    async def test_max_pages_and_stats(self):
+        base_url = await self.start_site(self.tree_site())
+
+        def crawl():
+            with SyncCrawler(base_url, max_workers=3, max_pages=12, progress_interval=None) as crawler:
+                return crawler.crawl(), crawler.stats()
+
+        page_data, stats = await asyncio.to_thread(crawl)
+        self.assertEqual(len(page_data), 12)
+        self.assertEqual(stats["pages_found"], 12)
+        self.assertEqual(stats["pages_crawled"] + stats["pages_failed"], 12)
+
+    async def test_existing_page_data_is_skipped(self):
+        base_url = await self.start_site(self.tree_site(10))
+        host = base_url.split("://")[1].rstrip("/")
+        known = {f"{host}/p1": {"url": "known"}}
+        page_data = await asyncio.to_thread(crawl_page, base_url, page_data=known,
+                                            progress_interval=None)
+        self.assertIs(page_data, known)
+        self.assertEqual(page_data[f"{host}/p1"], {"url": "known"})
+        # /p1's children are only linked from /p1, so they stay unvisited
+        self.assertNotIn(f"{host}/p6", page_data)
+        self.assertIn(f"{host}/p2", page_data)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import io
+import unittest
+import contextlib
+from aiohttp.compression_utils import HAS_BROTLI
+from main import parse_args
+from transport import TransportConfig, create_session, default_headers
+
+
+class TestTransportConfig(unittest.TestCase):
+    def test_headers(self):
+        config = TransportConfig(user_agent="TestBot/2.0")
+        encoding = "gzip, deflate, br" if HAS_BROTLI else "gzip, deflate"
+        self.assertEqual(default_headers(config),
+                         {"User-Agent": "TestBot/2.0", "Accept-Encoding": encoding})
+        self.assertEqual(default_headers(TransportConfig(compress=False))["Accept-Encoding"],
+                         "identity")
+
+    def test_invalid_settings(self):
+        for settings in ({"limit": 0}, {"limit_per_host": -1}, {"keepalive_timeout": -1},
+                         {"dns_cache_ttl": -5}, {"max_body_size": 0}, {"chunk_size": 0},
+                         {"timeout": 0}, {"connect_timeout": -1.5}):
+            with self.assertRaises(ValueError, msg=settings):
+                TransportConfig(**settings)
+        # None means "no limit" (or "use the default") wherever it is allowed
+        TransportConfig(limit=None, dns_cache_ttl=None, timeout=None, max_body_size=None)
+        TransportConfig(keepalive_timeout=0, dns_cache_ttl=0)
+
+    def test_command_line(self):
+        args = parse_args(["https://a.com", "--connect-timeout", "2", "--dns-ttl", "0"])
+        self.assertEqual((args.connect_timeout, args.dns_ttl), (2.0, 0))
+        for option in (["--timeout", "0"], ["--limit-per-host", "0"], ["--dns-ttl", "-1"]):
+            with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+                parse_args(["https://a.com"] + option)
+
+
+class TestCreateSession(unittest.IsolatedAsyncioTestCase):
+    async def session(self, config=None, max_concurrency=5):
+        session = create_session(config, max_concurrency)
+        self.addAsyncCleanup(session.close)
+        return session
+
+    async def test_limits_follow_concurrency(self):
+        connector = (await self.session(max_concurrency=8)).connector
+        self.assertEqual((connector.limit, connector.limit_per_host), (8, 8))
+        connector = (await self.session(TransportConfig(limit=20), max_concurrency=8)).connector
+        self.assertEqual((connector.limit, connector.limit_per_host), (20, 20))
+        config = TransportConfig(limit=20, limit_per_host=4)
+        connector = (await self.session(config, max_concurrency=8)).connector
+        self.assertEqual((connector.limit, connector.limit_per_host), (20, 4))
+
+    async def test_connector_and_timeout(self):
+        config = TransportConfig(keepalive_timeout=15, dns_cache_ttl=60, timeout=12,
+                                 connect_timeout=3, user_agent="TestBot/2.0")
+        session = await self.session(config)
+        connector = session.connector
+        self.assertTrue(connector.use_dns_cache)
+        # aiohttp keeps these two private; they are what the connector uses
+        self.assertEqual(connector._keepalive_timeout, 15)
+        self.assertEqual(connector._cached_hosts._ttl, 60)
+        self.assertEqual((session.timeout.total, session.timeout.connect), (12, 3))
+        self.assertEqual(session.headers["User-Agent"], "TestBot/2.0")
+
+        session = await self.session()
+        self.assertEqual((session.timeout.total, session.timeout.connect), (10, None))
+        self.assertEqual(session.headers["User-Agent"], "BootCrawler/1.0")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+from urllib.parse import urljoin
+from urlnorm import URLNormalizer, LinkResolver, normalize_url, same_host
+
+
+class TestNormalizeUrl(unittest.TestCase):
+    def test_port_that_contains_default_port(self):
+        # The old substring replace turned :8080 into 80
+        self.assertEqual(normalize_url("http://example.com:8080/a"), "example.com:8080/a")
+        self.assertEqual(normalize_url("http://example.com:80/a"), "example.com/a")
+        self.assertEqual(normalize_url("https://example.com:80/a"), "example.com:80/a")
+
+    def test_query_is_sorted(self):
+        self.assertEqual(normalize_url("https://example.com/s?b=2&a=1"),
+                         normalize_url("https://example.com/s?a=1&b=2"))
+        self.assertEqual(normalize_url("https://example.com/s?a=1&b=2"), "example.com/s?a=1&b=2")
+
+    def test_distinct_queries_stay_distinct(self):
+        self.assertNotEqual(normalize_url("https://example.com/list?page=2"),
+                            normalize_url("https://example.com/list"))
+
+    def test_tracking_params_removed(self):
+        self.assertEqual(
+            normalize_url("https://example.com/post?utm_source=x&id=3&fbclid=abc&UTM_Medium=y"),
+            "example.com/post?id=3",
+        )
+        self.assertEqual(normalize_url("https://example.com/post?utm_campaign=z"), "example.com/post")
+
+    def test_percent_encoding_case(self):
+        self.assertEqual(normalize_url("https://example.com/a%2fb"), "example.com/a%2Fb")
+        # Unreserved characters are decoded
+        self.assertEqual(normalize_url("https://example.com/%7Euser"), "example.com/~user")
+        self.assertEqual(normalize_url("https://example.com/caf%c3%a9"),
+                         normalize_url("https://example.com/café"))
+
+    def test_www_alias(self):
+        self.assertEqual(normalize_url("https://www.example.com/a"), "example.com/a")
+        self.assertTrue(same_host("https://www.example.com/", "http://EXAMPLE.com:80/x"))
+        self.assertFalse(same_host("https://example.com/", "https://blog.example.com/"))
+
+    def test_ipv6_host(self):
+        self.assertEqual(normalize_url("http://[::1]:8080/a/"), "[::1]:8080/a")
+
+    def test_options(self):
+        normalizer = URLNormalizer(keep_query=False, strip_www=False)
+        self.assertEqual(normalizer.normalize("https://www.example.com/a?b=1"), "www.example.com/a")
+
+
+class TestURLNormalizer(unittest.TestCase):
+    def test_scope_and_cache(self):
+        normalizer = URLNormalizer("https://example.com/", cache_size=8)
+        self.assertEqual(normalizer.normalize_in_scope("https://example.com/a/"), "example.com/a")
+        self.assertIsNone(normalizer.normalize_in_scope("https://other.com/a"))
+        normalizer.normalize_in_scope("https://example.com/a/")
+        self.assertEqual(normalizer.cache_info().hits, 1)
+
+    def test_filter_links(self):
+        normalizer = URLNormalizer("https://example.com/")
+        links = normalizer.filter_links([
+            "https://example.com/a",
+            "https://other.com/b",
+            "https://example.com/a/#top",
+            "mailto:someone@example.com",
+            "https://www.example.com/c?utm_source=feed",
+        ])
+        self.assertEqual(links, [
+            ("https://example.com/a", "example.com/a"),
+            ("https://www.example.com/c?utm_source=feed", "example.com/c"),
+        ])
+
+
+class TestLinkResolver(unittest.TestCase):
+    def test_matches_urljoin(self):
+        base = "https://example.com/dir/page?x=1"
+        resolver = LinkResolver(base)
+        for href in ["/a", "/a?b#c", "b", "../c", "/x/../y", "//cdn.example.com/s.js",
+                     "https://other.com/p", "https://other.com", "/a?", "/a#", "?q", "#f",
+                     "", "/a;p", "http://h/a/./b", " /a", "/a\tb", "mailto:x@y.z"]:
+            self.assertEqual(resolver.resolve(href), urljoin(base, href), href)
+
+    def test_no_base(self):
+        self.assertEqual(LinkResolver("").resolve("/a"), "/a")
+
+
+if __name__ == "__main__":
+    unittest.main()
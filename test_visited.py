@@ -0,0 +1,38 @@
+import unittest
+from visited import VISITED_KINDS, BloomVisitedSet, FingerprintVisitedSet, create_visited_set
+
+
+class TestVisitedSets(unittest.TestCase):
+    def test_add_reports_first_visit(self):
+        for kind in VISITED_KINDS:
+            visited = create_visited_set(kind, capacity=8)
+            self.assertTrue(visited.add("blog.boot.dev/path"))
+            self.assertFalse(visited.add("blog.boot.dev/path"))
+            self.assertIn("blog.boot.dev/path", visited)
+            self.assertNotIn("blog.boot.dev/other", visited)
+            self.assertEqual(len(visited), 1)
+
+    def test_fingerprint_set_grows(self):
+        visited = FingerprintVisitedSet(capacity=4)
+        keys = [f"site.com/page/{i}" for i in range(5000)]
+        self.assertTrue(all(visited.add(key) for key in keys))
+        self.assertTrue(all(key in visited for key in keys))
+        self.assertEqual(len(visited), 5000)
+        self.assertLessEqual(visited.count * 2, len(visited.slots))
+
+    def test_bloom_set_scales_and_keeps_error_rate(self):
+        visited = BloomVisitedSet(capacity=1000, error_rate=0.01)
+        for i in range(20000):
+            visited.add(f"site.com/page/{i}")
+        self.assertGreater(len(visited.filters), 1)
+        self.assertTrue(all(f"site.com/page/{i}" in visited for i in range(20000)))
+        false_positives = sum(f"other.com/page/{i}" in visited for i in range(20000))
+        self.assertLess(false_positives / 20000, 0.02)
+
+    def test_unknown_kind(self):
+        with self.assertRaises(ValueError):
+            create_visited_set("trie")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import aiohttp
+from aiohttp.compression_utils import HAS_BROTLI
+from body import DEFAULT_MAX_BODY_SIZE, CHUNK_SIZE
+
+DEFAULT_USER_AGENT = "BootCrawler/1.0"
+
+
+class TransportConfig:
+    def __init__(self, limit=None, limit_per_host=None, keepalive_timeout=30,
+                 dns_cache_ttl=300, compress=True, timeout=10,
+                 connect_timeout=None, user_agent=DEFAULT_USER_AGENT,
+                 max_body_size=DEFAULT_MAX_BODY_SIZE, chunk_size=CHUNK_SIZE):
+        """
+        Settings for the pooled HTTP transport.
+
+        Args:
+            limit: Total connection limit (default: the crawler's max_concurrency)
+            limit_per_host: Connections per host (default: same as limit)
+            keepalive_timeout: Seconds an idle connection is kept for reuse
+            dns_cache_ttl: Seconds resolved addresses are cached (None caches forever)
+            compress: Negotiate gzip/deflate (and br when Brotli is installed)
+            timeout: Total seconds allowed per request
+            connect_timeout: Seconds allowed to get a connection (None: no
+                separate limit)
+            user_agent: User-Agent header sent with every request
+            max_body_size: Largest (decompressed) body to download; bigger
+                responses fail with BodyTooLargeError (None: no limit)
+            chunk_size: Bytes read from a response at a time
+
+        Raises:
+            ValueError: For a limit, timeout, TTL or size below its minimum
+        """
+        for name, value, minimum in (("limit", limit, 1), ("limit_per_host", limit_per_host, 1),
+                                     ("keepalive_timeout", keepalive_timeout, 0),
+                                     ("dns_cache_ttl", dns_cache_ttl, 0),
+                                     ("max_body_size", max_body_size, 1),
+                                     ("chunk_size", chunk_size, 1)):
+            if value is not None and value < minimum:
+                raise ValueError(f"{name} must be at least {minimum}, got {value}")
+        for name, value in (("timeout", timeout), ("connect_timeout", connect_timeout)):
+            if value is not None and value <= 0:
+                raise ValueError(f"{name} must be positive, got {value}")
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.compress = compress
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.user_agent = user_agent
+        self.max_body_size = max_body_size
+        self.chunk_size = chunk_size
+
+
+def accept_encoding():
+    """Return the Accept-Encoding value aiohttp can decode here."""
+    if HAS_BROTLI:
+        return "gzip, deflate, br"
+    return "gzip, deflate"
+
+
+def default_headers(config):
+    """Build the headers shared by every request."""
+    headers = {"User-Agent": config.user_agent}
+    if config.compress:
+        headers["Accept-Encoding"] = accept_encoding()
+    else:
+        headers["Accept-Encoding"] = "identity"
+    return headers
+
+
+def create_session(config=None, max_concurrency=5, trace_configs=None):
+    """
+    Create a ClientSession with a tuned, pooled connector.
+
+    The connector, default headers and timeout are built once here instead
+    of on every request. Connection limits default to max_concurrency so the
+    pool never opens more sockets than there are workers to use them.
+
+    Args:
+        config: TransportConfig (defaults are used when None)
+        max_concurrency: Crawler concurrency the limits are tied to
+        trace_configs: aiohttp TraceConfigs for request timing (see
+            metrics.CrawlMetrics.trace_config)
+
+    Returns:
+        An aiohttp.ClientSession; close it when done
+    """
+    if config is None:
+        config = TransportConfig()
+
+    limit = config.limit or max_concurrency
+    limit_per_host = config.limit_per_host or limit
+
+    connector = aiohttp.TCPConnector(
+        limit=limit,
+        limit_per_host=limit_per_host,
+        keepalive_timeout=config.keepalive_timeout,
+        use_dns_cache=True,
+        ttl_dns_cache=config.dns_cache_ttl,
+    )
+    timeout = aiohttp.ClientTimeout(
+        total=config.timeout,
+        connect=config.connect_timeout,
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        headers=default_headers(config),
+        timeout=timeout,
+        auto_decompress=True,
+        trace_configs=trace_configs,
+    )
@@ -0,0 +1,206 @@
+import re
+from functools import lru_cache
+from urllib.parse import urlsplit, urljoin, quote, unquote_plus
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = frozenset([
+    "fbclid", "gclid", "dclid", "gbraid", "wbraid", "msclkid", "yclid",
+    "mc_cid", "mc_eid", "_ga", "_gl", "igshid", "ref_src",
+])
+TRACKING_PREFIXES = ("utm_",)
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# Characters that never need percent-encoding (RFC 3986 "unreserved")
+UNRESERVED = frozenset(
+    "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-._~"
+)
+PERCENT_ESCAPE = re.compile(r"%([0-9A-Fa-f]{2})")
+# Left alone when re-quoting: delimiters, sub-delims and existing escapes
+PATH_SAFE = "/:@!$&'()*+,;=-._~%"
+QUERY_SAFE = PATH_SAFE + "?"
+
+# Characters urljoin strips, rejects or rewrites around (";" path params),
+# which rule out the join fast path
+UNSAFE_FOR_FAST_JOIN = frozenset("\t\r\n[];")
+
+
+def normalize_escape(match):
+    """Decode an escaped unreserved character, uppercase any other escape."""
+    char = chr(int(match.group(1), 16))
+    if char in UNRESERVED:
+        return char
+    return "%" + match.group(1).upper()
+
+
+def normalize_percent_encoding(value, safe):
+    """Percent-encode what must be encoded and canonicalize existing escapes."""
+    if not value.isascii() or " " in value or '"' in value:
+        value = quote(value, safe=safe)
+    if "%" in value:
+        value = PERCENT_ESCAPE.sub(normalize_escape, value)
+    return value
+
+
+def is_tracking_param(name):
+    name = unquote_plus(name).lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+class URLNormalizer:
+    def __init__(self, base_url=None, keep_query=True, strip_tracking=True,
+                 strip_www=True, cache_size=65536):
+        """
+        Canonicalize URLs into dedupe keys and check them against a base host.
+
+        A key is host[:port] + path [+ "?" + query], without scheme or
+        fragment. Results for the most recent cache_size URLs are cached,
+        since the same navigation links turn up on nearly every page.
+
+        Args:
+            base_url: URL whose host counts as "same site" (optional)
+            keep_query: Keep the query string (sorted) in the key
+            strip_tracking: Drop utm_* and other click-tracking parameters
+            strip_www: Treat www.example.com and example.com as one host
+            cache_size: Number of URLs to remember (LRU)
+        """
+        self.keep_query = keep_query
+        self.strip_tracking = strip_tracking
+        self.strip_www = strip_www
+        self.split = lru_cache(maxsize=cache_size)(self.split_uncached)
+        self.base_host = self.split(base_url)[0] if base_url else None
+
+    def split_uncached(self, url):
+        """
+        Canonicalize url without the cache.
+
+        Returns:
+            (host, key): the canonical host[:port] and the full dedupe key
+        """
+        parsed = urlsplit(url)
+        scheme = parsed.scheme.lower()
+
+        hostname = parsed.hostname or ""
+        if ":" in hostname:
+            # IPv6 literal
+            hostname = f"[{hostname}]"
+        if self.strip_www and hostname.startswith("www."):
+            hostname = hostname[4:]
+        try:
+            port = parsed.port
+        except ValueError:
+            port = None
+        # Compare the parsed port, so e.g. :8080 is never mangled
+        if port is not None and port != DEFAULT_PORTS.get(scheme):
+            host = f"{hostname}:{port}"
+        else:
+            host = hostname
+
+        path = normalize_percent_encoding(parsed.path, PATH_SAFE).rstrip("/")
+        key = host + path
+
+        if self.keep_query and parsed.query:
+            params = []
+            for param in parsed.query.split("&"):
+                if not param:
+                    continue
+                if self.strip_tracking and is_tracking_param(param.split("=", 1)[0]):
+                    continue
+                params.append(normalize_percent_encoding(param, QUERY_SAFE))
+            if params:
+                params.sort()
+                key += "?" + "&".join(params)
+        return host, key
+
+    def normalize(self, url):
+        """Return the dedupe key for url."""
+        return self.split(url)[1]
+
+    def host(self, url):
+        """Return the canonical host[:port] of url."""
+        return self.split(url)[0]
+
+    def is_same_site(self, url):
+        """True if url is on the base host."""
+        return self.split(url)[0] == self.base_host
+
+    def normalize_in_scope(self, url):
+        """
+        Return the dedupe key for url, or None if it is off the base host.
+
+        One cached lookup answers both questions.
+        """
+        host, key = self.split(url)
+        if host != self.base_host:
+            return None
+        return key
+
+    def filter_links(self, urls):
+        """
+        Batch form of normalize_in_scope for all the links on one page.
+
+        Args:
+            urls: Absolute URLs in document order
+
+        Returns:
+            List of (url, key) for same-site links, first occurrence of
+            each key only
+        """
+        split = self.split
+        base_host = self.base_host
+        seen = set()
+        links = []
+        for url in urls:
+            host, key = split(url)
+            if host == base_host and key not in seen:
+                seen.add(key)
+                links.append((url, key))
+        return links
+
+    def cache_info(self):
+        return self.split.cache_info()
+
+
+class LinkResolver:
+    """
+    urljoin() against one page URL, with fast paths for the common cases.
+
+    Root-relative hrefs ("/about") are appended to the page's origin and
+    plain absolute http(s) hrefs are returned as they are; anything that
+    urljoin would rewrite (dot segments, "//host", stray tabs, empty
+    query/fragment markers, ...) goes through urljoin itself, so results
+    are always identical to urljoin(base_url, href).
+    """
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+        parsed = urlsplit(base_url) if base_url else None
+        if parsed is not None and parsed.scheme in DEFAULT_PORTS and parsed.netloc:
+            self.origin = f"{parsed.scheme}://{parsed.netloc}"
+        else:
+            self.origin = None
+
+    def resolve(self, href):
+        if (self.origin is not None and href.isascii() and "/." not in href
+                and UNSAFE_FOR_FAST_JOIN.isdisjoint(href)
+                and not href.endswith(("?", "#")) and "?#" not in href):
+            if href.startswith("/") and not href.startswith("//"):
+                return self.origin + href
+            if (href.startswith(("http://", "https://"))
+                    and href.split("://", 1)[1][:1] not in ("", "/", "?", "#")):
+                return href
+        return urljoin(self.base_url, href)
+
+
+# Shared normalizer for the module-level helpers
+DEFAULT_NORMALIZER = URLNormalizer()
+
+
+def normalize_url(url):
+    """Canonicalize url with the shared, cached normalizer."""
+    return DEFAULT_NORMALIZER.normalize(url)
+
+
+def same_host(base_url, url):
+    """True if both URLs are on the same canonical host."""
+    return DEFAULT_NORMALIZER.host(base_url) == DEFAULT_NORMALIZER.host(url)
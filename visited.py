@@ -0,0 +1,210 @@
+import math
+from array import array
+from hashlib import blake2b
+
+VISITED_KINDS = ("set", "fingerprint", "bloom")
+
+
+def url_fingerprint(key):
+    """
+    Hash a normalized URL to a non-zero 64-bit integer.
+
+    Zero is reserved as the empty-slot marker in FingerprintVisitedSet.
+    """
+    fingerprint = int.from_bytes(blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+    return fingerprint or 1
+
+
+class StringVisitedSet:
+    """Exact visited set holding the normalized URL strings (the default)."""
+
+    def __init__(self):
+        self.keys = set()
+
+    def __contains__(self, key):
+        return key in self.keys
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, key):
+        """
+        Record key as visited.
+
+        Returns:
+            True if key was not already in the set
+        """
+        if key in self.keys:
+            return False
+        self.keys.add(key)
+        return True
+
+
+class FingerprintVisitedSet:
+    """
+    Visited set of 64-bit URL fingerprints in an open-addressing table.
+
+    Fingerprints live in a flat array('Q') kept at most half full, so each
+    URL costs about 16 bytes instead of a string object plus a set entry.
+    Two different URLs are only confused on a 64-bit hash collision.
+    """
+
+    def __init__(self, capacity=1024):
+        size = 1 << max(10, (capacity * 2 - 1).bit_length())
+        self.slots = array("Q", bytes(8 * size))
+        self.mask = size - 1
+        self.count = 0
+
+    def __contains__(self, key):
+        fingerprint = url_fingerprint(key)
+        return self.slots[self.find_slot(fingerprint)] == fingerprint
+
+    def __len__(self):
+        return self.count
+
+    def find_slot(self, fingerprint):
+        """Return the slot holding fingerprint, or the empty slot for it."""
+        slots = self.slots
+        mask = self.mask
+        index = fingerprint & mask
+        while True:
+            value = slots[index]
+            if value == 0 or value == fingerprint:
+                return index
+            index = (index + 1) & mask
+
+    def add(self, key):
+        """
+        Record key as visited.
+
+        Returns:
+            True if key was not already in the set
+        """
+        fingerprint = url_fingerprint(key)
+        index = self.find_slot(fingerprint)
+        if self.slots[index] == fingerprint:
+            return False
+        self.slots[index] = fingerprint
+        self.count += 1
+        if self.count * 2 > len(self.slots):
+            self.grow()
+        return True
+
+    def grow(self):
+        old_slots = self.slots
+        self.slots = array("Q", bytes(16 * len(old_slots)))
+        self.mask = len(self.slots) - 1
+        for fingerprint in old_slots:
+            if fingerprint:
+                self.slots[self.find_slot(fingerprint)] = fingerprint
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter sized for capacity keys at error_rate."""
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def positions(self, hashes):
+        # Enhanced double hashing: k positions from the two halves of one
+        # digest. Plain first + i * second collapses to a single bit when
+        # second is a multiple of the (small) filter size.
+        first, second = hashes
+        size = self.size
+        position = first % size
+        step = second % size
+        positions = []
+        for i in range(self.hash_count):
+            positions.append(position)
+            position = (position + step) % size
+            step = (step + i + 1) % size
+        return positions
+
+    def contains_hashes(self, hashes):
+        bits = self.bits
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in self.positions(hashes))
+
+    def add_hashes(self, hashes):
+        bits = self.bits
+        for p in self.positions(hashes):
+            bits[p >> 3] |= 1 << (p & 7)
+        self.count += 1
+
+
+def bloom_hashes(key):
+    """Two independent 64-bit hashes of key for double hashing."""
+    digest = blake2b(key.encode("utf-8"), digest_size=16).digest()
+    return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+
+
+class BloomVisitedSet:
+    """
+    Scalable Bloom filter visited set.
+
+    When the current filter reaches its capacity a larger one is added
+    with a tighter error rate, so the overall false-positive rate stays
+    near error_rate however many URLs arrive. A false positive means a new
+    URL is treated as seen and never crawled; nothing is ever crawled twice.
+    """
+
+    def __init__(self, capacity=65536, error_rate=0.001, growth=2, tightening=0.5):
+        self.growth = growth
+        self.tightening = tightening
+        # Split the error budget so the series sums to error_rate
+        self.filters = [BloomFilter(capacity, error_rate * (1 - tightening))]
+        self.count = 0
+
+    def __contains__(self, key):
+        hashes = bloom_hashes(key)
+        return any(bloom.contains_hashes(hashes) for bloom in self.filters)
+
+    def __len__(self):
+        return self.count
+
+    def add(self, key):
+        """
+        Record key as visited.
+
+        Returns:
+            True if key was (probably) not already in the set
+        """
+        hashes = bloom_hashes(key)
+        if any(bloom.contains_hashes(hashes) for bloom in self.filters):
+            return False
+        current = self.filters[-1]
+        if current.count >= current.capacity:
+            current = BloomFilter(
+                current.capacity * self.growth,
+                current.error_rate * self.tightening,
+            )
+            self.filters.append(current)
+        current.add_hashes(hashes)
+        self.count += 1
+        return True
+
+
+def create_visited_set(kind="set", capacity=65536, error_rate=0.001):
+    """
+    Create a visited-set backend.
+
+    Args:
+        kind: "set" (exact strings), "fingerprint" (exact 64-bit hashes)
+              or "bloom" (scalable Bloom filter)
+        capacity: Expected number of URLs, used for initial sizing
+        error_rate: Target false-positive rate for "bloom"
+
+    Returns:
+        An object with add(key) -> bool, __contains__ and __len__
+    """
+    if kind == "set":
+        return StringVisitedSet()
+    if kind == "fingerprint":
+        return FingerprintVisitedSet(capacity)
+    if kind == "bloom":
+        return BloomVisitedSet(capacity, error_rate)
+    raise ValueError(f"Unknown visited set: {kind}. Expected one of {VISITED_KINDS}")